@@ -0,0 +1,144 @@
+"""CPU affinity pinning of EXECUTABLE (see --pin-cpus).
+
+Each run of EXECUTABLE is pinned to `num` CPUs. With `pytest-xdist`, these are the CPUs of the CPU slots held by
+the test (see cpu_slots.py), so tests that run side by side use disjoint sets of CPUs.
+
+The available CPUs are ordered so that the first thread of each physical core comes first, so the slots are
+only mapped to SMT siblings when the CPU budget exceeds the number of physical cores.
+"""
+
+import math
+import os
+from functools import cache
+from pathlib import Path
+
+SYSFS_CPU_PATH = Path("/sys/devices/system/cpu")
+CGROUP_CPU_MAX_PATH = Path("/sys/fs/cgroup/cpu.max")
+
+
+def parse_cpu_list(value: str) -> list[int]:
+    """Parse a CPU list in the format of the kernel (e.g. "0-3,8").
+
+    Args:
+        value (str): The CPU list.
+
+    Returns:
+        list[int]: The CPUs in the list.
+    """
+    cpus = []
+    for part in value.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus += range(int(first), int(last or first) + 1)
+    return cpus
+
+
+def thread_siblings(cpu: int) -> list[int]:
+    """Get the SMT siblings of a CPU (including the CPU itself).
+
+    Args:
+        cpu (int): The CPU.
+
+    Returns:
+        list[int]: The CPUs of the same physical core, or only `cpu` if the topology is unknown.
+    """
+    path = SYSFS_CPU_PATH / f"cpu{cpu}" / "topology" / "thread_siblings_list"
+    try:
+        return parse_cpu_list(path.read_text())
+    except (OSError, ValueError):
+        return [cpu]
+
+
+def cgroup_cpu_limit() -> int | None:
+    """Get the CPU limit of the (cgroup v2) control group of the tester, e.g. of a CI container.
+
+    Returns:
+        int | None: The CPU quota divided by its period (rounded up), or None if there is no limit.
+    """
+    try:
+        quota, period = CGROUP_CPU_MAX_PATH.read_text().split()
+        if quota == "max":
+            return None
+        return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        return None
+
+
+def usable_cpu_count() -> int:
+    """Get the number of CPUs that the tester may use.
+
+    Returns:
+        int: The number of CPUs in the affinity mask of the tester, limited by the CPU limit of its cgroup.
+    """
+    count = len(os.sched_getaffinity(0))
+    limit = cgroup_cpu_limit()
+    return count if limit is None else min(count, limit)
+
+
+@cache
+def available_cpus() -> list[int]:
+    """Get the CPUs that are available to the tester, physical cores first.
+
+    Returns:
+        list[int]: The first thread of each physical core, followed by the remaining SMT siblings.
+    """
+    cpus = sorted(os.sched_getaffinity(0))
+    # The index of each CPU among the (available) threads of its physical core:
+    thread_index = {
+        cpu: [sibling for sibling in thread_siblings(cpu) if sibling in cpus].index(cpu)
+        for cpu in cpus
+    }
+    return sorted(cpus, key=lambda cpu: (thread_index[cpu], cpu))
+
+
+def cpus_for_slots(slots: list[int], num: int) -> set[int]:
+    """Get the CPUs to pin a run of EXECUTABLE to.
+
+    Args:
+        slots (list[int]): The CPU slots held by the test (empty without `pytest-xdist`).
+        num (int): The number of threads of EXECUTABLE.
+
+    Returns:
+        set[int]: The CPUs of the slots, or the first `num` available CPUs if no slots are held.
+    """
+    cpus = available_cpus()
+    if not slots:
+        slots = list(range(min(num, len(cpus))))
+    return {cpus[slot % len(cpus)] for slot in slots}
+
+
+def check_timing_environment(cpu_budget: int) -> list[str]:
+    """Check for settings of the machine that make timings less reproducible.
+
+    Args:
+        cpu_budget (int): The number of CPU slots (see --cpu-budget).
+
+    Returns:
+        list[str]: A warning for each problem.
+    """
+    warnings = []
+    cpus = available_cpus()
+    governors = {}
+    for cpu in cpus:
+        path = SYSFS_CPU_PATH / f"cpu{cpu}" / "cpufreq" / "scaling_governor"
+        try:
+            governors[cpu] = path.read_text().strip()
+        except OSError:
+            pass
+    not_performance = sorted(
+        cpu for cpu, governor in governors.items() if governor != "performance"
+    )
+    if not_performance:
+        warnings.append(
+            f"The frequency scaling governor of {len(not_performance)} CPU(s) is not "
+            f'"performance" (e.g. CPU {not_performance[0]}: "{governors[not_performance[0]]}"), '
+            "so timings depend on the current clock frequency."
+        )
+    num_physical_cores = len({min(thread_siblings(cpu)) for cpu in cpus})
+    if min(cpu_budget, len(cpus)) > num_physical_cores:
+        warnings.append(
+            f"The CPU budget of {cpu_budget} exceeds the {num_physical_cores} available physical cores, "
+            "so some runs are pinned to SMT siblings of other runs' CPUs."
+        )
+    return warnings
@@ -0,0 +1,152 @@
+"""Performance regression gate against a stored timing baseline (see --save-baseline and --compare-baseline).
+
+When a baseline option is passed, `test_partdiff_performance` is generated for every test id alongside
+`test_partdiff_parametrized`, so each test id gets a correctness verdict and a performance verdict.
+The performance test runs EXECUTABLE repeatedly and records the calculation times.
+
+With --save-baseline, the recorded samples of the session are written to a baseline file.
+With --compare-baseline, each performance test compares its samples with the samples in a baseline file using
+Welch's t-test and fails if the mean calculation time is significantly larger than the baseline's mean plus the
+tolerance (see --regression-tolerance).
+"""
+
+import json
+import math
+import statistics
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import pytest
+
+import benchmark
+import util
+
+PERFORMANCE_PROPERTY = "performance"
+
+BASELINE_VERSION = 1
+
+
+@cache
+def load_baseline(path: Path) -> dict[str, list[float]]:
+    """Load a baseline file.
+
+    Args:
+        path (Path): The path of the baseline file.
+
+    Raises:
+        ValueError: When the file is not a baseline file of a supported version.
+
+    Returns:
+        dict[str, list[float]]: The calculation time samples per test id.
+    """
+    baseline = json.loads(path.read_text())
+    if not isinstance(baseline, dict) or baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f'"{path}" is not a baseline file.')
+    return {
+        test_id: entry["calculation_time"]
+        for test_id, entry in baseline["entries"].items()
+    }
+
+
+@dataclass
+class RegressionTestResult:
+    """The result of the regression test of one configuration"""
+
+    baseline_mean: float
+    mean: float
+    threshold: float
+    t: float
+    critical_value: float
+    regressed: bool
+
+
+def regression_test(
+    baseline_samples: list[float], samples: list[float], tolerance: float
+) -> RegressionTestResult:
+    """Test if the samples are significantly slower than the baseline plus a tolerance.
+
+    This is a one-sided Welch's t-test of the null hypothesis mean(samples) <= (1 + tolerance) * mean(baseline)
+    at a significance level of 2.5%. Both the baseline samples and their spread are scaled by (1 + tolerance).
+
+    Args:
+        baseline_samples (list[float]): The calculation time samples of the baseline (at least one).
+        samples (list[float]): The calculation time samples to test (at least one).
+        tolerance (float): The tolerated relative slowdown (e.g. 0.1 == 10%).
+
+    Returns:
+        RegressionTestResult: The result of the test.
+    """
+    scale = 1 + tolerance
+    baseline_mean = statistics.fmean(baseline_samples)
+    mean = statistics.fmean(samples)
+    threshold = scale * baseline_mean
+    var_baseline = (
+        (scale * statistics.stdev(baseline_samples)) ** 2 / len(baseline_samples)
+        if len(baseline_samples) > 1
+        else 0.0
+    )
+    var = statistics.stdev(samples) ** 2 / len(samples) if len(samples) > 1 else 0.0
+    standard_error = math.sqrt(var_baseline + var)
+    if standard_error == 0:
+        # Without any spread, every slowdown beyond the threshold is significant:
+        return RegressionTestResult(
+            baseline_mean, mean, threshold, math.inf, 0.0, mean > threshold
+        )
+    t = (mean - threshold) / standard_error
+    # Welch-Satterthwaite approximation of the degrees of freedom:
+    df_terms = []
+    if len(baseline_samples) > 1:
+        df_terms.append(var_baseline**2 / (len(baseline_samples) - 1))
+    if len(samples) > 1:
+        df_terms.append(var**2 / (len(samples) - 1))
+    df = max(1, math.floor(standard_error**4 / sum(df_terms)))
+    critical_value = benchmark.t_critical_95(df)
+    return RegressionTestResult(
+        baseline_mean, mean, threshold, t, critical_value, t > critical_value
+    )
+
+
+class BaselinePlugin:
+    """A pytest plugin that collects the performance samples and writes them to a baseline file.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, path: Path):
+        """Create a BaselinePlugin.
+
+        Args:
+            path (Path): The path of the baseline file to write.
+        """
+        self.path = path
+        self.samples: dict[str, list[float]] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call":
+            return
+        performance = util.get_user_property(report, PERFORMANCE_PROPERTY)
+        if performance is not None:
+            self.samples[performance["test_id"]] = performance["calculation_time"]
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_sessionfinish
+        """
+        if not self.samples:
+            return
+        self.path.write_text(
+            json.dumps(
+                {
+                    "version": BASELINE_VERSION,
+                    "entries": {
+                        test_id: {"calculation_time": samples}
+                        for test_id, samples in sorted(self.samples.items())
+                    },
+                },
+                indent=2,
+            )
+        )
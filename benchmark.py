@@ -0,0 +1,219 @@
+"""Benchmarking of partdiff implementations (see --benchmark).
+
+In benchmark mode, each test runs EXECUTABLE repeatedly (after some warm-up runs) once the correctness check has
+passed. For each run, the self-reported calculation time and memory usage as well as the externally measured
+wall time are recorded as a property of the test report (so they also reach the controller process of
+`pytest-xdist`). At the end of the session, the samples are summarized per configuration as a table and,
+optionally, as JSON.
+"""
+
+import json
+import math
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+import util
+
+BENCHMARK_PROPERTY = "benchmark"
+
+# Two-sided critical values of Student's t-distribution for a 95% confidence interval, indexed by the degrees
+# of freedom. For more than 30 degrees of freedom, the normal approximation is used.
+T_CRITICAL_95 = (
+    math.nan,
+    12.706,
+    4.303,
+    3.182,
+    2.776,
+    2.571,
+    2.447,
+    2.365,
+    2.306,
+    2.262,
+    2.228,
+    2.201,
+    2.179,
+    2.160,
+    2.145,
+    2.131,
+    2.120,
+    2.110,
+    2.101,
+    2.093,
+    2.086,
+    2.080,
+    2.074,
+    2.069,
+    2.064,
+    2.060,
+    2.056,
+    2.052,
+    2.048,
+    2.045,
+    2.042,
+)
+Z_CRITICAL_95 = 1.960
+
+
+def t_critical_95(df: int) -> float:
+    """Get the two-sided critical value of Student's t-distribution for a 95% confidence interval.
+
+    Args:
+        df (int): The degrees of freedom (at least 1).
+
+    Returns:
+        float: The critical value.
+    """
+    assert df >= 1
+    if df < len(T_CRITICAL_95):
+        return T_CRITICAL_95[df]
+    return Z_CRITICAL_95
+
+
+@dataclass
+class Summary:
+    """Summary statistics of a list of samples"""
+
+    n: int
+    mean: float
+    median: float
+    stdev: float
+    ci_low: float | None
+    ci_high: float | None
+
+    @classmethod
+    def from_samples(cls, samples: list[float]) -> Self:
+        """Summarize a list of samples.
+
+        The confidence interval is the 95% confidence interval of the mean. For a single sample, the standard
+        deviation is 0 and there is no confidence interval.
+
+        Args:
+            samples (list[float]): The samples (at least one).
+
+        Returns:
+            Self: The summary statistics.
+        """
+        n = len(samples)
+        assert n >= 1
+        mean = statistics.fmean(samples)
+        median = statistics.median(samples)
+        if n == 1:
+            return Summary(n, mean, median, 0.0, None, None)
+        stdev = statistics.stdev(samples)
+        half_width = t_critical_95(n - 1) * stdev / math.sqrt(n)
+        return Summary(n, mean, median, stdev, mean - half_width, mean + half_width)
+
+
+def run_benchmark(
+    run: Callable[[], str], repetitions: int, warmup: int
+) -> dict[str, list[float]]:
+    """Run EXECUTABLE repeatedly and collect timing samples.
+
+    Args:
+        run (Callable[[], str]): Runs EXECUTABLE once and returns its output.
+        repetitions (int): The number of measured runs.
+        warmup (int): The number of unmeasured runs before the measured runs.
+
+    Returns:
+        dict[str, list[float]]: The samples of the calculation time (s), memory usage (MiB), and wall time (s).
+    """
+    for _ in range(warmup):
+        run()
+    samples: dict[str, list[float]] = {
+        "calculation_time": [],
+        "memory_usage": [],
+        "wall_time": [],
+    }
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        output = run()
+        wall_time = time.perf_counter() - start
+        calculation_time, memory_usage = (
+            util.parse_time_and_memory_from_partdiff_output(output)
+        )
+        samples["calculation_time"].append(calculation_time)
+        samples["memory_usage"].append(memory_usage)
+        samples["wall_time"].append(wall_time)
+    return samples
+
+
+class BenchmarkPlugin:
+    """A pytest plugin that collects the benchmark samples and reports them at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, json_path: Path | None):
+        """Create a BenchmarkPlugin.
+
+        Args:
+            json_path (Path | None): The path of the JSON report (None == no JSON report).
+        """
+        self.json_path = json_path
+        self.samples: dict[str, dict[str, list[float]]] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call":
+            return
+        samples = util.get_user_property(report, BENCHMARK_PROPERTY)
+        if samples is not None:
+            self.samples[report.nodeid] = samples
+
+    def summaries(self) -> dict[str, dict[str, Summary]]:
+        """Summarize the collected samples.
+
+        Returns:
+            dict[str, dict[str, Summary]]: The summary of each measured quantity, per test.
+        """
+        return {
+            nodeid: {
+                quantity: Summary.from_samples(values)
+                for quantity, values in samples.items()
+            }
+            for nodeid, samples in sorted(self.samples.items())
+        }
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.samples:
+            return
+        summaries = self.summaries()
+        terminalreporter.section("benchmark")
+        terminalreporter.write_line(
+            f"{'test':<60} {'n':>3} {'mean [s]':>10} {'median [s]':>10} {'stdev [s]':>10} "
+            f"{'95% CI [s]':>23} {'wall [s]':>10} {'mem [MiB]':>10}"
+        )
+        for nodeid, summary in summaries.items():
+            t = summary["calculation_time"]
+            ci = "-" if t.ci_low is None else f"[{t.ci_low:.6f}, {t.ci_high:.6f}]"
+            terminalreporter.write_line(
+                f"{nodeid.rpartition('::')[2]:<60} {t.n:>3} {t.mean:>10.6f} {t.median:>10.6f} {t.stdev:>10.6f} "
+                f"{ci:>23} {summary['wall_time'].mean:>10.6f} {summary['memory_usage'].median:>10.6f}"
+            )
+        if self.json_path is not None:
+            self.json_path.write_text(
+                json.dumps(
+                    {
+                        nodeid: {
+                            "samples": self.samples[nodeid],
+                            "summary": {
+                                quantity: asdict(s) for quantity, s in summary.items()
+                            },
+                        }
+                        for nodeid, summary in summaries.items()
+                    },
+                    indent=2,
+                )
+            )
+            terminalreporter.write_line(f"Wrote benchmark results to {self.json_path}")
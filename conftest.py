@@ -21,14 +21,39 @@ import random
 import re
 import shlex
 import shutil
+import statistics
+import tempfile
+import warnings
+from collections import ChainMap
+from collections.abc import Generator, Iterator, Mapping
 from enum import Enum
 from pathlib import Path
 
 import pytest
 
-import output_masks
+import affinity
+import baseline
+import benchmark
+import cpu_slots
+import extra_iterations_table
+import numa
+import output_parser
+import pruning
+import reference_store
+import resource_usage
+import scaling
+import scheduling
+import thread_sweep
+import throughput
 import util
+import valgrind
+from reference_cache import ReferenceCache
+from result_cache import ResultCache, ReuseMode
 from util import PartdiffParamsTuple, ReferenceSource
+from valgrind import ValgrindMode
+
+# The unit tests of the tester itself are run separately (see README.md):
+collect_ignore = ["tests"]
 
 
 def shlex_list_str(value: str) -> list[str]:
@@ -66,7 +91,8 @@ def num_list(value: str) -> list[int]:
     - "1-3"
     - "1-3,5-8"
 
-    The list must be sorted and must not contain duplicates.
+    The list must be sorted and must not contain duplicates. Alternatively, "auto" and its variants expand to a
+    sweep up to the number of usable CPUs (see thread_sweep.parse_auto()).
 
     Args:
         value (str): The str to parse.
@@ -81,6 +107,8 @@ def num_list(value: str) -> list[int]:
     def is_unique(l) -> bool:
         return len(set(l)) == len(l)
 
+    if value.startswith("auto"):
+        return thread_sweep.parse_auto(value)
     if not REGEX_NUM_LIST.match(value):
         raise ValueError(f'Unable to parse number list "{value}"')
     result = []
@@ -171,6 +199,26 @@ def partdiff_params_filter_regex(value: str) -> re.Pattern:
     raise ValueError(f'The filter "{value}" could not be parsed.')
 
 
+def file_path(value: str) -> Path:
+    """Parse a file Path from a str.
+
+    Args:
+        value (str): The str to parse.
+
+    Raises:
+        ValueError: When the given value does not exist or is not a file.
+
+    Returns:
+        Path: The parsed path.
+    """
+    p = Path(value)
+    if not p.exists():
+        raise ValueError(f'Path "{value}" does not exist.')
+    if not p.is_file():
+        raise ValueError(f'Path "{value}" is not a file.')
+    return p
+
+
 def dir_path(value: str) -> Path:
     """Parse a directory Path from a str.
 
@@ -250,12 +298,20 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         help="Strictness of the check (default: 1)",
         type=int,
         default=1,
-        choices=range(output_masks.NUM_OUTPUT_MASKS),
+        choices=range(output_parser.NUM_STRICTNESS_LEVELS),
     )
     custom_options.addoption(
         "--valgrind",
-        help="Use valgrind to execute the given executable.",
-        action="store_true",
+        help=(
+            "Use valgrind to execute the given executable "
+            '(with "sample": only the cheapest test case per num, method, func, and term).'
+        ),
+        nargs="?",
+        metavar="MODE",
+        type=ValgrindMode,
+        const=ValgrindMode.ALL,
+        default=ValgrindMode.OFF,
+        choices=ValgrindMode,
     )
     custom_options.addoption(
         "--max-num-tests",
@@ -264,6 +320,16 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         type=int,
         default=0,
     )
+    custom_options.addoption(
+        "--time-budget",
+        metavar="SECONDS",
+        help=(
+            "Only perform a subset of the tests whose expected runtime fits into SECONDS, "
+            "but that covers each value of each parameter (default: unlimited)."
+        ),
+        type=float,
+        default=None,
+    )
     custom_options.addoption(
         "--reference-source",
         help=(
@@ -276,12 +342,169 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         default=ReferenceSource.CACHE,
         choices=ReferenceSource,
     )
+    custom_options.addoption(
+        "--reference-store",
+        metavar="FILE",
+        help=(
+            "Read the cached reference output from a packed reference store "
+            "(see reference_store.py) instead of reference_output."
+        ),
+        type=file_path,
+        default=None,
+    )
+    custom_options.addoption(
+        "--reference-cache-dir",
+        metavar="DIR",
+        help=(
+            "Directory of the persistent cache for output of the reference implementation "
+            "(default: .reference_cache)."
+        ),
+        type=Path,
+        default=util.REFERENCE_CACHE_PATH,
+    )
+    custom_options.addoption(
+        "--reference-cache-size",
+        metavar="MiB",
+        help=(
+            "Maximum size of the persistent reference cache in MiB; "
+            "least recently used entries are evicted (default: 256; 0 == disable the cache)."
+        ),
+        type=int,
+        default=256,
+    )
+    custom_options.addoption(
+        "--reuse-results",
+        help=(
+            "Reuse the output of EXECUTABLE from earlier sessions if EXECUTABLE hasn't changed "
+            "(reuse (default if MODE is omitted) == use cached output; "
+            "refresh == run EXECUTABLE and overwrite the cached output)."
+        ),
+        nargs="?",
+        metavar="MODE",
+        type=ReuseMode,
+        const=ReuseMode.REUSE,
+        default=ReuseMode.OFF,
+        choices=ReuseMode,
+    )
+    custom_options.addoption(
+        "--result-cache-dir",
+        metavar="DIR",
+        help="Directory of the persistent cache for --reuse-results (default: .result_cache).",
+        type=Path,
+        default=util.RESULT_CACHE_PATH,
+    )
+    custom_options.addoption(
+        "--result-cache-size",
+        metavar="MiB",
+        help=(
+            "Maximum size of the persistent result cache in MiB; "
+            "least recently used entries are evicted (default: 256)."
+        ),
+        type=int,
+        default=256,
+    )
+    custom_options.addoption(
+        "--concurrent",
+        help=("Run EXECUTABLE and the reference implementation concurrently."),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--stream-output",
+        help=(
+            "Check the output of EXECUTABLE while it is produced and kill EXECUTABLE early "
+            "when a header line doesn't match the reference output or when the output is too large."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--max-output-size",
+        metavar="MiB",
+        help="Kill EXECUTABLE when its output exceeds this size with --stream-output (default: 1).",
+        type=int,
+        default=1,
+    )
+    custom_options.addoption(
+        "--timeout",
+        metavar="s",
+        help="Kill EXECUTABLE when it runs longer than s seconds (default: no timeout).",
+        type=float,
+        default=None,
+    )
+    custom_options.addoption(
+        "--timeout-factor",
+        metavar="x",
+        help=(
+            "Add x times the calculation time of the reference implementation "
+            "for the same parameters to --timeout."
+        ),
+        type=float,
+        default=None,
+    )
+    custom_options.addoption(
+        "--max-memory",
+        metavar="MiB",
+        help="Limit the address space of EXECUTABLE (RLIMIT_AS).",
+        type=int,
+        default=None,
+    )
+    custom_options.addoption(
+        "--max-cpu-time",
+        metavar="s",
+        help="Limit the CPU time of EXECUTABLE (RLIMIT_CPU).",
+        type=int,
+        default=None,
+    )
+    custom_options.addoption(
+        "--resource-usage",
+        help="Report the resource usage (CPU time, peak RSS, context switches) of EXECUTABLE.",
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--memory-overhead",
+        metavar="x",
+        help=(
+            "With --resource-usage, flag tests whose peak RSS exceeds x times the memory "
+            "needed for the matrices (default: 2)."
+        ),
+        type=float,
+        default=2.0,
+    )
+    custom_options.addoption(
+        "--cpu-budget",
+        metavar="n",
+        help=(
+            "With pytest-xdist, only run tests concurrently while their total number of threads "
+            "fits into n CPUs (default: the number of available CPUs)."
+        ),
+        type=int,
+        default=None,
+    )
+    custom_options.addoption(
+        "--pin-cpus",
+        help=(
+            "Pin each run of EXECUTABLE to num CPUs "
+            "(with pytest-xdist: the CPUs of the test's CPU slots, see --cpu-budget)."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--numa-policies",
+        metavar="LIST",
+        help=(
+            "Run EXECUTABLE with each of the comma-separated NUMA placement policies "
+            '(default, local, interleave, spread, or "all") and report the calculation times.'
+        ),
+        type=numa.numa_policy_list,
+        default=None,
+    )
     custom_options.addoption(
         "--num-threads",
         metavar="n",
         help=(
             "Run the tests with n threads (default: 1). "
-            'Comma-separated lists and number ranges are supported (e.g. "1-3,5-6").'
+            'Comma-separated lists and number ranges are supported (e.g. "1-3,5-6"). '
+            '"auto" sweeps up to the number of usable CPUs, "auto:geom" sweeps over the powers of 2, and '
+            'the suffix ":adaptive" skips the larger counts of a configuration once its speedup plateaus.'
         ),
         type=num_list,
         default=[1],
@@ -322,6 +545,128 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         const=(ShuffleType.SHUFFLE_AUTO_SEED, None),
         default=(ShuffleType.NO_SHUFFLE, None),
     )
+    custom_options.addoption(
+        "--benchmark",
+        metavar="n",
+        help=(
+            "After the correctness check, run EXECUTABLE n more times and report statistics "
+            "of the calculation time, memory usage, and wall time (default: 0 == no benchmark)."
+        ),
+        type=int,
+        default=0,
+    )
+    custom_options.addoption(
+        "--benchmark-warmup",
+        metavar="n",
+        help="Number of unmeasured warm-up runs before the benchmark runs (default: 1).",
+        type=int,
+        default=1,
+    )
+    custom_options.addoption(
+        "--benchmark-json",
+        metavar="FILE",
+        help="Also write the benchmark results to FILE as JSON.",
+        type=Path,
+        default=None,
+    )
+    custom_options.addoption(
+        "--save-baseline",
+        metavar="FILE",
+        help="Run the performance tests and save their calculation times as a baseline to FILE.",
+        type=Path,
+        default=None,
+    )
+    custom_options.addoption(
+        "--compare-baseline",
+        metavar="FILE",
+        help=(
+            "Run the performance tests and fail those whose calculation time regressed "
+            "significantly compared to the baseline in FILE."
+        ),
+        type=file_path,
+        default=None,
+    )
+    custom_options.addoption(
+        "--regression-tolerance",
+        metavar="x",
+        help="Tolerated relative slowdown compared to the baseline (default: 0.1 == 10%%).",
+        type=float,
+        default=0.1,
+    )
+    custom_options.addoption(
+        "--baseline-samples",
+        metavar="n",
+        help="Number of runs of EXECUTABLE per performance test (default: 5).",
+        type=int,
+        default=5,
+    )
+    custom_options.addoption(
+        "--scaling",
+        help=(
+            "Report the strong scaling (speedup and parallel efficiency relative to num=1 "
+            "and to the reference implementation) across --num-threads."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--weak-scaling",
+        help=(
+            "Grow lines with the number of threads, so that the number of grid points per thread "
+            "stays constant, and report the weak scaling efficiency (implies --reference-source=auto)."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--min-efficiency",
+        metavar="x",
+        help=(
+            "Fail the session if the parallel (or weak scaling) efficiency of any test falls below x "
+            "(e.g. 0.5; implies --scaling)."
+        ),
+        type=float,
+        default=None,
+    )
+    custom_options.addoption(
+        "--throughput",
+        help=(
+            "Report the lattice updates per second and the estimated memory bandwidth of each test, "
+            "compared to the reference implementation."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--stream-benchmark",
+        help=(
+            "Measure the copy bandwidth of the machine and report the throughput relative to the "
+            "resulting bound (implies --throughput)."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--longest-first",
+        help=(
+            "Run the tests with the longest expected runtime first "
+            "(based on the history in HISTORY_FILE or an estimate)."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--prune-on-failure",
+        help=(
+            "Run the tests of each (num, method, func, term) family from cheap to expensive and skip "
+            "the more expensive tests of a family once one of its tests failed."
+        ),
+        action="store_true",
+    )
+    custom_options.addoption(
+        "--history-file",
+        help=(
+            "File that records the wall time of each test (default: .partdiff_history.json). "
+            "The history is only recorded with this option, --longest-first, or --time-budget."
+        ),
+        type=Path,
+        default=None,
+    )
     custom_options.addoption(
         "--allow-extra-iterations",
         help="For term=acc, allow more iterations than the (serial) reference implementation would do (0 == disallow; n == allow n more; -1 == unlimited)",
@@ -332,25 +677,150 @@ def pytest_addoption(parser: pytest.Parser) -> None:
 
 
 @pytest.fixture
-def reference_output_data() -> dict[PartdiffParamsTuple, str]:
+def reference_output_data(
+    pytestconfig: pytest.Config,
+) -> Mapping[PartdiffParamsTuple, str]:
     """
-    See util.get_reference_output_data_map()
+    See util.get_reference_output_data_map(), reference_store.open_reference_store(), and
+    extra_iterations_table.open_extra_iterations_table()
     """
-    return util.get_reference_output_data_map()
+    store_path = pytestconfig.getoption("reference_store")
+    if store_path is not None:
+        data = reference_store.open_reference_store(store_path)
+    else:
+        data = util.get_reference_output_data_map()
+    table = extra_iterations_table.open_extra_iterations_table(
+        extra_iterations_table.EXTRA_ITERATIONS_TABLE_PATH
+    )
+    if table is None:
+        return data
+    return ChainMap(data, table)
 
 
-def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+@pytest.fixture
+def reference_cache(pytestconfig: pytest.Config) -> ReferenceCache | None:
     """
-    See https://docs.pytest.org/en/7.1.x/reference/reference.html#pytest.hookspec.pytest_generate_tests
+    See util.get_reference_cache()
     """
-    if "test_id" in metafunc.fixturenames:
-        max_num_tests = metafunc.config.getoption("max_num_tests")
-        num_threads_list = metafunc.config.getoption("num_threads")
-        filter_regexes = metafunc.config.getoption("filter")
-        do_shuffle = metafunc.config.getoption("shuffle")
-        test_cases = util.get_test_cases()
+    return util.get_reference_cache(
+        pytestconfig.getoption("reference_cache_dir"),
+        pytestconfig.getoption("reference_cache_size"),
+    )
+
 
-        # 1. Apply the selected number of threads:
+@pytest.fixture
+def result_cache(pytestconfig: pytest.Config, use_valgrind: bool) -> ResultCache | None:
+    """
+    The persistent cache for the results of EXECUTABLE (see --reuse-results)
+
+    Tests that need an actual run of EXECUTABLE (valgrind, resource usage, scaling, throughput) don't use the
+    cache.
+    """
+    if (
+        pytestconfig.getoption("reuse_results") == ReuseMode.OFF
+        or use_valgrind
+        or pytestconfig.getoption("resource_usage")
+        or pytestconfig.getoption("scaling")
+        or pytestconfig.getoption("throughput")
+    ):
+        return None
+    return ResultCache(
+        pytestconfig.getoption("result_cache_dir"),
+        pytestconfig.getoption("result_cache_size") * 1024 * 1024,
+        pytestconfig.getoption("executable"),
+        pytestconfig.getoption("cwd"),
+        [
+            str(pytestconfig.getoption("strictness")),
+            str(pytestconfig.getoption("allow_extra_iterations")),
+        ],
+        pytestconfig.getoption("reuse_results"),
+    )
+
+
+@pytest.fixture
+def use_valgrind(pytestconfig: pytest.Config, test_id: str) -> bool:
+    """
+    Whether EXECUTABLE is run with valgrind in this test (see --valgrind)
+    """
+    match pytestconfig.getoption("valgrind"):
+        case ValgrindMode.ALL:
+            return True
+        case ValgrindMode.SAMPLE:
+            return test_id in pytestconfig.stash[VALGRIND_SAMPLES_KEY]
+    return False
+
+
+@pytest.fixture
+def held_cpu_slots(pytestconfig: pytest.Config, test_id: str) -> Iterator[list[int]]:
+    """
+    The CPU slots that are held while the test runs (see cpu_slots.py). Without pytest-xdist, no slots are held.
+    """
+    workerinput = getattr(pytestconfig, "workerinput", {})
+    if "cpu_slots_dir" not in workerinput:
+        yield []
+        return
+    slots = cpu_slots.CpuSlots(
+        Path(workerinput["cpu_slots_dir"]), pytestconfig.getoption("cpu_budget")
+    )
+    num, *_ = util.params_tuple_from_str(test_id)
+    with slots.reserve(int(num)) as held:
+        yield held
+
+
+@pytest.fixture
+def resource_limits(
+    pytestconfig: pytest.Config, held_cpu_slots: list[int], test_id: str
+) -> util.ResourceLimits:
+    """
+    See util.ResourceLimits
+    """
+    max_memory = pytestconfig.getoption("max_memory")
+    cpu_affinity = None
+    if pytestconfig.getoption("pin_cpus"):
+        num, *_ = util.params_tuple_from_str(test_id)
+        cpu_affinity = frozenset(affinity.cpus_for_slots(held_cpu_slots, int(num)))
+    return util.ResourceLimits(
+        pytestconfig.getoption("timeout"),
+        None if max_memory is None else max_memory * 1024 * 1024,
+        pytestconfig.getoption("max_cpu_time"),
+        cpu_affinity,
+    )
+
+
+def select_test_cases(config: pytest.Config) -> list[PartdiffParamsTuple]:
+    """Select the test cases according to the custom options.
+
+    Args:
+        config (pytest.Config): The pytest config.
+
+    Returns:
+        list[PartdiffParamsTuple]: The selected test cases.
+    """
+    max_num_tests = config.getoption("max_num_tests")
+    time_budget = config.getoption("time_budget")
+    num_threads_list = config.getoption("num_threads")
+    filter_regexes = config.getoption("filter")
+    do_shuffle = config.getoption("shuffle")
+    longest_first = config.getoption("longest_first")
+    weak_scaling = config.getoption("weak_scaling")
+    test_cases = util.get_test_cases()
+
+    # 1. Apply the selected number of threads:
+    if weak_scaling:
+        # Grow lines with num and remember the base configuration of each test case:
+        weak_scaling_bases = {}
+        for num, test_case in itertools.product(num_threads_list, test_cases):
+            _old_num, method, lines, func, term, acc_iter = test_case
+            weak_lines = str(util.weak_scaling_lines(int(lines), num))
+            test_id = " ".join((str(num), method, weak_lines, func, term, acc_iter))
+            weak_scaling_bases.setdefault(
+                test_id, " ".join((method, lines, func, term, acc_iter))
+            )
+        config.stash[scaling.WEAK_SCALING_BASES_KEY] = weak_scaling_bases
+        test_cases = [
+            util.params_tuple_from_str(test_id) for test_id in weak_scaling_bases
+        ]
+    else:
         test_cases = [
             (str(num), method, lines, func, term, acc_iter)
             for (
@@ -359,31 +829,111 @@ def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
             ) in itertools.product(num_threads_list, test_cases)
         ]
 
-        # Interlude: Soundness check of the partdiff parameters by trying to parse each tuple.
-        for test_case in test_cases:
-            # This throws an exception if we have incorrect test cases:
-            _ = util.PartdiffParamsClass.from_tuple(test_case)
+    # Interlude: Soundness check of the partdiff parameters by trying to parse each tuple.
+    for test_case in test_cases:
+        # This throws an exception if we have incorrect test cases:
+        _ = util.PartdiffParamsClass.from_tuple(test_case)
+
+    # 2. Apply the filter regexes (if desired):
+    test_cases = [
+        test_case
+        for test_case in test_cases
+        if all(regex.match(" ".join(test_case)) for regex in filter_regexes)
+    ]
+
+    # 3. Shuffle the tests (if desired):
+    if do_shuffle[0] in (
+        ShuffleType.SHUFFLE_AUTO_SEED,
+        ShuffleType.SHUFFLE_EXPL_SEED,
+    ):
+        random.shuffle(test_cases)
 
-        # 2. Apply the filter regexes (if desired):
-        test_cases = [
-            test_case
-            for test_case in test_cases
-            if all(regex.match(" ".join(test_case)) for regex in filter_regexes)
-        ]
+    # 4. Apply the time budget (if desired):
+    if time_budget is not None:
+        history = scheduling.RuntimeHistory(config.getoption("history_file"))
+        test_cases, missing = scheduling.select_within_budget(
+            test_cases, history, time_budget
+        )
+        if missing:
+            warnings.warn(
+                pytest.PytestWarning(
+                    f"--time-budget={time_budget:g} is too small to cover {', '.join(missing)}."
+                )
+            )
+
+    # 5. Apply max. number of tests (if desired):
+    if max_num_tests:
+        test_cases = test_cases[:max_num_tests]
+
+    # 6. Order the tests by their expected runtime (if desired):
+    if longest_first:
+        history = scheduling.RuntimeHistory(config.getoption("history_file"))
+        test_cases = scheduling.order_longest_first(test_cases, history)
+    elif config.getoption("prune_on_failure"):
+        test_cases = pruning.order_cheapest_first(test_cases)
+    if is_adaptive_sweep(config):
+        # The speedup of a count can only be checked after the smaller counts ran (the sort is stable):
+        test_cases.sort(key=lambda test_case: int(test_case[0]))
+
+    return test_cases
+
+
+def select_valgrind_samples(
+    test_cases: list[PartdiffParamsTuple],
+) -> set[PartdiffParamsTuple]:
+    """Select the cheapest test case (see util.estimate_runtime()) of each combination of (num, method, func, term).
 
-        # 3. Shuffle the tests (if desired):
-        if do_shuffle[0] in (
-            ShuffleType.SHUFFLE_AUTO_SEED,
-            ShuffleType.SHUFFLE_EXPL_SEED,
-        ):
-            random.shuffle(test_cases)
+    Args:
+        test_cases (list[PartdiffParamsTuple]): The test cases to select from.
+
+    Returns:
+        set[PartdiffParamsTuple]: The selected test cases.
+    """
+    cheapest: dict[tuple[str, str, str, str], tuple[float, PartdiffParamsTuple]] = {}
+    for test_case in test_cases:
+        num, method, _lines, func, term, _acc_iter = test_case
+        runtime = util.estimate_runtime(util.PartdiffParamsClass.from_tuple(test_case))
+        key = (num, method, func, term)
+        if key not in cheapest or runtime < cheapest[key][0]:
+            cheapest[key] = (runtime, test_case)
+    return {test_case for _runtime, test_case in cheapest.values()}
 
-        # 4. Apply max. number of tests (if desired):
-        if max_num_tests:
-            test_cases = test_cases[:max_num_tests]
 
-        test_ids = [" ".join(test_case) for test_case in test_cases]
-        metafunc.parametrize("test_id", test_ids)
+TEST_IDS_KEY = pytest.StashKey[list[str]]()
+VALGRIND_SAMPLES_KEY = pytest.StashKey[set[str]]()
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """
+    See https://docs.pytest.org/en/7.1.x/reference/reference.html#pytest.hookspec.pytest_generate_tests
+    """
+    if "test_id" in metafunc.fixturenames:
+        # All test functions get the same test ids (e.g. --shuffle must only shuffle once):
+        if TEST_IDS_KEY not in metafunc.config.stash:
+            test_cases = select_test_cases(metafunc.config)
+            metafunc.config.stash[TEST_IDS_KEY] = [
+                " ".join(test_case) for test_case in test_cases
+            ]
+            metafunc.config.stash[VALGRIND_SAMPLES_KEY] = {
+                " ".join(test_case) for test_case in select_valgrind_samples(test_cases)
+            }
+        metafunc.parametrize("test_id", metafunc.config.stash[TEST_IDS_KEY])
+
+
+def pytest_pycollect_makeitem(
+    collector: pytest.Module | pytest.Class, name: str, obj: object
+) -> list | None:
+    """
+    See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_pycollect_makeitem
+    """
+    # The performance tests are only generated when a baseline is saved or compared:
+    if (
+        name == "test_partdiff_performance"
+        and collector.config.getoption("save_baseline") is None
+        and collector.config.getoption("compare_baseline") is None
+    ):
+        return []
+    return None
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -399,16 +949,353 @@ def pytest_configure(config: pytest.Config) -> None:
         case (_, _):
             pass
 
+    if config.getoption("weak_scaling"):
+        # The grown configurations are usually not cached in reference_output:
+        if config.getoption("reference_source") == ReferenceSource.CACHE:
+            config.option.reference_source = ReferenceSource.AUTO
+        config.option.scaling = True
+
     if config.getoption("reference_source") in (
         ReferenceSource.AUTO,
         ReferenceSource.IMPL,
     ):
         util.ensure_reference_implementation_exists()
 
+    if config.getoption("reference_cache_size") < 0:
+        raise pytest.UsageError("--reference-cache-size must not be negative.")
+    if config.getoption("result_cache_size") < 1:
+        raise pytest.UsageError("--result-cache-size must be at least 1.")
+
     util.check_executable_exists(
         config.getoption("executable"), config.getoption("cwd")
     )
 
-    if config.getoption("valgrind"):
+    if config.getoption("valgrind") != ValgrindMode.OFF:
         if shutil.which("valgrind") is None:
             raise RuntimeError("Passed --valgrind, but valgrind could not be found.")
+
+    if config.getoption("benchmark") < 0 or config.getoption("benchmark_warmup") < 0:
+        raise pytest.UsageError(
+            "--benchmark and --benchmark-warmup must not be negative."
+        )
+
+    if config.getoption("stream_output") and config.getoption("concurrent"):
+        # The reference output isn't known yet when EXECUTABLE starts, so its output couldn't be checked:
+        raise pytest.UsageError("--stream-output can't be combined with --concurrent.")
+    if config.getoption("concurrent"):
+        # The limits and the CPU affinity are applied in a preexec_fn, which isn't safe while the reference
+        # implementation is started from another thread (a fork of a multithreaded process can deadlock):
+        for name in ("max_memory", "max_cpu_time", "pin_cpus"):
+            if config.getoption(name):
+                raise pytest.UsageError(
+                    f"--{name.replace('_', '-')} can't be combined with --concurrent."
+                )
+
+    if config.getoption("prune_on_failure") and config.getoption("longest_first"):
+        # Pruning only helps if the cheap tests of a family run before the expensive ones:
+        raise pytest.UsageError(
+            "--prune-on-failure can't be combined with --longest-first."
+        )
+
+    if config.getoption("timeout_factor") is not None:
+        if config.getoption("timeout") is None:
+            raise pytest.UsageError("--timeout-factor requires --timeout.")
+        if config.getoption("concurrent"):
+            raise pytest.UsageError(
+                "--timeout-factor can't be combined with --concurrent."
+            )
+    for name in ("timeout", "timeout_factor", "max_memory", "max_cpu_time"):
+        value = config.getoption(name)
+        if value is not None and value <= 0:
+            raise pytest.UsageError(
+                f"--{name.replace('_', '-')} must be greater than 0."
+            )
+
+    if config.getoption("cpu_budget") is None:
+        config.option.cpu_budget = cpu_slots.default_cpu_budget()
+    elif config.getoption("cpu_budget") < 1:
+        raise pytest.UsageError("--cpu-budget must be at least 1.")
+    if (
+        config.getoption("time_budget") is not None
+        and config.getoption("time_budget") <= 0
+    ):
+        raise pytest.UsageError("--time-budget must be positive.")
+
+    if config.getoption("pin_cpus") and not hasattr(config, "workerinput"):
+        for warning in affinity.check_timing_environment(
+            config.getoption("cpu_budget")
+        ):
+            config.issue_config_time_warning(pytest.PytestWarning(warning), 2)
+
+    if config.getoption("numa_policies") is not None:
+        policies, warning = numa.usable_policies(config.getoption("numa_policies"))
+        config.option.numa_policies = policies
+        if warning is not None and not hasattr(config, "workerinput"):
+            config.issue_config_time_warning(pytest.PytestWarning(warning), 2)
+
+    if config.getoption("max_output_size") < 1:
+        raise pytest.UsageError("--max-output-size must be at least 1.")
+
+    if config.getoption("baseline_samples") < 1:
+        raise pytest.UsageError("--baseline-samples must be at least 1.")
+
+    if config.getoption("min_efficiency") is not None:
+        config.option.scaling = True
+
+    if is_adaptive_sweep(config):
+        if config.getoption("weak_scaling"):
+            raise pytest.UsageError(
+                "--num-threads=auto:adaptive can't be combined with --weak-scaling."
+            )
+        config.option.scaling = True
+
+    if config.getoption("stream_benchmark"):
+        config.option.throughput = True
+
+    # The history is only recorded when it is used or its file is given explicitly:
+    record_history = (
+        config.getoption("history_file") is not None
+        or config.getoption("longest_first")
+        or config.getoption("time_budget") is not None
+    )
+    if config.getoption("history_file") is None:
+        config.option.history_file = util.HISTORY_FILE_PATH
+
+    # With pytest-xdist, only the controller records the history and reports the benchmark results:
+    if not hasattr(config, "workerinput"):
+        if record_history:
+            history = scheduling.RuntimeHistory(config.getoption("history_file"))
+            config.pluginmanager.register(scheduling.RuntimeHistoryPlugin(history))
+        if config.getoption("benchmark") > 0:
+            config.pluginmanager.register(
+                benchmark.BenchmarkPlugin(config.getoption("benchmark_json"))
+            )
+        if config.getoption("resource_usage"):
+            config.pluginmanager.register(
+                resource_usage.ResourceUsagePlugin(config.getoption("memory_overhead"))
+            )
+        if config.getoption("numa_policies") is not None:
+            config.pluginmanager.register(
+                numa.NumaPlugin(config.getoption("numa_policies"))
+            )
+        if config.getoption("save_baseline") is not None:
+            config.pluginmanager.register(
+                baseline.BaselinePlugin(config.getoption("save_baseline"))
+            )
+        if config.getoption("throughput"):
+            config.pluginmanager.register(
+                throughput.ThroughputPlugin(
+                    throughput.measure_copy_bandwidth()
+                    if config.getoption("stream_benchmark")
+                    else None
+                )
+            )
+        if config.getoption("weak_scaling"):
+            config.pluginmanager.register(
+                scaling.WeakScalingPlugin(config.getoption("min_efficiency"))
+            )
+        elif config.getoption("scaling"):
+            config.pluginmanager.register(
+                scaling.ScalingPlugin(config.getoption("min_efficiency"))
+            )
+
+
+def pytest_runtest_setup(item: pytest.Item) -> None:
+    """
+    See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_setup
+    """
+    if getattr(item, "originalname", None) != "test_partdiff_parametrized":
+        return
+    test_id = item.callspec.params["test_id"]
+    registry = failure_registry(item.config)
+    dominating = None if registry is None else registry.dominating_failure(test_id)
+    if dominating is not None:
+        # This is a property, so that it also reaches the controller process of `pytest-xdist`:
+        item.user_properties.append((pruning.PRUNED_PROPERTY, dominating))
+        pytest.skip(f"dominated by the failed test [{dominating}]")
+    speedups = speedup_registry(item.config)
+    plateau = None if speedups is None else speedups.plateau(test_id)
+    if plateau is not None:
+        # This is a property, so that it also reaches the controller process of `pytest-xdist`:
+        item.user_properties.append((thread_sweep.PLATEAU_PROPERTY, plateau))
+        pytest.skip(f"speedup plateaued: {plateau}")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(
+    item: pytest.Item, call: pytest.CallInfo
+) -> Generator[None, pytest.TestReport, pytest.TestReport]:
+    """
+    See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_makereport
+    """
+    report = yield
+    registry = failure_registry(item.config)
+    if (
+        registry is not None
+        and report.when == "call"
+        and report.failed
+        and getattr(item, "originalname", None) == "test_partdiff_parametrized"
+    ):
+        registry.record_failure(item.callspec.params["test_id"])
+    speedups = speedup_registry(item.config)
+    if (
+        speedups is not None
+        and report.when == "call"
+        and report.passed
+        and (timing := util.get_user_property(report, scaling.TIMING_PROPERTY))
+        is not None
+    ):
+        samples = util.get_user_property(report, benchmark.BENCHMARK_PROPERTY)
+        speedups.record(
+            timing["test_id"],
+            (
+                statistics.median(samples["calculation_time"])
+                if samples is not None
+                else timing["calculation_time"]
+            ),
+        )
+    if call.excinfo is not None and isinstance(
+        call.excinfo.value, util.ResourceLimitError
+    ):
+        # This is a property, so that it also reaches the controller process of `pytest-xdist`:
+        report.user_properties.append(
+            (util.RESOURCE_LIMIT_PROPERTY, str(call.excinfo.value.outcome))
+        )
+        report.sections.append(
+            ("Partial output of EXECUTABLE", call.excinfo.value.output)
+        )
+    if call.excinfo is not None and isinstance(
+        call.excinfo.value, valgrind.ValgrindError
+    ):
+        report.sections.append(("valgrind log", call.excinfo.value.report.log))
+    return report
+
+
+def pytest_report_teststatus(
+    report: pytest.TestReport, config: pytest.Config
+) -> tuple[str, str, tuple[str, dict[str, bool]]] | None:
+    """
+    See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_report_teststatus
+    """
+    if report.skipped and util.get_user_property(report, pruning.PRUNED_PROPERTY):
+        return "skipped", "d", ("SKIPPED (dominated)", {"yellow": True})
+    if report.skipped and util.get_user_property(report, thread_sweep.PLATEAU_PROPERTY):
+        return "skipped", "p", ("SKIPPED (plateau)", {"yellow": True})
+    if report.when != "call" or not report.failed:
+        return None
+    match util.get_user_property(report, util.RESOURCE_LIMIT_PROPERTY):
+        case util.LimitOutcome.TIMEOUT:
+            return "failed", "T", ("TIMEOUT", {"red": True})
+        case util.LimitOutcome.RESOURCE_EXCEEDED:
+            return "failed", "R", ("RESOURCE EXCEEDED", {"red": True})
+    return None
+
+
+CPU_SLOTS_DIR_KEY = pytest.StashKey[Path]()
+FAILURES_DIR_KEY = pytest.StashKey[Path]()
+SPEEDUPS_DIR_KEY = pytest.StashKey[Path]()
+
+
+def is_adaptive_sweep(config: pytest.Config) -> bool:
+    """Check if --num-threads=auto:adaptive (or auto:geom:adaptive) is used.
+
+    Args:
+        config (pytest.Config): The pytest config.
+
+    Returns:
+        bool: Whether the larger thread counts are skipped once the speedup plateaus.
+    """
+    num_threads_list = config.getoption("num_threads")
+    return (
+        isinstance(num_threads_list, thread_sweep.ThreadSweep)
+        and num_threads_list.adaptive
+    )
+
+
+def failure_registry(config: pytest.Config) -> pruning.FailureRegistry | None:
+    """Get the registry of failed tests for --prune-on-failure.
+
+    Args:
+        config (pytest.Config): The pytest config.
+
+    Returns:
+        pruning.FailureRegistry | None: The registry, or None without --prune-on-failure.
+    """
+    if not config.getoption("prune_on_failure"):
+        return None
+    workerinput = getattr(config, "workerinput", {})
+    if "failures_dir" in workerinput:
+        return pruning.FailureRegistry(Path(workerinput["failures_dir"]))
+    if FAILURES_DIR_KEY not in config.stash:
+        config.stash[FAILURES_DIR_KEY] = Path(
+            tempfile.mkdtemp(prefix="partdiff_failures_")
+        )
+    return pruning.FailureRegistry(config.stash[FAILURES_DIR_KEY])
+
+
+def speedup_registry(config: pytest.Config) -> thread_sweep.SpeedupRegistry | None:
+    """Get the registry of calculation times for --num-threads=auto:adaptive.
+
+    Args:
+        config (pytest.Config): The pytest config.
+
+    Returns:
+        thread_sweep.SpeedupRegistry | None: The registry, or None without an adaptive sweep.
+    """
+    if not is_adaptive_sweep(config):
+        return None
+    workerinput = getattr(config, "workerinput", {})
+    if "speedups_dir" in workerinput:
+        return thread_sweep.SpeedupRegistry(Path(workerinput["speedups_dir"]))
+    if SPEEDUPS_DIR_KEY not in config.stash:
+        config.stash[SPEEDUPS_DIR_KEY] = Path(
+            tempfile.mkdtemp(prefix="partdiff_speedups_")
+        )
+    return thread_sweep.SpeedupRegistry(config.stash[SPEEDUPS_DIR_KEY])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node) -> None:
+    """
+    See https://github.com/pytest-dev/pytest-xdist/blob/master/src/xdist/newhooks.py
+    """
+    # All workers share the same CPU slots:
+    config = node.config
+    if CPU_SLOTS_DIR_KEY not in config.stash:
+        config.stash[CPU_SLOTS_DIR_KEY] = Path(
+            tempfile.mkdtemp(prefix="partdiff_cpu_slots_")
+        )
+    node.workerinput["cpu_slots_dir"] = str(config.stash[CPU_SLOTS_DIR_KEY])
+    # All workers share the same failures (see --prune-on-failure):
+    if failure_registry(config) is not None:
+        node.workerinput["failures_dir"] = str(config.stash[FAILURES_DIR_KEY])
+    # All workers share the same calculation times (see --num-threads=auto:adaptive):
+    if speedup_registry(config) is not None:
+        node.workerinput["speedups_dir"] = str(config.stash[SPEEDUPS_DIR_KEY])
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    """
+    See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_unconfigure
+    """
+    if CPU_SLOTS_DIR_KEY in config.stash:
+        shutil.rmtree(config.stash[CPU_SLOTS_DIR_KEY], ignore_errors=True)
+    if FAILURES_DIR_KEY in config.stash:
+        shutil.rmtree(config.stash[FAILURES_DIR_KEY], ignore_errors=True)
+    if SPEEDUPS_DIR_KEY in config.stash:
+        shutil.rmtree(config.stash[SPEEDUPS_DIR_KEY], ignore_errors=True)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config: pytest.Config, log):
+    """
+    See https://github.com/pytest-dev/pytest-xdist/blob/master/src/xdist/newhooks.py
+    """
+    if config.getoption("executable") is None:
+        return None
+    if not config.getoption("longest_first") or config.getoption("dist") != "load":
+        return None
+    # pytest-xdist is optional, so only import the scheduler when it is actually used:
+    import xdist_scheduling
+
+    return xdist_scheduling.LongestFirstScheduling(config, log)
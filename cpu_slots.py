@@ -0,0 +1,98 @@
+"""Core-aware admission of tests with `pytest-xdist` (see --cpu-budget).
+
+Each test needs `num` CPU slots (one per thread of EXECUTABLE). The slots are lock files in a directory that is
+shared by all workers of a session, and a test only starts once it holds as many slots as it needs, so the total
+number of threads of all concurrently running tests never exceeds the CPU budget.
+
+The slots are acquired while holding an admission lock. A test that waits for slots keeps the admission lock, so
+no other test can start in the meantime, and tests with many threads are not starved by tests with few threads.
+"""
+
+import fcntl
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+import affinity
+
+ADMISSION_LOCK_NAME = "admission.lock"
+
+# The interval in which a waiting test checks for free slots (in s):
+POLL_INTERVAL = 0.01
+
+
+def default_cpu_budget() -> int:
+    """Get the number of CPUs that the tester may use.
+
+    Returns:
+        int: The number of CPUs that are available to the tester process (see affinity.usable_cpu_count()).
+    """
+    return affinity.usable_cpu_count()
+
+
+class CpuSlots:
+    """A set of CPU slots that is shared between processes."""
+
+    def __init__(self, directory: Path, budget: int):
+        """Create CpuSlots.
+
+        Args:
+            directory (Path): The directory of the lock files. It is created if it doesn't exist.
+            budget (int): The number of slots.
+        """
+        self.directory = directory
+        self.budget = budget
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _slot_path(self, slot: int) -> Path:
+        """Get the path of the lock file of a slot.
+
+        Args:
+            slot (int): The index of the slot.
+
+        Returns:
+            Path: The path of the lock file.
+        """
+        return self.directory / f"slot-{slot}.lock"
+
+    @contextmanager
+    def reserve(self, num_slots: int) -> Iterator[list[int]]:
+        """Hold a number of slots (at most the budget) while the context is active.
+
+        Args:
+            num_slots (int): The number of slots to hold.
+
+        Yields:
+            Iterator[list[int]]: The indices of the held slots.
+        """
+        num_slots = min(num_slots, self.budget)
+        held: dict[int, IO] = {}
+        try:
+            with (self.directory / ADMISSION_LOCK_NAME).open("a") as admission:
+                fcntl.flock(admission, fcntl.LOCK_EX)
+                try:
+                    while True:
+                        for slot in range(self.budget):
+                            if len(held) == num_slots:
+                                break
+                            if slot in held:
+                                continue
+                            f = self._slot_path(slot).open("a")
+                            try:
+                                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            except BlockingIOError:
+                                f.close()
+                                continue
+                            held[slot] = f
+                        if len(held) == num_slots:
+                            break
+                        time.sleep(POLL_INTERVAL)
+                finally:
+                    fcntl.flock(admission, fcntl.LOCK_UN)
+            yield sorted(held)
+        finally:
+            for f in held.values():
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
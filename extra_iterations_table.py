@@ -0,0 +1,146 @@
+"""The extra iterations table: reference output for runs with extra iterations (see --allow-extra-iterations).
+
+When EXECUTABLE needs more iterations than the reference implementation for term=1, its output is compared to
+the reference output for term=2 with the actual number of iterations. These parameter combinations are usually
+not in `reference_output`, so the extra iterations table (`EXTRA_ITERATIONS_TABLE_PATH`) provides them: For each
+accuracy configuration, it stores the complete output of the reference implementation for term=2 with the
+reference number of iterations N (the template), and only the residuum and the matrix for the iterations
+N+1, ..., N+window. The outputs for the extra iterations are rendered from the template.
+
+The table is a JSON file with the following layout:
+
+    {
+        "version": 1,
+        "entries": {
+            "2 10 1 1e-4": {
+                "executable_hash": "...",
+                "output_checksum": "...",
+                "iterations": 123,
+                "template": "Calculation time: ...",
+                "steps": [["<residuum>", "<matrix text>"], ...]
+            },
+            ...
+        }
+    }
+
+where the keys are "method lines func acc", and `executable_hash` and `output_checksum` identify the reference
+implementation and the term=1 output the entry was generated from (see make_reference_output.py).
+"""
+
+import json
+from collections.abc import Iterator, Mapping
+from functools import cache
+from pathlib import Path
+
+import output_parser
+from util import PartdiffParamsTuple
+
+EXTRA_ITERATIONS_TABLE_PATH = Path.cwd() / "reference_output.extra_iterations.json"
+EXTRA_ITERATIONS_TABLE_VERSION = 1
+
+# The indices of the header lines with the number of iterations and the residuum:
+ITERATIONS_LINE = 6
+RESIDUUM_LINE = 7
+
+
+def render_output(
+    template: str, iterations: int, residuum: str, matrix_text: str
+) -> str:
+    """Render the output for another number of iterations from a template.
+
+    Args:
+        template (str): The output of the reference implementation for term=2.
+        iterations (int): The number of iterations.
+        residuum (str): The residuum after `iterations` iterations.
+        matrix_text (str): The raw text of the matrix after `iterations` iterations.
+
+    Returns:
+        str: The output for `iterations` iterations (with the calculation time of the template).
+    """
+    parsed = output_parser.parse_partdiff_output(template)
+    assert parsed.header is not None and parsed.matrix_text is not None
+    lines = template.split("\n")
+    for index, value in ((ITERATIONS_LINE, str(iterations)), (RESIDUUM_LINE, residuum)):
+        line = parsed.header[index]
+        lines[index] = (
+            f"{line.label}:{line.whitespace}{value}{line.trailing_whitespace}"
+        )
+    return "\n".join(lines).replace(parsed.matrix_text, matrix_text, 1)
+
+
+def make_step(output: str) -> list[str]:
+    """Extract the part of an output that is stored per extra iteration.
+
+    Args:
+        output (str): The output of the reference implementation for term=2.
+
+    Returns:
+        list[str]: The residuum and the raw text of the matrix.
+    """
+    parsed = output_parser.parse_partdiff_output(output)
+    assert parsed.header is not None and parsed.matrix_text is not None
+    return [parsed.header[RESIDUUM_LINE].value, parsed.matrix_text]
+
+
+class ExtraIterationsTable(Mapping[PartdiffParamsTuple, str]):
+    """A read-only mapping from parameter combinations (with term=2) to reference output, backed by the extra
+    iterations table."""
+
+    def __init__(self, path: Path):
+        """Load an extra iterations table.
+
+        Args:
+            path (Path): The path of the table.
+
+        Raises:
+            ValueError: When the table has an unknown version.
+        """
+        table = json.loads(path.read_text())
+        if table.get("version") != EXTRA_ITERATIONS_TABLE_VERSION:
+            raise ValueError(f'"{path}" has an unknown version.')
+        self.entries: dict[str, dict] = table["entries"]
+        # The entry and the step of each parameter combination:
+        self.index: dict[PartdiffParamsTuple, tuple[str, int]] = {}
+        for key, entry in self.entries.items():
+            method, lines, func, _acc = key.split()
+            for step in range(len(entry["steps"]) + 1):
+                iterations = str(entry["iterations"] + step)
+                self.index.setdefault(
+                    ("1", method, lines, func, "2", iterations), (key, step)
+                )
+
+    def __getitem__(self, partdiff_params: PartdiffParamsTuple) -> str:
+        key, step = self.index[partdiff_params]
+        entry = self.entries[key]
+        if step == 0:
+            return entry["template"]
+        residuum, matrix_text = entry["steps"][step - 1]
+        return render_output(
+            entry["template"], entry["iterations"] + step, residuum, matrix_text
+        )
+
+    def __contains__(self, partdiff_params: object) -> bool:
+        return partdiff_params in self.index
+
+    def __iter__(self) -> Iterator[PartdiffParamsTuple]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+@cache
+def open_extra_iterations_table(path: Path) -> ExtraIterationsTable | None:
+    """Open an extra iterations table.
+
+    The table is only loaded once per process.
+
+    Args:
+        path (Path): The path of the table.
+
+    Returns:
+        ExtraIterationsTable | None: The table, or None if there is no table.
+    """
+    if not path.exists():
+        return None
+    return ExtraIterationsTable(path)
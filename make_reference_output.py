@@ -0,0 +1,725 @@
+"""Generate the content of `reference_output` and `test_cases.txt` with the reference implementation.
+
+The parameter combinations of `PARAMETER_GRID` are run in parallel (one run of the reference implementation per
+CPU by default). A manifest (`MANIFEST_PATH`) records for each combination the SHA-256 hash of the reference
+implementation that produced the output and the SHA-256 checksum of the output file, so combinations whose
+output is present, intact, and produced by the current reference implementation are skipped on the next run.
+Runs that time out are recorded as well and only retried with a larger --timeout or a changed reference
+implementation.
+
+With --budget, the grid is expanded adaptively afterwards: starting from the largest measured `lines` (and, for
+term=iter, the largest number of iterations) of each combination of the other parameters, the next larger values
+are added as long as their estimated runtime fits into the remaining budget. The runtime of a candidate is
+estimated with util.estimate_runtime(), scaled by the ratio of measured to estimated runtime of its nearest
+measured neighbour. The measured runtime of each run is recorded in the manifest.
+
+The output files and the manifest are written atomically, so an interrupted run loses at most the runs that were
+in progress. At the end, `test_cases.txt` is regenerated from the manifest.
+
+With --extra-iterations=W, the extra iterations table (see extra_iterations_table.py) is updated afterwards: for
+each accuracy configuration, the reference implementation is run for term=2 with N, ..., N+W iterations, where N
+is the number of iterations of the accuracy configuration.
+
+    $ python make_reference_output.py --jobs=8
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import math
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from pathlib import Path
+
+import extra_iterations_table
+import util
+from util import PartdiffParamsTuple
+
+MANIFEST_PATH = Path.cwd() / "reference_output.manifest.json"
+MANIFEST_VERSION = 1
+
+DEFAULT_TIMEOUT = 2
+
+# The timeout of a run during the expansion, relative to its estimated runtime:
+EXPANSION_TIMEOUT_FACTOR = 3
+
+# Each entry is a list of value ranges for (num, method, lines, func, term, acc/iter):
+PARAMETER_GRID = [
+    [
+        ["1"],
+        ["1", "2"],
+        ["0", "1", "10", "100", "1000"],
+        ["1", "2"],
+        ["2"],
+        ["1", "10", "100", "1000", "10000", "100000"],
+    ],
+    [
+        ["1"],
+        ["1", "2"],
+        ["0", "1", "10", "100", "1000"],
+        ["1", "2"],
+        ["1"],
+        ["1e-4", "1e-8", "1e-12", "1e-16", "1e-20"],
+    ],
+]
+
+
+class RunStatus(StrEnum):
+    """The outcome of a run of the reference implementation"""
+
+    OK = "ok"
+    TIMED_OUT = "timed_out"
+
+
+@dataclass
+class ManifestEntry:
+    """The record of a run of the reference implementation"""
+
+    status: RunStatus
+    # The SHA-256 hash of the reference implementation:
+    executable_hash: str
+    # The SHA-256 checksum of the output file (only for RunStatus.OK):
+    output_checksum: str | None = None
+    # The timeout of the run (only for RunStatus.TIMED_OUT):
+    timeout: float | None = None
+    # The measured wall time of the run in seconds (the timeout for RunStatus.TIMED_OUT):
+    runtime: float | None = None
+
+
+def sha256_file(path: Path) -> str:
+    """Compute the SHA-256 hash of a file.
+
+    Args:
+        path (Path): The file.
+
+    Returns:
+        str: The hex digest.
+    """
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_atomically(path: Path, content: str) -> None:
+    """Write a text file atomically.
+
+    The temporary file is created in `path`'s directory (so that it is on the same file system) and is hidden, so
+    it is ignored by the readers of `reference_output` (see util.iter_reference_output_data()).
+
+    Args:
+        path (Path): The file.
+        content (str): The content of the file.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def output_file_path(partdiff_params: PartdiffParamsTuple) -> Path:
+    """Get the path of the output file of a parameter combination.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+
+    Returns:
+        Path: The path in `reference_output`.
+    """
+    return util.REFERENCE_OUTPUT_PATH / f"partdiff_{'_'.join(partdiff_params)}.txt"
+
+
+def test_case_sort_key(partdiff_params: PartdiffParamsTuple) -> tuple:
+    """Get the sort key of a test case in `test_cases.txt`.
+
+    The test cases with term=iter come first, and within each term, the cheaper test cases come first.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+
+    Returns:
+        tuple: The sort key.
+    """
+    num, method, lines, func, term, acc_iter = partdiff_params
+    cost = float(acc_iter) if term == "2" else -float(acc_iter)
+    return (-int(term), int(num), int(method), int(lines), int(func), cost)
+
+
+def load_manifest() -> dict[PartdiffParamsTuple, ManifestEntry]:
+    """Load the manifest.
+
+    Returns:
+        dict[PartdiffParamsTuple, ManifestEntry]: The recorded runs (empty if there is no manifest yet).
+    """
+    if not MANIFEST_PATH.exists():
+        return {}
+    manifest = json.loads(MANIFEST_PATH.read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return {
+        util.params_tuple_from_str(key): ManifestEntry(**entry)
+        for key, entry in manifest["entries"].items()
+    }
+
+
+def save_manifest(entries: dict[PartdiffParamsTuple, ManifestEntry]) -> None:
+    """Save the manifest atomically.
+
+    Args:
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "entries": {
+            " ".join(partdiff_params): asdict(entries[partdiff_params])
+            for partdiff_params in sorted(entries, key=test_case_sort_key)
+        },
+    }
+    write_atomically(MANIFEST_PATH, json.dumps(manifest, indent=2) + "\n")
+
+
+def is_up_to_date(
+    partdiff_params: PartdiffParamsTuple,
+    entry: ManifestEntry | None,
+    executable_hash: str,
+    timeout: float,
+) -> bool:
+    """Check if a parameter combination needs no new run.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        entry (ManifestEntry | None): The recorded run, if any.
+        executable_hash (str): The SHA-256 hash of the current reference implementation.
+        timeout (float): The current timeout.
+
+    Returns:
+        bool: Whether the recorded run is still valid.
+    """
+    if entry is None or entry.executable_hash != executable_hash:
+        return False
+    if entry.status == RunStatus.TIMED_OUT:
+        return entry.timeout is not None and entry.timeout >= timeout
+    path = output_file_path(partdiff_params)
+    return path.exists() and sha256_file(path) == entry.output_checksum
+
+
+def run_reference(
+    partdiff_params: PartdiffParamsTuple, executable_hash: str, timeout: float
+) -> ManifestEntry:
+    """Run the reference implementation and write its output file.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        executable_hash (str): The SHA-256 hash of the reference implementation.
+        timeout (float): The timeout in seconds.
+
+    Raises:
+        subprocess.CalledProcessError: When the reference implementation fails.
+
+    Returns:
+        ManifestEntry: The record of the run.
+    """
+    start = time.perf_counter()
+    try:
+        output = subprocess.check_output(
+            [util.REFERENCE_IMPLEMENTATION_EXEC, *partdiff_params],
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            text=True,
+        )
+    except subprocess.TimeoutExpired:
+        return ManifestEntry(
+            RunStatus.TIMED_OUT, executable_hash, timeout=timeout, runtime=timeout
+        )
+    runtime = time.perf_counter() - start
+    path = output_file_path(partdiff_params)
+    write_atomically(path, output)
+    return ManifestEntry(
+        RunStatus.OK, executable_hash, sha256_file(path), runtime=runtime
+    )
+
+
+def write_test_cases(entries: dict[PartdiffParamsTuple, ManifestEntry]) -> None:
+    """Regenerate `test_cases.txt` from the manifest.
+
+    Args:
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+    """
+    test_cases = sorted(
+        (
+            partdiff_params
+            for partdiff_params, entry in entries.items()
+            if entry.status == RunStatus.OK
+        ),
+        key=test_case_sort_key,
+    )
+    write_atomically(
+        util.TEST_CASES_FILE_PATH,
+        "".join(" ".join(partdiff_params) + "\n" for partdiff_params in test_cases),
+    )
+
+
+def run_all(
+    pending: dict[PartdiffParamsTuple, float],
+    entries: dict[PartdiffParamsTuple, ManifestEntry],
+    executable_hash: str,
+    jobs: int,
+) -> bool:
+    """Run the reference implementation for a number of parameter combinations in parallel.
+
+    The manifest is updated after each run.
+
+    Args:
+        pending (dict[PartdiffParamsTuple, float]): The parameter combinations and their timeouts.
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs (updated in place).
+        executable_hash (str): The SHA-256 hash of the reference implementation.
+        jobs (int): The number of parallel runs.
+
+    Returns:
+        bool: Whether all runs succeeded or timed out (i.e. none failed).
+    """
+    ok = True
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {
+            executor.submit(
+                run_reference, partdiff_params, executable_hash, timeout
+            ): partdiff_params
+            for partdiff_params, timeout in pending.items()
+        }
+        for future in as_completed(futures):
+            partdiff_params = futures[future]
+            command = " ".join(
+                [str(util.REFERENCE_IMPLEMENTATION_EXEC), *partdiff_params]
+            )
+            try:
+                entry = future.result()
+            except subprocess.CalledProcessError as e:
+                print(f"{command}  (FAILED)\n{e.stderr}", file=sys.stderr)
+                entries.pop(partdiff_params, None)
+                ok = False
+                continue
+            status = (
+                f"OK, {entry.runtime:.2f} s"
+                if entry.status == RunStatus.OK
+                else "TIMED OUT"
+            )
+            print(f"{command}  ({status})")
+            entries[partdiff_params] = entry
+            save_manifest(entries)
+    return ok
+
+
+def next_lines(lines: int) -> int | None:
+    """Get the next larger value of `lines` in the 1-2-5 sequence (1, 2, 5, 10, 20, 50, ...).
+
+    Args:
+        lines (int): The current value.
+
+    Returns:
+        int | None: The next value, or None if `lines` is already the maximum.
+    """
+    if lines >= util.MAX_INTERLINES:
+        return None
+    if lines == 0:
+        return 1
+    magnitude = 10 ** math.floor(math.log10(lines))
+    for step in (2, 5, 10):
+        if step * magnitude > lines:
+            return min(step * magnitude, util.MAX_INTERLINES)
+    return None
+
+
+def next_iterations(iterations: int) -> int | None:
+    """Get the next larger number of iterations (the next power of 10, or the maximum).
+
+    Args:
+        iterations (int): The current value.
+
+    Returns:
+        int | None: The next value, or None if `iterations` is already the maximum.
+    """
+    if iterations >= util.MAX_ITERATIONS:
+        return None
+    return min(10 ** (math.floor(math.log10(iterations)) + 1), util.MAX_ITERATIONS)
+
+
+def expansion_candidates(
+    entries: dict[PartdiffParamsTuple, ManifestEntry],
+) -> set[PartdiffParamsTuple]:
+    """Get the parameter combinations that extend the measured grid by one step.
+
+    For each combination of the other parameters, the candidate after the largest measured `lines` is added;
+    for term=iter, also the candidate after the largest measured number of iterations (for each `lines`).
+
+    Args:
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+
+    Returns:
+        set[PartdiffParamsTuple]: The candidates.
+    """
+    measured = [p for p, entry in entries.items() if entry.status == RunStatus.OK]
+    max_lines: dict[tuple, int] = {}
+    max_iterations: dict[tuple, int] = {}
+    for num, method, lines, func, term, acc_iter in measured:
+        key = (num, method, func, term, acc_iter)
+        max_lines[key] = max(max_lines.get(key, 0), int(lines))
+        if term == "2":
+            key = (num, method, lines, func, term)
+            max_iterations[key] = max(max_iterations.get(key, 0), int(acc_iter))
+    candidates = set()
+    for (num, method, func, term, acc_iter), lines in max_lines.items():
+        if (new_lines := next_lines(lines)) is not None:
+            candidates.add((num, method, str(new_lines), func, term, acc_iter))
+    for (num, method, lines, func, term), iterations in max_iterations.items():
+        if (new_iterations := next_iterations(iterations)) is not None:
+            candidates.add((num, method, lines, func, term, str(new_iterations)))
+    return candidates
+
+
+def estimate_cost(
+    partdiff_params: PartdiffParamsTuple,
+    entries: dict[PartdiffParamsTuple, ManifestEntry],
+) -> float | None:
+    """Estimate the runtime of a parameter combination from its nearest measured neighbour.
+
+    The neighbours are the measured runs with the same method, func, and term (and the same accuracy for
+    term=acc). The nearest one is the one with the closest estimated runtime (see util.estimate_runtime()), and
+    its ratio of measured to estimated runtime is used to calibrate the estimate of the candidate.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+
+    Returns:
+        float | None: The estimated runtime in seconds, or None if there is no measured neighbour.
+    """
+    _, method, _, func, term, acc_iter = partdiff_params
+    estimate = util.estimate_runtime(
+        util.PartdiffParamsClass.from_tuple(partdiff_params)
+    )
+    neighbours = [
+        (util.estimate_runtime(util.PartdiffParamsClass.from_tuple(p)), entry.runtime)
+        for p, entry in entries.items()
+        if entry.status == RunStatus.OK
+        and entry.runtime is not None
+        and (p[1], p[3], p[4]) == (method, func, term)
+        and (term == "2" or p[5] == acc_iter)
+    ]
+    if not neighbours:
+        return None
+    neighbour_estimate, neighbour_runtime = min(
+        neighbours, key=lambda n: abs(math.log(n[0] / estimate))
+    )
+    return estimate * neighbour_runtime / neighbour_estimate
+
+
+def select_expansion(
+    entries: dict[PartdiffParamsTuple, ManifestEntry],
+    executable_hash: str,
+    budget: float,
+    timeout: float,
+    jobs: int,
+) -> dict[PartdiffParamsTuple, float]:
+    """Select the next expansion candidates that fit into the remaining budget.
+
+    The cheapest candidates come first, so the budget extends the grid in as many directions as possible.
+    Candidates that already timed out with the current reference implementation are skipped unless they would
+    get a larger timeout now.
+
+    Args:
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+        executable_hash (str): The SHA-256 hash of the reference implementation.
+        budget (float): The remaining budget in seconds.
+        timeout (float): The minimum timeout of a run.
+        jobs (int): The maximum number of selected candidates.
+
+    Returns:
+        dict[PartdiffParamsTuple, float]: The selected candidates and their timeouts.
+    """
+    costs = {}
+    for partdiff_params in expansion_candidates(entries):
+        cost = estimate_cost(partdiff_params, entries)
+        if cost is not None:
+            costs[partdiff_params] = cost
+    selected = {}
+    for partdiff_params, cost in sorted(costs.items(), key=lambda item: item[1]):
+        if len(selected) == jobs or cost > budget:
+            break
+        candidate_timeout = min(budget, max(timeout, EXPANSION_TIMEOUT_FACTOR * cost))
+        if is_up_to_date(
+            partdiff_params,
+            entries.get(partdiff_params),
+            executable_hash,
+            candidate_timeout,
+        ):
+            continue
+        selected[partdiff_params] = candidate_timeout
+        budget -= cost
+    return selected
+
+
+def run_extra_iterations(
+    partdiff_params: PartdiffParamsTuple,
+    entry: ManifestEntry,
+    iterations: int,
+    window: int,
+    timeout: float,
+) -> dict | None:
+    """Run the reference implementation for term=2 with N, ..., N+window iterations for an accuracy configuration.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The accuracy configuration.
+        entry (ManifestEntry): The recorded run of the accuracy configuration.
+        iterations (int): The number of iterations N of the accuracy configuration.
+        window (int): The number of extra iterations.
+        timeout (float): The minimum timeout of each run.
+
+    Raises:
+        subprocess.CalledProcessError: When the reference implementation fails.
+
+    Returns:
+        dict | None: The entry of the extra iterations table, or None if a run timed out.
+    """
+    outputs = []
+    for i in range(iterations, min(iterations + window, util.MAX_ITERATIONS) + 1):
+        try:
+            outputs.append(
+                subprocess.check_output(
+                    [
+                        util.REFERENCE_IMPLEMENTATION_EXEC,
+                        *util.params_with_term_iter(partdiff_params, i),
+                    ],
+                    stderr=subprocess.PIPE,
+                    timeout=max(
+                        timeout, EXPANSION_TIMEOUT_FACTOR * (entry.runtime or 0)
+                    ),
+                    text=True,
+                )
+            )
+        except subprocess.TimeoutExpired:
+            return None
+    return {
+        "executable_hash": entry.executable_hash,
+        "output_checksum": entry.output_checksum,
+        "iterations": iterations,
+        "template": outputs[0],
+        "steps": [extra_iterations_table.make_step(output) for output in outputs[1:]],
+    }
+
+
+def update_extra_iterations_table(
+    entries: dict[PartdiffParamsTuple, ManifestEntry],
+    window: int,
+    timeout: float,
+    jobs: int,
+    force: bool,
+) -> bool:
+    """Update the extra iterations table (see extra_iterations_table.py) for all accuracy configurations.
+
+    Entries that were generated from the current output of an accuracy configuration with at least `window`
+    extra iterations are kept.
+
+    Args:
+        entries (dict[PartdiffParamsTuple, ManifestEntry]): The recorded runs.
+        window (int): The number of extra iterations per accuracy configuration.
+        timeout (float): The minimum timeout of each run.
+        jobs (int): The number of parallel runs.
+        force (bool): Whether to regenerate all entries.
+
+    Returns:
+        bool: Whether all runs succeeded or timed out (i.e. none failed).
+    """
+    path = extra_iterations_table.EXTRA_ITERATIONS_TABLE_PATH
+    table: dict[str, dict] = {}
+    if path.exists():
+        loaded = json.loads(path.read_text())
+        if (
+            loaded.get("version")
+            == extra_iterations_table.EXTRA_ITERATIONS_TABLE_VERSION
+        ):
+            table = loaded["entries"]
+    accuracy_configurations = {
+        " ".join((method, lines, func, acc_iter)): (partdiff_params, entry)
+        for partdiff_params, entry in entries.items()
+        if entry.status == RunStatus.OK
+        for _num, method, lines, func, term, acc_iter in [partdiff_params]
+        if term == "1"
+    }
+    # Entries of accuracy configurations that no longer exist are dropped:
+    table = {key: table[key] for key in table.keys() & accuracy_configurations.keys()}
+    pending = {
+        key: (partdiff_params, entry)
+        for key, (partdiff_params, entry) in accuracy_configurations.items()
+        if force
+        or key not in table
+        or table[key]["executable_hash"] != entry.executable_hash
+        or table[key]["output_checksum"] != entry.output_checksum
+        or len(table[key]["steps"]) < window
+    }
+    print(
+        f"{len(accuracy_configurations) - len(pending)} of {len(accuracy_configurations)} "
+        "extra iterations table entries are up to date."
+    )
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {
+            executor.submit(
+                run_extra_iterations,
+                partdiff_params,
+                entry,
+                util.parse_num_iterations_from_partdiff_output(
+                    output_file_path(partdiff_params).read_text()
+                ),
+                window,
+                timeout,
+            ): key
+            for key, (partdiff_params, entry) in pending.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                table_entry = future.result()
+            except subprocess.CalledProcessError as e:
+                print(f"extra iterations {key}  (FAILED)\n{e.stderr}", file=sys.stderr)
+                table.pop(key, None)
+                ok = False
+                continue
+            if table_entry is None:
+                print(f"extra iterations {key}  (TIMED OUT)")
+                table.pop(key, None)
+                continue
+            print(f"extra iterations {key}  (OK)")
+            table[key] = table_entry
+
+    write_atomically(
+        path,
+        json.dumps(
+            {
+                "version": extra_iterations_table.EXTRA_ITERATIONS_TABLE_VERSION,
+                "entries": dict(sorted(table.items())),
+            },
+            indent=2,
+        )
+        + "\n",
+    )
+    return ok
+
+
+def main() -> None:
+    """Generate the missing or outdated reference output."""
+    parser = argparse.ArgumentParser(
+        description="Generate the content of reference_output and test_cases.txt with the reference implementation."
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        help="The number of parallel runs (default: the number of available CPUs).",
+        type=int,
+        default=os.process_cpu_count() or 1,
+    )
+    parser.add_argument(
+        "--timeout",
+        help=f"The timeout of each run in seconds (default: {DEFAULT_TIMEOUT}).",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+    )
+    parser.add_argument(
+        "--force",
+        help="Run all parameter combinations, even if their output is up to date.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--budget",
+        help=(
+            "Expand the grid adaptively with larger lines and iterations until the runs of the expansion "
+            "took this many seconds in total (default: 0 == no expansion)."
+        ),
+        type=float,
+        default=0,
+    )
+    parser.add_argument(
+        "--extra-iterations",
+        help=(
+            "Record the reference output for up to this many extra iterations of each accuracy "
+            "configuration in the extra iterations table (default: 0 == don't update the table)."
+        ),
+        type=int,
+        default=0,
+    )
+    args = parser.parse_args()
+
+    util.ensure_reference_implementation_exists()
+    util.REFERENCE_OUTPUT_PATH.mkdir(exist_ok=True)
+    executable_hash = sha256_file(util.REFERENCE_IMPLEMENTATION_EXEC)
+    entries = load_manifest()
+    grid = [
+        partdiff_params
+        for ranges in PARAMETER_GRID
+        for partdiff_params in itertools.product(*ranges)
+    ]
+    pending = {
+        partdiff_params: args.timeout
+        for partdiff_params in grid
+        if args.force
+        or not is_up_to_date(
+            partdiff_params, entries.get(partdiff_params), executable_hash, args.timeout
+        )
+    }
+    # Outdated runs of earlier expansions are repeated, too:
+    for partdiff_params, entry in entries.items():
+        if entry.status != RunStatus.OK or partdiff_params in grid:
+            continue
+        if args.force or not is_up_to_date(
+            partdiff_params, entry, executable_hash, args.timeout
+        ):
+            pending[partdiff_params] = max(
+                args.timeout, EXPANSION_TIMEOUT_FACTOR * (entry.runtime or 0)
+            )
+    print(
+        f"{len(grid) - len(pending.keys() & set(grid))} of {len(grid)} parameter combinations are up to date."
+    )
+    ok = run_all(pending, entries, executable_hash, args.jobs)
+
+    budget = args.budget
+    while budget > 0:
+        expansion = select_expansion(
+            entries, executable_hash, budget, args.timeout, args.jobs
+        )
+        if not expansion:
+            break
+        ok = run_all(expansion, entries, executable_hash, args.jobs) and ok
+        budget -= sum(entries[p].runtime or 0 for p in expansion if p in entries)
+    if args.budget > 0:
+        print(f"Used {args.budget - budget:.1f} s of the expansion budget.")
+
+    save_manifest(entries)
+    write_test_cases(entries)
+    if args.extra_iterations > 0:
+        ok = (
+            update_extra_iterations_table(
+                entries, args.extra_iterations, args.timeout, args.jobs, args.force
+            )
+            and ok
+        )
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""NUMA placement sweeps (see --numa-policies).
+
+After its correctness check, each test runs EXECUTABLE once per NUMA placement policy (wrapped with `numactl`)
+and records the calculation times. At the end of the session, the times are reported per policy, together with
+the slowdown of the slowest policy compared to the fastest one. Large slowdowns with the "spread" policy often
+hint at first-touch bugs (e.g. the matrices are initialized by a single thread, so all of their pages end up on
+the memory of a single node).
+
+On machines with a single NUMA node (or without `numactl`), only the "default" policy is run.
+"""
+
+import shutil
+import statistics
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+
+import pytest
+
+import util
+
+NUMA_PROPERTY = "numa"
+
+SYSFS_NODE_PATH = Path("/sys/devices/system/node")
+
+
+class NumaPolicy(StrEnum):
+    """A NUMA placement policy"""
+
+    # No placement policy at all:
+    DEFAULT = "default"
+    # All threads and memory on the first node:
+    LOCAL = "local"
+    # Memory pages interleaved across all nodes:
+    INTERLEAVE = "interleave"
+    # Threads on all nodes, memory allocated on the node of the first touch:
+    SPREAD = "spread"
+
+
+# The command line prefix of each policy:
+NUMACTL_COMMANDS = {
+    NumaPolicy.DEFAULT: [],
+    NumaPolicy.LOCAL: ["numactl", "--cpunodebind=0", "--membind=0"],
+    NumaPolicy.INTERLEAVE: ["numactl", "--interleave=all"],
+    NumaPolicy.SPREAD: ["numactl", "--cpunodebind=all", "--localalloc"],
+}
+
+
+@cache
+def num_numa_nodes() -> int:
+    """Get the number of NUMA nodes of the machine.
+
+    Returns:
+        int: The number of NUMA nodes (1 if the topology is unknown).
+    """
+    return max(1, len(list(SYSFS_NODE_PATH.glob("node[0-9]*"))))
+
+
+def numa_policy_list(value: str) -> list[NumaPolicy]:
+    """Parse a comma-separated list of NUMA policies.
+
+    Args:
+        value (str): The str to parse ("all" == all policies).
+
+    Returns:
+        list[NumaPolicy]: The parsed policies.
+    """
+    if value == "all":
+        return list(NumaPolicy)
+    return [NumaPolicy(policy) for policy in value.split(",")]
+
+
+def usable_policies(policies: list[NumaPolicy]) -> tuple[list[NumaPolicy], str | None]:
+    """Restrict the requested policies to the ones that make sense on this machine.
+
+    Args:
+        policies (list[NumaPolicy]): The requested policies.
+
+    Returns:
+        tuple[list[NumaPolicy], str | None]: The usable policies and a warning if some policies were dropped.
+    """
+    if num_numa_nodes() > 1 and shutil.which("numactl") is not None:
+        return policies, None
+    reason = (
+        "numactl could not be found"
+        if num_numa_nodes() > 1
+        else "this machine has a single NUMA node"
+    )
+    return [NumaPolicy.DEFAULT], (
+        f'Running only the "default" NUMA policy, because {reason}.'
+    )
+
+
+def command_prefix(policy: NumaPolicy) -> list[str]:
+    """Get the command line prefix that runs a command with a NUMA policy.
+
+    Args:
+        policy (NumaPolicy): The policy.
+
+    Returns:
+        list[str]: The prefix.
+    """
+    return list(NUMACTL_COMMANDS[policy])
+
+
+class NumaPlugin:
+    """A pytest plugin that collects the calculation time per NUMA policy and reports it at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, policies: list[NumaPolicy]):
+        """Create a NumaPlugin.
+
+        Args:
+            policies (list[NumaPolicy]): The policies that are run.
+        """
+        self.policies = policies
+        self.times: dict[str, dict[str, float]] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call":
+            return
+        numa = util.get_user_property(report, NUMA_PROPERTY)
+        if numa is not None:
+            self.times[numa["test_id"]] = {
+                policy: statistics.median(samples)
+                for policy, samples in numa["calculation_time"].items()
+            }
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.times:
+            return
+        terminalreporter.section("NUMA placement")
+        terminalreporter.write_line(
+            f"{'test':<28} "
+            + " ".join(f"{policy + ' [s]':>16}" for policy in self.policies)
+            + f" {'slowdown':>9}"
+        )
+        for test_id, times in sorted(self.times.items()):
+            slowdown = max(times.values()) / max(min(times.values()), 1e-6)
+            terminalreporter.write_line(
+                f"{test_id:<28} "
+                + " ".join(f"{times[policy]:>16.6f}" for policy in self.policies)
+                + f" {slowdown:>9.2f}"
+            )
@@ -0,0 +1,475 @@
+"""A single-pass parser for the output of partdiff.
+
+The output is parsed line by line into a `PartdiffOutput` record. The strictness levels (see --strictness) are
+then implemented as comparisons of the record's fields.
+
+In most cases OUTPUT_CHECKS[strictness] is used.
+
+When --allow-extra-iterations is passed, OUTPUT_CHECKS_ALLOW_EXTRA_ITER[strictness]
+and OUTPUT_CHECKS_WITH_EXTRA_ITER[strictness] may be used instead in some cases.
+"""
+
+import dataclasses
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+NUM_STRICTNESS_LEVELS = 5
+
+NUM_HEADER_LINES = 8
+
+MATRIX_SIZE = 9
+
+RE_MATRIX_FLOAT = re.compile(r"[01]\.[0-9]{4}")
+
+F = RE_MATRIX_FLOAT.pattern
+
+RE_MATRIX_ROW = re.compile(rf"\s*{F}(?:\s+{F}){{{MATRIX_SIZE - 1}}}\s*")
+
+RE_HEADER_LINE = re.compile(r"(.+):(\s+)(.+?)(\s*)")
+
+RE_RESIDUUM = re.compile(r"[0-9\.e+-]+")
+
+RE_WHITESPACE = re.compile(r"\s*")
+
+# The values of the header lines, in the order in which partdiff prints them:
+RE_HEADER_VALUES = (
+    re.compile(r"[0-9\.]+\s+s"),  # Calculation time
+    re.compile(r"[0-9\.]+\s+MiB"),  # Memory usage
+    re.compile(r".+"),  # Calculation method
+    re.compile(r"[0-9]+"),  # Interlines
+    re.compile(r".+"),  # Perturbation function
+    re.compile(r".+"),  # Termination
+    re.compile(r"[0-9]+"),  # Number of iterations
+    RE_RESIDUUM,  # Residuum
+)
+
+assert len(RE_HEADER_VALUES) == NUM_HEADER_LINES
+
+# The indices of the header lines that are compared as a field, and whether the trailing whitespace of the line
+# is part of the value (it is for the free-form values, but not for the numbers):
+HEADER_FIELDS = {
+    "method": (2, True),
+    "interlines": (3, False),
+    "func": (4, True),
+    "termination": (5, True),
+}
+
+
+@dataclass(frozen=True)
+class HeaderLine:
+    """A line of the form `<label>:<whitespace><value><trailing whitespace>`"""
+
+    label: str
+    whitespace: str
+    value: str
+    trailing_whitespace: str
+
+
+@dataclass(frozen=True)
+class PartdiffOutput:
+    """The parsed output of partdiff.
+
+    All fields are None if the corresponding part of the output could not be found.
+    """
+
+    # The first 8 non-blank lines, if each of them is a header line with a value of the expected type:
+    header_lines: tuple[HeaderLine | None, ...]
+    # The header, if it is complete and followed by the matrix label:
+    header: tuple[HeaderLine, ...] | None
+    # The whitespace between the header and the matrix label (None if there is anything else in between):
+    matrix_gap: str | None
+    # The label in front of the matrix (usually "Matrix"):
+    matrix_label: str | None
+    # The value of the last header line if the header is complete, otherwise the last token of the nearest line
+    # in front of the matrix label that ends with a number (usually the residuum):
+    residuum: str | None
+    # The value of the second to last header line if the header is complete, otherwise the number in the line
+    # before the residuum (usually the number of iterations):
+    iterations: str | None
+    # The values of the matrix:
+    matrix: tuple[tuple[str, ...], ...] | None
+    # The raw text of the matrix from its first to its last value:
+    matrix_body: str | None
+    # The raw text of the matrix after the matrix label up to its last value:
+    matrix_text: str | None
+    # The whitespace after the last value of the matrix:
+    matrix_trailing_whitespace: str | None
+    # The raw text after the last value of the matrix (including the trailing whitespace):
+    trailer: str | None
+
+    def get(self, field: str) -> object | None:
+        """Get a field of the output by name.
+
+        Args:
+            field (str): The name of the field (see `OutputCheck`).
+
+        Returns:
+            object | None: The value of the field, or None if it could not be found.
+        """
+        if field in HEADER_FIELDS:
+            if self.header is None:
+                return None
+            index, with_trailing_whitespace = HEADER_FIELDS[field]
+            line = self.header[index]
+            if with_trailing_whitespace:
+                return line.value + line.trailing_whitespace
+            return line.value
+        if field == "labels":
+            if self.header is None:
+                return None
+            return tuple(line.label for line in self.header)
+        if field == "whitespace":
+            if self.header is None or self.matrix_gap is None:
+                return None
+            # Only the indentation of the matrix label (the number of blank lines in front of it isn't compared):
+            return (
+                *(line.whitespace for line in self.header),
+                self.matrix_gap.split("\n")[-1],
+            )
+        return getattr(self, field)
+
+
+def parse_header_line(index: int, line: str) -> HeaderLine | None:
+    """Parse one of the header lines.
+
+    Args:
+        index (int): The index of the header line (0 == calculation time).
+        line (str): The line to parse.
+
+    Returns:
+        HeaderLine | None: The parsed line, or None if it isn't a header line with a value of the expected type.
+    """
+    m = RE_HEADER_LINE.fullmatch(line)
+    if m is None or RE_HEADER_VALUES[index].fullmatch(m.group(3)) is None:
+        return None
+    return HeaderLine(*m.groups())
+
+
+@lru_cache(maxsize=256)
+def parse_partdiff_output(output: str) -> PartdiffOutput:
+    """Parse the output of partdiff in a single pass over its lines.
+
+    The matrix is the last block of 9 matrix rows in the output (blank lines in between are allowed, but they are
+    part of the raw text of the matrix). Everything else is located relative to the matrix or to the beginning of
+    the output.
+
+    The results are cached, so that each reference output is only parsed once.
+
+    Args:
+        output (str): The partdiff output to parse.
+
+    Returns:
+        PartdiffOutput: The parsed output.
+    """
+    lines = output.split("\n")
+    # The line offsets, to recover the raw text between lines:
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+
+    nonblank = [i for i, line in enumerate(lines) if line.strip()]
+
+    # The header lines are the first non-blank lines. Blank lines in between are part of the trailing whitespace
+    # of the preceding header line:
+    header_indices = nonblank[:NUM_HEADER_LINES] if nonblank[:1] == [0] else []
+    header_lines = [None] * NUM_HEADER_LINES
+    for i, line_index in enumerate(header_indices):
+        line = parse_header_line(i, lines[line_index])
+        if line is not None and i + 1 < len(header_indices):
+            line_end = offsets[line_index] + len(lines[line_index])
+            line = dataclasses.replace(
+                line,
+                trailing_whitespace=line.trailing_whitespace
+                + output[line_end : offsets[header_indices[i + 1]] - 1],
+            )
+        header_lines[i] = line
+
+    matrix_start = None
+    for start in range(len(nonblank) - MATRIX_SIZE, -1, -1):
+        if all(
+            RE_MATRIX_ROW.fullmatch(lines[i])
+            for i in nonblank[start : start + MATRIX_SIZE]
+        ):
+            matrix_start = start
+            break
+    if matrix_start is None:
+        return PartdiffOutput(tuple(header_lines), *(None,) * 10)
+    rows = nonblank[matrix_start : matrix_start + MATRIX_SIZE]
+    matrix = tuple(tuple(lines[i].split()) for i in rows)
+    first_row = lines[rows[0]]
+    matrix_body_start = offsets[rows[0]] + len(first_row) - len(first_row.lstrip())
+    matrix_end = offsets[rows[-1]] + len(lines[rows[-1]])
+    matrix_body = output[matrix_body_start:matrix_end]
+    trailer = output[matrix_end:]
+    matrix_trailing_whitespace = RE_WHITESPACE.match(trailer).group()
+
+    # The matrix label is the line in front of the matrix:
+    label_index = nonblank[matrix_start - 1] if matrix_start >= 1 else None
+    label_line = lines[label_index].rstrip() if label_index is not None else ""
+    if not label_line.endswith(":"):
+        return PartdiffOutput(
+            tuple(header_lines),
+            None,
+            None,
+            None,
+            None,
+            None,
+            matrix,
+            matrix_body,
+            None,
+            matrix_trailing_whitespace,
+            trailer,
+        )
+    matrix_label = label_line[:-1].lstrip()
+    colon = offsets[label_index] + len(label_line) - 1
+    label_start = colon - len(matrix_label)
+    matrix_text = output[colon + 1 : matrix_end]
+
+    header = None
+    matrix_gap = None
+    residuum = None
+    iterations = None
+    if None not in header_lines and label_index > header_indices[-1]:
+        header = tuple(header_lines)
+        residuum = header[-1].value
+        iterations = header[-2].value
+        gap = output[offsets[header_indices[-1] + 1] : label_start]
+        if not gap.strip():
+            matrix_gap = gap
+    else:
+        # The residuum is the last token of the nearest line in front of the matrix label that ends with a number:
+        for residuum_index in reversed(nonblank[: matrix_start - 1]):
+            tokens = lines[residuum_index].split()
+            if RE_RESIDUUM.fullmatch(tokens[-1]):
+                residuum = tokens[-1]
+                break
+        else:
+            residuum_index = None
+        # The number of iterations is the value of the line directly before the residuum:
+        if residuum_index is not None and residuum_index >= 1:
+            m = RE_HEADER_LINE.fullmatch(lines[residuum_index - 1])
+            if m is not None and m.group(3).isdigit():
+                iterations = m.group(3)
+
+    return PartdiffOutput(
+        tuple(header_lines),
+        header,
+        matrix_gap,
+        matrix_label,
+        residuum,
+        iterations,
+        matrix,
+        matrix_body,
+        matrix_text,
+        matrix_trailing_whitespace,
+        trailer,
+    )
+
+
+@dataclass(frozen=True)
+class OutputCheck:
+    """The parts of the output that are checked at one strictness level.
+
+    The fields are:
+    - "matrix": The values of the matrix
+    - "residuum": The residuum (see `PartdiffOutput.residuum`)
+    - "labels": The labels (left-hand-sides) of the header lines
+    - "method", "interlines", "func", "termination": The values (right-hand-sides) of the header
+    - "iterations": The number of iterations (see `PartdiffOutput.iterations`)
+    - "header": The complete header, followed by the matrix label
+    - "matrix_gap": Only whitespace between the header and the matrix label
+    - "matrix_label": The label in front of the matrix
+    - "whitespace": The whitespace after the labels of the header lines and the indentation of the matrix label
+    - "matrix_body": The raw text of the matrix from its first to its last value
+    - "matrix_text": The raw text of the matrix after the matrix label
+    - "matrix_trailing_whitespace": The whitespace after the matrix
+    - "trailer": The raw text after the matrix
+
+    The values of the matrix are compared before its raw text, so that a differing value is reported as such.
+    """
+
+    # The fields that must be present in both outputs:
+    required: tuple[str, ...]
+    # The fields that must be identical in both outputs:
+    compared: tuple[str, ...]
+
+
+OUTPUT_CHECKS = (
+    OutputCheck(("matrix",), ("matrix", "matrix_body", "matrix_trailing_whitespace")),
+    OutputCheck(
+        ("matrix", "residuum"),
+        ("matrix", "residuum", "matrix_text", "matrix_trailing_whitespace"),
+    ),
+    OutputCheck(
+        ("header",),
+        (
+            "labels",
+            "interlines",
+            "iterations",
+            "residuum",
+            "matrix",
+            "matrix_text",
+            "matrix_trailing_whitespace",
+        ),
+    ),
+    OutputCheck(
+        ("header", "matrix_gap"),
+        (
+            "labels",
+            "method",
+            "interlines",
+            "func",
+            "termination",
+            "iterations",
+            "residuum",
+            "matrix_label",
+            "matrix",
+            "matrix_text",
+            "matrix_trailing_whitespace",
+        ),
+    ),
+    OutputCheck(
+        ("header", "matrix_gap"),
+        (
+            "labels",
+            "whitespace",
+            "method",
+            "interlines",
+            "func",
+            "termination",
+            "iterations",
+            "residuum",
+            "matrix_label",
+            "matrix",
+            "matrix_text",
+            "trailer",
+        ),
+    ),
+)
+
+# Only the parts of the output that don't depend on the number of iterations are compared:
+OUTPUT_CHECKS_ALLOW_EXTRA_ITER = (
+    OutputCheck(("matrix",), ()),
+    OutputCheck(("matrix", "residuum"), ()),
+    OutputCheck(("header",), ("labels", "interlines")),
+    OutputCheck(
+        ("header", "matrix_gap"),
+        (
+            "labels",
+            "method",
+            "interlines",
+            "func",
+            "termination",
+            "matrix_label",
+            "matrix_trailing_whitespace",
+        ),
+    ),
+    OutputCheck(
+        ("header", "matrix_gap"),
+        (
+            "labels",
+            "whitespace",
+            "method",
+            "interlines",
+            "func",
+            "termination",
+            "matrix_label",
+            "trailer",
+        ),
+    ),
+)
+
+# The termination differs, since the reference output was created with term=iter:
+OUTPUT_CHECKS_WITH_EXTRA_ITER = (
+    *OUTPUT_CHECKS[:3],
+    OutputCheck(
+        OUTPUT_CHECKS[3].required,
+        tuple(field for field in OUTPUT_CHECKS[3].compared if field != "termination"),
+    ),
+    OutputCheck(
+        OUTPUT_CHECKS[4].required,
+        tuple(field for field in OUTPUT_CHECKS[4].compared if field != "termination"),
+    ),
+)
+
+assert len(OUTPUT_CHECKS) == NUM_STRICTNESS_LEVELS
+assert len(OUTPUT_CHECKS_ALLOW_EXTRA_ITER) == NUM_STRICTNESS_LEVELS
+assert len(OUTPUT_CHECKS_WITH_EXTRA_ITER) == NUM_STRICTNESS_LEVELS
+
+
+def describe_difference(field: str, expected: object, actual: object) -> str:
+    """Describe the difference of a field between the reference output and the actual output.
+
+    Args:
+        field (str): The name of the field.
+        expected (object): The value in the reference output.
+        actual (object): The value in the actual output.
+
+    Returns:
+        str: A human-readable description of the first difference.
+    """
+    if field == "matrix":
+        for i, (expected_row, actual_row) in enumerate(zip(expected, actual)):
+            for j, (expected_value, actual_value) in enumerate(
+                zip(expected_row, actual_row)
+            ):
+                if expected_value != actual_value:
+                    return (
+                        f"matrix[{i}][{j}] is {actual_value}, expected {expected_value}"
+                    )
+    if isinstance(expected, tuple) and isinstance(actual, tuple):
+        for i, (expected_value, actual_value) in enumerate(zip(expected, actual)):
+            if expected_value != actual_value:
+                return f"{field}[{i}] is {actual_value!r}, expected {expected_value!r}"
+    return f"{field} is {actual!r}, expected {expected!r}"
+
+
+def check_header_line(
+    index: int, line: str, expected: PartdiffOutput, check: OutputCheck
+) -> str | None:
+    """Check a single header line of the actual output against the parsed reference output.
+
+    This allows to detect a mismatch before the rest of the output is available. Only the fields that are
+    compared with `check` are checked.
+
+    Args:
+        index (int): The index of the header line (0 == calculation time).
+        line (str): The header line of the actual output.
+        expected (PartdiffOutput): The parsed reference output.
+        check (OutputCheck): The fields to check.
+
+    Returns:
+        str | None: A description of the mismatch, or None if the line matches (as far as it is checked).
+    """
+    if "header" not in check.required or expected.header is None:
+        return None
+    actual_line = parse_header_line(index, line)
+    if actual_line is None:
+        return f"Could not parse header line {index}: {line!r}"
+    expected_line = expected.header[index]
+    compared = [
+        ("labels", f"labels[{index}]", actual_line.label, expected_line.label),
+        (
+            "whitespace",
+            f"whitespace[{index}]",
+            actual_line.whitespace,
+            expected_line.whitespace,
+        ),
+    ]
+    compared += [
+        (
+            field,
+            field,
+            actual_line.value
+            + (actual_line.trailing_whitespace if with_trailing_whitespace else ""),
+            expected_line.value
+            + (expected_line.trailing_whitespace if with_trailing_whitespace else ""),
+        )
+        for field, (field_index, with_trailing_whitespace) in HEADER_FIELDS.items()
+        if field_index == index
+    ]
+    for field, name, actual_value, expected_value in compared:
+        if field in check.compared and actual_value != expected_value:
+            return f"{name} is {actual_value!r}, expected {expected_value!r}"
+    return None
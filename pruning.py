@@ -0,0 +1,111 @@
+"""Failure-driven pruning of dominated test cases (see --prune-on-failure).
+
+The test cases of a family (same num, method, func, and term) are run from cheap to expensive (see
+util.estimate_runtime()). When a test case fails, the more expensive test cases of its family are dominated by
+it: they almost always fail as well, so they are skipped instead of run.
+
+The failures are recorded as files in a directory that is shared by all workers of a session, so with
+`pytest-xdist`, a failure on one worker also prunes the dominated test cases on the other workers.
+"""
+
+from pathlib import Path
+
+import util
+from util import PartdiffParamsTuple
+
+PRUNED_PROPERTY = "pruned_by"
+
+
+def family(test_case: PartdiffParamsTuple) -> tuple[str, str, str, str]:
+    """Get the family of a test case.
+
+    Args:
+        test_case (PartdiffParamsTuple): The test case.
+
+    Returns:
+        tuple[str, str, str, str]: num, method, func, and term.
+    """
+    num, method, _lines, func, term, _acc_iter = test_case
+    return (num, method, func, term)
+
+
+def cost(test_case: PartdiffParamsTuple) -> float:
+    """Get the cost of a test case that decides which test cases dominate which.
+
+    Args:
+        test_case (PartdiffParamsTuple): The test case.
+
+    Returns:
+        float: The estimated runtime in seconds (see util.estimate_runtime()).
+    """
+    return util.estimate_runtime(util.PartdiffParamsClass.from_tuple(test_case))
+
+
+def order_cheapest_first(
+    test_cases: list[PartdiffParamsTuple],
+) -> list[PartdiffParamsTuple]:
+    """Order the test cases by their cost in ascending order.
+
+    Args:
+        test_cases (list[PartdiffParamsTuple]): The test cases.
+
+    Returns:
+        list[PartdiffParamsTuple]: The ordered test cases.
+    """
+    return sorted(test_cases, key=cost)
+
+
+class FailureRegistry:
+    """The failed test cases of a session, shared between processes."""
+
+    def __init__(self, directory: Path):
+        """Create a FailureRegistry.
+
+        Args:
+            directory (Path): The directory of the failure files. It is created if it doesn't exist.
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _family_path(self, test_case: PartdiffParamsTuple) -> Path:
+        """Get the directory of the failure files of a family.
+
+        Args:
+            test_case (PartdiffParamsTuple): A test case of the family.
+
+        Returns:
+            Path: The directory.
+        """
+        return self.directory / "_".join(family(test_case))
+
+    def record_failure(self, test_id: str) -> None:
+        """Record a failed test case.
+
+        Args:
+            test_id (str): The test id of the failed test case.
+        """
+        test_case = util.params_tuple_from_str(test_id)
+        path = self._family_path(test_case)
+        path.mkdir(exist_ok=True)
+        (path / "_".join(test_case)).touch()
+
+    def dominating_failure(self, test_id: str) -> str | None:
+        """Find a failed test case of the same family that is cheaper than a test case.
+
+        Args:
+            test_id (str): The test id of the test case.
+
+        Returns:
+            str | None: The test id of the cheapest such failed test case, or None if there is none.
+        """
+        test_case = util.params_tuple_from_str(test_id)
+        path = self._family_path(test_case)
+        if not path.is_dir():
+            return None
+        failures = [
+            util.params_tuple_from_str(p.name.replace("_", " ")) for p in path.iterdir()
+        ]
+        cheaper = [f for f in failures if cost(f) < cost(test_case)]
+        if not cheaper:
+            return None
+        return " ".join(min(cheaper, key=cost))
@@ -0,0 +1,245 @@
+"""A persistent, content-addressed cache for output of the reference implementation.
+
+Whenever the reference implementation has to be executed (see --reference-source), its output is stored in
+this cache, so that later runs can serve it from disk instead of executing the reference implementation again.
+
+Entries are keyed by the SHA-256 hash of the reference implementation's executable and the (normalized) partdiff
+params, so rebuilding the reference implementation with different behaviour automatically invalidates them.
+
+The cache is size-bounded: when its total size exceeds the configured limit, the least recently used entries
+are evicted.
+
+The cache is shared between all processes using the same directory (e.g. the workers of `pytest-xdist`).
+Computing an entry is guarded by a file lock of its own, so a given reference output is only computed by one
+process while the others wait for it and reuse it, and unrelated entries are computed in parallel. Once the entry
+is stored, its lock file is removed again (see `PersistentCache._lock()`), so the lock directory doesn't grow with
+the number of entries.
+"""
+
+import fcntl
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+
+CACHE_ENTRY_SUFFIX = ".txt"
+LOCK_DIRECTORY_NAME = "locks"
+LOCK_FILE_SUFFIX = ".lock"
+
+
+@cache
+def hash_file(path: Path) -> str:
+    """Compute the SHA-256 hash of a file's content.
+
+    The result is cached, so the file is only read once per process.
+
+    Args:
+        path (Path): The file to hash.
+
+    Returns:
+        str: The hex digest of the file's content.
+    """
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PersistentCache(ABC):
+    """A persistent, size-bounded cache mapping partdiff params to text.
+
+    Subclasses define what identifies an entry besides the params (see `_key_prefix()`).
+    """
+
+    def __init__(self, directory: Path, max_size: int):
+        """Create a PersistentCache.
+
+        Args:
+            directory (Path): The directory to store the cache entries in. It is created if it doesn't exist.
+            max_size (int): The maximum total size of all cache entries in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.lock_directory = directory / LOCK_DIRECTORY_NAME
+        self.lock_directory.mkdir(parents=True, exist_ok=True)
+
+    @abstractmethod
+    def _key_prefix(self) -> list[str]:
+        """Get the parts of the entries' keys that precede the params.
+
+        Returns:
+            list[str]: The parts of the key.
+        """
+
+    def _entry_digest(self, partdiff_params: Sequence[str]) -> str:
+        """Get the digest identifying the cache entry for a parameter combination.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+
+        Returns:
+            str: The hex digest of the entry's key.
+        """
+        key = "\0".join(self._key_prefix() + [" ".join(partdiff_params)])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, partdiff_params: Sequence[str]) -> Path:
+        """Get the path of the cache entry for a parameter combination.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+
+        Returns:
+            Path: The path of the cache entry.
+        """
+        return self.directory / (
+            self._entry_digest(partdiff_params) + CACHE_ENTRY_SUFFIX
+        )
+
+    @contextmanager
+    def _lock(self, partdiff_params: Sequence[str]) -> Iterator[Callable[[], None]]:
+        """Hold an exclusive lock for the cache entry of a parameter combination.
+
+        The lock is a `flock` on the entry's own lock file, so it is shared between processes and threads alike.
+        The lock file may be removed while the lock is held (see the yielded function): a process that was waiting
+        on the removed file notices that it is no longer the entry's lock file once it gets the lock, and retries
+        with the current one.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+
+        Yields:
+            Iterator[Callable[[], None]]: A function that removes the lock file; the lock is held while the context
+                is active.
+        """
+        lock_path = self.lock_directory / (
+            self._entry_digest(partdiff_params) + LOCK_FILE_SUFFIX
+        )
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    is_current = os.path.samestat(os.stat(lock_path), os.fstat(fd))
+                except FileNotFoundError:
+                    is_current = False
+                if is_current:
+                    yield lambda: lock_path.unlink(missing_ok=True)
+                    return
+            finally:
+                os.close(fd)
+
+    def get(self, partdiff_params: Sequence[str]) -> str | None:
+        """Look up the entry for a parameter combination.
+
+        A hit marks the entry as recently used.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+
+        Returns:
+            str | None: The cached text, or None if it isn't cached.
+        """
+        path = self._entry_path(partdiff_params)
+        try:
+            output = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return output
+
+    def put(self, partdiff_params: Sequence[str], output: str) -> None:
+        """Store the entry for a parameter combination.
+
+        The entry is written atomically, so concurrent readers never see partial entries.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+            output (str): The text to store.
+        """
+        path = self._entry_path(partdiff_params)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(output)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        # Never evict the new entry itself (even if it exceeds max_size on its own), so that the processes waiting
+        # for it can reuse it:
+        self.evict(keep=path)
+
+    def get_or_compute(
+        self, partdiff_params: Sequence[str], compute: Callable[[], str]
+    ) -> str:
+        """Look up the entry for a parameter combination and compute it on a miss.
+
+        Only one process computes a missing entry; all other processes requesting the same entry
+        block until it is available and then reuse it.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+            compute (Callable[[], str]): Computes the text (e.g. by running the reference implementation).
+
+        Returns:
+            str: The cached or computed text.
+        """
+        output = self.get(partdiff_params)
+        if output is not None:
+            return output
+        with self._lock(partdiff_params) as remove_lock_file:
+            # Another process may have computed the entry while we were waiting for the lock:
+            output = self.get(partdiff_params)
+            if output is None:
+                output = compute()
+                self.put(partdiff_params, output)
+            remove_lock_file()
+        return output
+
+    def evict(self, keep: Path | None = None) -> None:
+        """Evict the least recently used entries until the total size fits into max_size.
+
+        Args:
+            keep (Path | None, optional): An entry that must not be evicted. Defaults to None.
+        """
+        entries = []
+        for p in self.directory.iterdir():
+            if p.suffix != CACHE_ENTRY_SUFFIX:
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total_size = sum(size for _mtime, size, _p in entries)
+        for _mtime, size, p in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if p == keep:
+                continue
+            p.unlink(missing_ok=True)
+            total_size -= size
+
+
+class ReferenceCache(PersistentCache):
+    """A persistent cache mapping partdiff params to the output of the reference implementation."""
+
+    def __init__(self, directory: Path, max_size: int, reference_executable: Path):
+        """Create a ReferenceCache.
+
+        Args:
+            directory (Path): The directory to store the cache entries in. It is created if it doesn't exist.
+            max_size (int): The maximum total size of all cache entries in bytes.
+            reference_executable (Path): The executable of the reference implementation.
+        """
+        super().__init__(directory, max_size)
+        self.reference_executable = reference_executable
+
+    def _key_prefix(self) -> list[str]:
+        return [hash_file(self.reference_executable)]
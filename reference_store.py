@@ -0,0 +1,174 @@
+"""A packed store for the cached reference output.
+
+Instead of one file per parameter combination (see `reference_output`), a packed reference store is a single
+file with the following layout:
+
+1. The magic bytes `PACKED_STORE_MAGIC`
+2. The length of the index as an unsigned 64-bit little-endian integer
+3. The index: A UTF-8 encoded JSON object like
+   `{"compression": "zlib", "entries": {"1 1 0 1 2 1": [offset, length], ...}}`,
+   where the offsets are relative to the start of the data section.
+4. The data section: The (optionally compressed) UTF-8 encoded reference outputs.
+
+The store is memory-mapped and each entry is only decoded when it is accessed, so opening the store is cheap
+even for a large number of parameter combinations.
+
+A packed reference store is created from the content of `reference_output` by running this file as a script:
+
+    $ python reference_store.py --compress reference_output.pack
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+
+import util
+from util import PartdiffParamsTuple
+
+PACKED_STORE_MAGIC = b"PARTDIFF-REFERENCE-STORE-1\n"
+INDEX_LENGTH_FORMAT = "<Q"
+
+
+class Compression(StrEnum):
+    """The compression of the entries in a packed reference store"""
+
+    NONE = "none"
+    ZLIB = "zlib"
+
+
+class PackedReferenceStore(Mapping[PartdiffParamsTuple, str]):
+    """A read-only mapping from parameter combinations to reference output, backed by a packed reference store."""
+
+    def __init__(self, path: Path):
+        """Open a packed reference store.
+
+        Args:
+            path (Path): The path of the store.
+
+        Raises:
+            ValueError: When the file is not a packed reference store.
+        """
+        with path.open("rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length = len(PACKED_STORE_MAGIC) + struct.calcsize(INDEX_LENGTH_FORMAT)
+        if self.mmap[: len(PACKED_STORE_MAGIC)] != PACKED_STORE_MAGIC:
+            raise ValueError(f'"{path}" is not a packed reference store.')
+        (index_length,) = struct.unpack_from(
+            INDEX_LENGTH_FORMAT, self.mmap, len(PACKED_STORE_MAGIC)
+        )
+        index = json.loads(
+            self.mmap[header_length : header_length + index_length].decode("utf-8")
+        )
+        self.compression = Compression(index["compression"])
+        self.data_offset = header_length + index_length
+        self.entries: dict[PartdiffParamsTuple, tuple[int, int]] = {
+            util.params_tuple_from_str(key): (offset, length)
+            for key, (offset, length) in index["entries"].items()
+        }
+
+    def __getitem__(self, partdiff_params: PartdiffParamsTuple) -> str:
+        offset, length = self.entries[partdiff_params]
+        start = self.data_offset + offset
+        data = self.mmap[start : start + length]
+        if self.compression == Compression.ZLIB:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def __contains__(self, partdiff_params: object) -> bool:
+        return partdiff_params in self.entries
+
+    def __iter__(self) -> Iterator[PartdiffParamsTuple]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+@cache
+def open_reference_store(path: Path) -> PackedReferenceStore:
+    """Open a packed reference store.
+
+    The store is only opened once per process.
+
+    Args:
+        path (Path): The path of the store.
+
+    Returns:
+        PackedReferenceStore: The opened store.
+    """
+    return PackedReferenceStore(path)
+
+
+def write_reference_store(
+    path: Path,
+    reference_output_data: Iterable[tuple[PartdiffParamsTuple, str]],
+    compression: Compression,
+) -> None:
+    """Write a packed reference store.
+
+    The store is written atomically.
+
+    Args:
+        path (Path): The path of the store.
+        reference_output_data (Iterable[tuple[PartdiffParamsTuple, str]]): The parameter combinations and the
+            corresponding output of the reference implementation.
+        compression (Compression): The compression of the entries.
+    """
+    entries = {}
+    blobs = []
+    offset = 0
+    for partdiff_params, reference_output in sorted(reference_output_data):
+        data = reference_output.encode("utf-8")
+        if compression == Compression.ZLIB:
+            data = zlib.compress(data, 9)
+        entries[" ".join(partdiff_params)] = (offset, len(data))
+        blobs.append(data)
+        offset += len(data)
+    index = json.dumps({"compression": compression, "entries": entries}).encode("utf-8")
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(PACKED_STORE_MAGIC)
+            f.write(struct.pack(INDEX_LENGTH_FORMAT, len(index)))
+            f.write(index)
+            for data in blobs:
+                f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def main() -> None:
+    """Convert the content of `reference_output` into a packed reference store."""
+    parser = argparse.ArgumentParser(
+        description="Convert the content of reference_output into a packed reference store."
+    )
+    parser.add_argument(
+        "output",
+        help="Path of the packed reference store (default: reference_output.pack).",
+        type=Path,
+        nargs="?",
+        default=Path("reference_output.pack"),
+    )
+    parser.add_argument(
+        "--compress",
+        help="Compress the entries with zlib.",
+        action="store_true",
+    )
+    args = parser.parse_args()
+    compression = Compression.ZLIB if args.compress else Compression.NONE
+    write_reference_store(args.output, util.iter_reference_output_data(), compression)
+
+
+if __name__ == "__main__":
+    main()
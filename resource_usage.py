@@ -0,0 +1,109 @@
+"""Resource accounting of the runs of EXECUTABLE (see --resource-usage).
+
+Each test records the resource usage of its run of EXECUTABLE as reported by the kernel (wall time, user and
+system CPU time, peak resident set size, and context switches) as a property of the test report, together with
+the memory usage reported by EXECUTABLE and the memory needed for its matrices (see
+util.expected_memory_usage()).
+
+At the end of the session, the usage is summarized per test. The CPU time divided by the wall time shows how
+many threads were actually busy. Tests whose peak resident set size is much larger than the memory needed for
+the matrices are flagged (see --memory-overhead).
+
+The kernel attributes the peak resident set size of the tester process to EXECUTABLE as well (it was forked from
+the tester process), so smaller peaks can't be measured (see util.ResourceUsage.measured_rss).
+"""
+
+import pytest
+
+import util
+
+RESOURCE_USAGE_PROPERTY = "resource_usage"
+
+# The resident set size of a process that hasn't allocated its matrices yet (code, libraries, stack, ...):
+RSS_ALLOWANCE_MIB = 16
+
+
+class ResourceUsagePlugin:
+    """A pytest plugin that collects the resource usage and reports it at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, memory_overhead: float):
+        """Create a ResourceUsagePlugin.
+
+        Args:
+            memory_overhead (float): The tolerated ratio of the peak resident set size to the expected memory.
+        """
+        self.memory_overhead = memory_overhead
+        self.usages: dict[str, dict] = {}
+
+    def is_flagged(self, usage: dict) -> bool:
+        """Check if a run used much more memory than needed for its matrices.
+
+        Args:
+            usage (dict): The recorded resource usage of the run.
+
+        Returns:
+            bool: Whether the peak resident set size exceeds the tolerated overhead.
+        """
+        measured_rss = util.ResourceUsage(**usage["usage"]).measured_rss
+        return (
+            measured_rss is not None
+            and measured_rss
+            > self.memory_overhead * usage["expected_memory"] + RSS_ALLOWANCE_MIB
+        )
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call":
+            return
+        usage = util.get_user_property(report, RESOURCE_USAGE_PROPERTY)
+        if usage is not None:
+            self.usages[usage["test_id"]] = usage
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.usages:
+            return
+        terminalreporter.section("resource usage")
+        terminalreporter.write_line(
+            f"{'test':<28} {'wall [s]':>9} {'user [s]':>9} {'sys [s]':>9} {'threads':>7} "
+            f"{'RSS [MiB]':>10} {'rep. [MiB]':>10} {'exp. [MiB]':>10} {'vol. cs':>8} {'invol. cs':>9}"
+        )
+        for test_id, usage in sorted(self.usages.items()):
+            u = util.ResourceUsage(**usage["usage"])
+            reported_memory = (
+                "-"
+                if usage["reported_memory"] is None
+                else f"{usage['reported_memory']:.3f}"
+            )
+            measured_rss = (
+                f"<{u.inherited_rss:.0f}"
+                if u.measured_rss is None
+                else f"{u.measured_rss:.3f}"
+            )
+            terminalreporter.write_line(
+                f"{test_id:<28} {u.wall_time:>9.3f} {u.user_time:>9.3f} {u.sys_time:>9.3f} "
+                f"{u.cpu_utilization:>7.2f} {measured_rss:>10} {reported_memory:>10} "
+                f"{usage['expected_memory']:>10.3f} {u.voluntary_context_switches:>8} "
+                f"{u.involuntary_context_switches:>9}",
+                red=self.is_flagged(usage),
+            )
+        flagged = [
+            test_id for test_id, usage in self.usages.items() if self.is_flagged(usage)
+        ]
+        terminalreporter.write_line(
+            "RSS values below the peak RSS of the tester process (<...) can't be measured, "
+            "because the kernel attributes the tester's RSS to the forked EXECUTABLE, too."
+        )
+        if flagged:
+            terminalreporter.write_line(
+                f"{len(flagged)} test(s) used more than {self.memory_overhead:g} times the memory needed "
+                f"for the matrices (plus {RSS_ALLOWANCE_MIB} MiB): {', '.join(sorted(flagged))}",
+                red=True,
+            )
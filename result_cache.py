@@ -0,0 +1,120 @@
+"""A persistent cache for the results of EXECUTABLE (see --reuse-results).
+
+Each test stores the output of its run of EXECUTABLE and its verdict in this cache. When a later session runs
+the same test with an unchanged EXECUTABLE, the cached output is used instead of running EXECUTABLE again. The
+output is still checked against the reference output, so the verdict is always up to date with the reference
+output and the checks.
+
+Entries are keyed by the SHA-256 hashes of the files in the command line of EXECUTABLE (e.g. both `mpirun` and
+the partdiff binary in `mpirun -np 4 ./partdiff`), the working directory, the partdiff params, and the settings
+that affect the verdict (--strictness and --allow-extra-iterations). Rebuilding EXECUTABLE therefore
+automatically invalidates all of its entries. Like the reference cache, the cache is size-bounded and evicts the
+least recently used entries (see reference_cache.PersistentCache).
+"""
+
+import json
+import shutil
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from pathlib import Path
+
+from reference_cache import PersistentCache, hash_file
+
+
+class ReuseMode(StrEnum):
+    """See --reuse-results"""
+
+    OFF = "off"
+    # Use cached results and store new ones:
+    REUSE = "reuse"
+    # Run EXECUTABLE for every test and overwrite the cached results:
+    REFRESH = "refresh"
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """The cached result of a test"""
+
+    output: str
+    passed: bool
+
+
+def hash_command_line(executable: list[str], cwd: Path | None) -> list[str]:
+    """Hash the command line of EXECUTABLE.
+
+    Arguments that refer to files (relative to `cwd`, or found in `PATH` for the command itself) are replaced by
+    the SHA-256 hash of their content; all other arguments are kept as they are.
+
+    Args:
+        executable (list[str]): The command line of EXECUTABLE.
+        cwd (Path | None): The working directory of EXECUTABLE.
+
+    Returns:
+        list[str]: The hashed command line.
+    """
+    hashed = []
+    for i, arg in enumerate(executable):
+        path = (cwd or Path.cwd()) / arg
+        if not path.is_file() and i == 0 and (found := shutil.which(arg)) is not None:
+            path = Path(found)
+        hashed.append(hash_file(path.resolve()) if path.is_file() else arg)
+    return hashed
+
+
+class ResultCache(PersistentCache):
+    """A persistent cache mapping partdiff params to the results of EXECUTABLE."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int,
+        executable: list[str],
+        cwd: Path | None,
+        settings: Sequence[str],
+        mode: ReuseMode,
+    ):
+        """Create a ResultCache.
+
+        Args:
+            directory (Path): The directory to store the cache entries in. It is created if it doesn't exist.
+            max_size (int): The maximum total size of all cache entries in bytes.
+            executable (list[str]): The command line of EXECUTABLE.
+            cwd (Path | None): The working directory of EXECUTABLE.
+            settings (Sequence[str]): The settings that affect the verdict.
+            mode (ReuseMode): Whether cached results are used (ReuseMode.REUSE) or only stored (ReuseMode.REFRESH).
+        """
+        super().__init__(directory, max_size)
+        self.key = hash_command_line(executable, cwd) + [str(cwd), *settings]
+        self.mode = mode
+
+    def _key_prefix(self) -> list[str]:
+        return list(self.key)
+
+    def get_result(self, partdiff_params: Sequence[str]) -> CachedResult | None:
+        """Look up the result for a parameter combination.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+
+        Returns:
+            CachedResult | None: The cached result, or None if it isn't cached (or --reuse-results=refresh).
+        """
+        if self.mode != ReuseMode.REUSE:
+            return None
+        entry = self.get(partdiff_params)
+        if entry is None:
+            return None
+        try:
+            return CachedResult(**json.loads(entry))
+        except (json.decoder.JSONDecodeError, TypeError):
+            return None
+
+    def put_result(self, partdiff_params: Sequence[str], result: CachedResult) -> None:
+        """Store the result for a parameter combination.
+
+        Args:
+            partdiff_params (Sequence[str]): The parameter combination.
+            result (CachedResult): The result.
+        """
+        self.put(partdiff_params, json.dumps(asdict(result)))
@@ -0,0 +1,259 @@
+"""Strong scaling analysis across --num-threads (see --scaling).
+
+Each test records the calculation time of EXECUTABLE (the median of the benchmark samples with --benchmark,
+otherwise the time of the correctness run) and the calculation time of the reference output. At the end of the
+session, the results are grouped by all partdiff params except `num`, and for each group the speedup and parallel
+efficiency relative to `num=1` and the speedup relative to the reference implementation are reported.
+Additionally, the serial fraction of Amdahl's law is fitted to the measured speedups.
+
+With --weak-scaling, `lines` is derived from `num` instead, so that the number of grid points per thread stays
+constant (see util.weak_scaling_lines()). The results are then grouped by the base configuration, and the weak
+scaling efficiency (the calculation time per iteration with `num=1` divided by the one with `num=p`) is reported.
+
+With --min-efficiency, the session fails if any parallel efficiency falls below the given threshold.
+"""
+
+import statistics
+from dataclasses import dataclass
+
+import pytest
+
+import benchmark
+import util
+from util import PartdiffParamsTuple
+
+TIMING_PROPERTY = "timing"
+
+# Maps the test ids to their base configuration with --weak-scaling (see conftest.pytest_generate_tests()):
+WEAK_SCALING_BASES_KEY = pytest.StashKey[dict[str, str]]()
+
+ScalingGroupKey = tuple[str, str, str, str, str]
+
+
+@dataclass
+class ScalingPoint:
+    """The scaling result for one number of threads"""
+
+    num: int
+    calculation_time: float
+    speedup: float
+    efficiency: float
+    reference_speedup: float
+
+
+@dataclass
+class WeakScalingPoint:
+    """The weak scaling result for one number of threads"""
+
+    num: int
+    lines: int
+    calculation_time: float
+    time_per_iteration: float
+    efficiency: float
+
+
+def fit_amdahl_serial_fraction(points: list[tuple[int, float]]) -> float | None:
+    """Fit the serial fraction f of Amdahl's law S(p) = 1 / (f + (1 - f) / p) to measured speedups.
+
+    Amdahl's law is linear in f when written as 1/S - 1/p = f * (1 - 1/p), so f is fitted by linear least
+    squares through the origin.
+
+    Args:
+        points (list[tuple[int, float]]): The number of threads and the measured speedup.
+
+    Returns:
+        float | None: The fitted serial fraction, or None if there is no point with more than 1 thread.
+    """
+    sxx = 0.0
+    sxy = 0.0
+    for p, speedup in points:
+        if p <= 1 or speedup <= 0:
+            continue
+        x = 1 - 1 / p
+        y = 1 / speedup - 1 / p
+        sxx += x * x
+        sxy += x * y
+    if sxx == 0:
+        return None
+    return sxy / sxx
+
+
+class ScalingPlugin:
+    """A pytest plugin that collects the timings and reports the strong scaling at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, min_efficiency: float | None):
+        """Create a ScalingPlugin.
+
+        Args:
+            min_efficiency (float | None): The minimum parallel efficiency (None == no threshold).
+        """
+        self.min_efficiency = min_efficiency
+        self.timings: dict[PartdiffParamsTuple, dict] = {}
+        self.groups: dict[ScalingGroupKey, list[ScalingPoint]] = {}
+        self.violations: list[tuple[PartdiffParamsTuple, float]] = []
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call" or not report.passed:
+            return
+        timing = util.get_user_property(report, TIMING_PROPERTY)
+        if timing is None:
+            return
+        timing = dict(timing)
+        samples = util.get_user_property(report, benchmark.BENCHMARK_PROPERTY)
+        if samples is not None:
+            timing["calculation_time"] = statistics.median(samples["calculation_time"])
+        partdiff_params = util.params_tuple_from_str(timing["test_id"])
+        self.timings[partdiff_params] = timing
+
+    def analyze(self) -> None:
+        """Group the timings and compute speedup and efficiency of each group."""
+        by_group: dict[ScalingGroupKey, dict[int, dict]] = {}
+        for (num, *rest), timing in self.timings.items():
+            by_group.setdefault(tuple(rest), {})[int(num)] = timing
+        for key, timings in sorted(by_group.items()):
+            if 1 not in timings:
+                continue
+            serial_time = timings[1]["calculation_time"]
+            reference_time = timings[1]["reference_calculation_time"]
+            points = []
+            for num, timing in sorted(timings.items()):
+                calculation_time = timing["calculation_time"]
+                # Avoid division by zero for runs below the timer resolution:
+                calculation_time = max(calculation_time, 1e-6)
+                speedup = max(serial_time, 1e-6) / calculation_time
+                points.append(
+                    ScalingPoint(
+                        num,
+                        calculation_time,
+                        speedup,
+                        speedup / num,
+                        max(reference_time, 1e-6) / calculation_time,
+                    )
+                )
+            self.groups[key] = points
+            if self.min_efficiency is not None:
+                self.violations += [
+                    ((str(point.num), *key), point.efficiency)
+                    for point in points
+                    if point.num > 1 and point.efficiency < self.min_efficiency
+                ]
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_sessionfinish
+        """
+        self.analyze()
+        if self.violations and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.groups:
+            return
+        terminalreporter.section("strong scaling")
+        for key, points in self.groups.items():
+            serial_fraction = fit_amdahl_serial_fraction(
+                [(point.num, point.speedup) for point in points]
+            )
+            fit = "-" if serial_fraction is None else f"{serial_fraction:.4f}"
+            terminalreporter.write_line(
+                f"method lines func term acc/iter = {' '.join(key)} (Amdahl serial fraction: {fit})"
+            )
+            terminalreporter.write_line(
+                f"  {'num':>4} {'time [s]':>12} {'speedup':>8} {'efficiency':>10} {'vs. ref':>8}"
+            )
+            for point in points:
+                terminalreporter.write_line(
+                    f"  {point.num:>4} {point.calculation_time:>12.6f} {point.speedup:>8.2f} "
+                    f"{point.efficiency:>10.2f} {point.reference_speedup:>8.2f}"
+                )
+        for partdiff_params, efficiency in self.violations:
+            terminalreporter.write_line(
+                f"Parallel efficiency of {' '.join(partdiff_params)} is {efficiency:.2f} "
+                f"(below --min-efficiency={self.min_efficiency})",
+                red=True,
+            )
+
+
+class WeakScalingPlugin(ScalingPlugin):
+    """A pytest plugin that collects the timings and reports the weak scaling at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, min_efficiency: float | None):
+        """Create a WeakScalingPlugin.
+
+        Args:
+            min_efficiency (float | None): The minimum weak scaling efficiency (None == no threshold).
+        """
+        super().__init__(min_efficiency)
+        self.weak_groups: dict[str, list[WeakScalingPoint]] = {}
+
+    def analyze(self) -> None:
+        """Group the timings by base configuration and compute the weak scaling efficiency of each group."""
+        by_group: dict[str, dict[int, tuple[PartdiffParamsTuple, dict]]] = {}
+        for partdiff_params, timing in self.timings.items():
+            if "weak_scaling_base" not in timing:
+                continue
+            by_group.setdefault(timing["weak_scaling_base"], {})[
+                int(partdiff_params[0])
+            ] = (partdiff_params, timing)
+        for base, timings in sorted(by_group.items()):
+            if 1 not in timings:
+                continue
+            points = []
+            for num, (partdiff_params, timing) in sorted(timings.items()):
+                # Normalize by the number of iterations, because term=acc needs more iterations on larger grids:
+                calculation_time = max(timing["calculation_time"], 1e-6)
+                points.append(
+                    WeakScalingPoint(
+                        num,
+                        int(partdiff_params[2]),
+                        calculation_time,
+                        calculation_time / timing["iterations"],
+                        0.0,
+                    )
+                )
+            serial_time_per_iteration = points[0].time_per_iteration
+            for point in points:
+                point.efficiency = serial_time_per_iteration / point.time_per_iteration
+            self.weak_groups[base] = points
+            if self.min_efficiency is not None:
+                self.violations += [
+                    (timings[point.num][0], point.efficiency)
+                    for point in points
+                    if point.num > 1 and point.efficiency < self.min_efficiency
+                ]
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.weak_groups:
+            return
+        terminalreporter.section("weak scaling")
+        for base, points in self.weak_groups.items():
+            terminalreporter.write_line(f"method lines func term acc/iter = {base}")
+            terminalreporter.write_line(
+                f"  {'num':>4} {'lines':>6} {'time [s]':>12} {'time/iter [s]':>14} {'efficiency':>10}"
+            )
+            for point in points:
+                terminalreporter.write_line(
+                    f"  {point.num:>4} {point.lines:>6} {point.calculation_time:>12.6f} "
+                    f"{point.time_per_iteration:>14.9f} {point.efficiency:>10.2f}"
+                )
+        for partdiff_params, efficiency in self.violations:
+            terminalreporter.write_line(
+                f"Weak scaling efficiency of {' '.join(partdiff_params)} is {efficiency:.2f} "
+                f"(below --min-efficiency={self.min_efficiency})",
+                red=True,
+            )
@@ -0,0 +1,228 @@
+"""Scheduling of the test cases (see --longest-first and --time-budget).
+
+The wall time of each test is recorded in a history file (see --history-file). With --longest-first, the test
+cases are ordered by their expected runtime in descending order, so that the longest tests are started first
+and don't end up as stragglers on a single `pytest-xdist` worker. The expected runtime is taken from the history
+if available and is estimated from the partdiff params otherwise (see util.estimate_runtime()).
+
+With --time-budget, only a subset of the test cases is selected whose expected runtime fits into the budget, but
+that still covers each value of each parameter (and as many pairs of values as possible).
+"""
+
+import itertools
+import json
+import os
+import re
+import statistics
+import tempfile
+from pathlib import Path
+
+import pytest
+
+import util
+from util import PartdiffParamsTuple
+
+# Weight of the newest measurement when updating the history (exponential moving average):
+HISTORY_SMOOTHING = 0.5
+
+# Only the correctness tests are recorded: the performance tests (see baseline.py) run EXECUTABLE
+# --baseline-samples times, so their durations would skew the history.
+RE_TEST_ID_FROM_NODEID = re.compile(r"^.*::test_partdiff_parametrized\[(.*)\]$")
+
+PARAM_NAMES = ("num", "method", "lines", "func", "term", "acc/iter")
+
+
+class RuntimeHistory:
+    """The recorded wall times of the tests, keyed by test id."""
+
+    def __init__(self, path: Path):
+        """Load the history from a file.
+
+        A missing or unreadable file results in an empty history.
+
+        Args:
+            path (Path): The path of the history file.
+        """
+        self.path = path
+        self.runtimes: dict[str, float] = {}
+        try:
+            runtimes = json.loads(path.read_text())
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return
+        if isinstance(runtimes, dict):
+            self.runtimes = {
+                k: float(v) for k, v in runtimes.items() if isinstance(v, (int, float))
+            }
+
+    def get(self, test_id: str) -> float | None:
+        """Get the recorded wall time of a test.
+
+        Args:
+            test_id (str): The test id.
+
+        Returns:
+            float | None: The recorded wall time in seconds, or None if there is none.
+        """
+        return self.runtimes.get(test_id)
+
+    def record(self, test_id: str, duration: float) -> None:
+        """Record the wall time of a test.
+
+        Args:
+            test_id (str): The test id.
+            duration (float): The measured wall time in seconds.
+        """
+        previous = self.runtimes.get(test_id)
+        if previous is not None:
+            duration = HISTORY_SMOOTHING * duration + (1 - HISTORY_SMOOTHING) * previous
+        self.runtimes[test_id] = duration
+
+    def save(self) -> None:
+        """Write the history to its file atomically."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.runtimes, f, indent=0, sort_keys=True)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def expected_runtimes(
+    test_cases: list[PartdiffParamsTuple], history: RuntimeHistory
+) -> list[float]:
+    """Get the expected runtime of each test case.
+
+    For test cases without history, the estimate from util.estimate_runtime() is scaled by the median ratio of
+    recorded and estimated runtime of the test cases with history, so both are comparable.
+
+    Args:
+        test_cases (list[PartdiffParamsTuple]): The test cases.
+        history (RuntimeHistory): The recorded wall times.
+
+    Returns:
+        list[float]: The expected runtime of each test case in seconds.
+    """
+    estimates = [
+        util.estimate_runtime(util.PartdiffParamsClass.from_tuple(test_case))
+        for test_case in test_cases
+    ]
+    recorded = [history.get(" ".join(test_case)) for test_case in test_cases]
+    ratios = [r / e for r, e in zip(recorded, estimates) if r is not None]
+    scale = statistics.median(ratios) if ratios else 1.0
+    return [r if r is not None else e * scale for r, e in zip(recorded, estimates)]
+
+
+def order_longest_first(
+    test_cases: list[PartdiffParamsTuple], history: RuntimeHistory
+) -> list[PartdiffParamsTuple]:
+    """Order the test cases by their expected runtime in descending order.
+
+    Args:
+        test_cases (list[PartdiffParamsTuple]): The test cases.
+        history (RuntimeHistory): The recorded wall times.
+
+    Returns:
+        list[PartdiffParamsTuple]: The ordered test cases.
+    """
+    runtimes = expected_runtimes(test_cases, history)
+    order = sorted(range(len(test_cases)), key=lambda i: runtimes[i], reverse=True)
+    return [test_cases[i] for i in order]
+
+
+def coverage_features(test_case: PartdiffParamsTuple) -> tuple[set, set]:
+    """Get the parameter values and the pairs of parameter values that a test case covers.
+
+    Args:
+        test_case (PartdiffParamsTuple): The test case.
+
+    Returns:
+        tuple[set, set]: The (dimension, value) tuples and the pairs of them.
+    """
+    values = set(enumerate(test_case))
+    pairs = set(itertools.combinations(sorted(values), 2))
+    return values, pairs
+
+
+def select_within_budget(
+    test_cases: list[PartdiffParamsTuple], history: RuntimeHistory, budget: float
+) -> tuple[list[PartdiffParamsTuple], list[str]]:
+    """Select the test cases that cover the parameter space best within a runtime budget.
+
+    The selection is greedy: First, the test cases that cover the most parameter values that are not covered yet
+    per second of expected runtime are selected until each value of each parameter is covered (if the budget
+    allows). Then, the same is done for the pairs of parameter values. The selected test cases keep their order.
+
+    Args:
+        test_cases (list[PartdiffParamsTuple]): The test cases to select from.
+        history (RuntimeHistory): The recorded wall times.
+        budget (float): The budget for the sum of the expected runtimes in seconds.
+
+    Returns:
+        tuple[list[PartdiffParamsTuple], list[str]]: The selected test cases and the parameter values that could
+            not be covered within the budget (as "name=value").
+    """
+    runtimes = expected_runtimes(test_cases, history)
+    features = [coverage_features(test_case) for test_case in test_cases]
+    selected: set[int] = set()
+    missing = []
+    for level in range(2):
+        uncovered = set().union(*(f[level] for f in features))
+        for i in selected:
+            uncovered -= features[i][level]
+        while uncovered:
+            best, best_gain = None, 0.0
+            for i, runtime in enumerate(runtimes):
+                if i in selected or runtime > budget:
+                    continue
+                gain = len(features[i][level] & uncovered) / max(runtime, 1e-6)
+                if gain > best_gain:
+                    best, best_gain = i, gain
+            if best is None:
+                break
+            selected.add(best)
+            budget -= runtimes[best]
+            uncovered -= features[best][level]
+        if level == 0:
+            missing = sorted(uncovered)
+    return [test_cases[i] for i in sorted(selected)], [
+        f"{PARAM_NAMES[dimension]}={value}" for dimension, value in missing
+    ]
+
+
+class RuntimeHistoryPlugin:
+    """A pytest plugin that records the wall time of each correctness test into the history.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, history: RuntimeHistory):
+        """Create a RuntimeHistoryPlugin.
+
+        Args:
+            history (RuntimeHistory): The history to record into.
+        """
+        self.history = history
+        self.durations: dict[str, float] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call" or report.skipped:
+            return
+        m = RE_TEST_ID_FROM_NODEID.match(report.nodeid)
+        if m is None:
+            return
+        self.durations[m.group(1)] = report.duration
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_sessionfinish
+        """
+        if not self.durations:
+            return
+        for test_id, duration in self.durations.items():
+            self.history.record(test_id, duration)
+        self.history.save()
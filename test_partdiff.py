@@ -3,74 +3,195 @@
 The test is parametrized by `pytest_generate_tests` in `conftest.py` via its `test_id` argument.
 """
 
-import re
+import dataclasses
+import warnings
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+import baseline
+import benchmark
+import numa
+import output_parser
+import resource_usage
+import scaling
 import util
-from output_masks import (
-    OUTPUT_MASKS,
-    OUTPUT_MASKS_ALLOW_EXTRA_ITER,
-    OUTPUT_MASKS_WITH_EXTRA_ITER,
+from output_parser import (
+    OUTPUT_CHECKS,
+    OUTPUT_CHECKS_ALLOW_EXTRA_ITER,
+    OUTPUT_CHECKS_WITH_EXTRA_ITER,
+    OutputCheck,
 )
+from reference_cache import ReferenceCache
+from result_cache import CachedResult, ResultCache
 from util import PartdiffParamsTuple, TermParam
 
 
 def check_partdiff_output(
     actual_output: str,
     reference_output: str,
-    mask: re.Pattern,
+    check: OutputCheck,
 ):
-    """Check the output of partdiff using an output mask.
+    """Check the output of partdiff by comparing the fields of the parsed outputs.
 
     This function asserts that...
-    1. The actual output matches the selected output mask
-    2. The reference output matches the selected output mask
-    3. For all of the output mask's capture groups, that the
-       captured values of actual and reference output are identical.
+    1. The required fields are present in the actual output
+    2. The required and compared fields are present in the reference output
+    3. The compared fields of actual and reference output are identical.
 
     Args:
         actual_output (str): The output of the tested EXECUTABLE
         reference_output (str): The output of the reference implementation
-        mask (re.Pattern): The output mask.
+        check (OutputCheck): The fields to check (see `output_parser.OUTPUT_CHECKS`).
     """
-    m_actual = mask.match(actual_output)
-    assert m_actual is not None, (actual_output,)
-    m_expected = mask.match(reference_output)
-    assert m_expected is not None, (reference_output,)
-    assert len(m_expected.groups()) == len(m_actual.groups())
-    for capture_expected, capture_actual in zip(m_expected.groups(), m_actual.groups()):
-        assert capture_expected == capture_actual
+    actual = output_parser.parse_partdiff_output(actual_output)
+    expected = output_parser.parse_partdiff_output(reference_output)
+    for field in check.required + check.compared:
+        assert (
+            expected.get(field) is not None
+        ), f"Could not parse {field} in the reference output:\n{reference_output}"
+        assert (
+            actual.get(field) is not None
+        ), f"Could not parse {field} in the output:\n{actual_output}"
+    for field in check.compared:
+        assert actual.get(field) == expected.get(
+            field
+        ), output_parser.describe_difference(
+            field, expected.get(field), actual.get(field)
+        )
 
 
 def test_partdiff_parametrized(
     pytestconfig: pytest.Config,
-    reference_output_data: dict[PartdiffParamsTuple, str],
+    reference_output_data: Mapping[PartdiffParamsTuple, str],
+    reference_cache: ReferenceCache | None,
+    result_cache: ResultCache | None,
+    record_property: Callable[[str, object], None],
+    resource_limits: util.ResourceLimits,
+    use_valgrind: bool,
+    held_cpu_slots: list[int],
     test_id: str,
 ) -> None:
     """Test if the output of a partdiff implementation matches the output of the reference implementation.
 
     Args:
         pytestconfig (pytest.Config): See https://docs.pytest.org/en/7.1.x/reference/reference.html#pytestconfig
-        reference_output_data (dict[PartdiffParamsTuple, str]): The cached reference output data
+        reference_output_data (Mapping[PartdiffParamsTuple, str]): The cached reference output data
+        reference_cache (ReferenceCache | None): The persistent cache for output of the reference implementation
+        result_cache (ResultCache | None): The persistent cache for the results of EXECUTABLE (see --reuse-results)
+        record_property (Callable[[str, object], None]): See https://docs.pytest.org/en/stable/reference/reference.html#record-property
+        resource_limits (util.ResourceLimits): The limits for the runs of EXECUTABLE
+        use_valgrind (bool): Whether EXECUTABLE is run with valgrind
+        held_cpu_slots (list[int]): The CPU slots that are held while the test runs
         test_id (str): The parameters to test as a space-separated string (not a tuple because a str prints better).
     """
     partdiff_params = util.params_tuple_from_str(test_id)
     partdiff_executable = pytestconfig.getoption("executable")
     strictness = pytestconfig.getoption("strictness")
-    use_valgrind = pytestconfig.getoption("valgrind")
     reference_source = pytestconfig.getoption("reference_source")
     cwd = pytestconfig.getoption("cwd")
     allow_extra_iterations = pytestconfig.getoption("allow_extra_iterations")
+    use_concurrency = pytestconfig.getoption("concurrent")
+    benchmark_repetitions = pytestconfig.getoption("benchmark")
+    benchmark_warmup = pytestconfig.getoption("benchmark_warmup")
+    record_timing = pytestconfig.getoption("scaling") or pytestconfig.getoption(
+        "throughput"
+    )
+    stream_output = pytestconfig.getoption("stream_output")
+    max_output_size = pytestconfig.getoption("max_output_size") * 1024 * 1024
+    timeout_factor = pytestconfig.getoption("timeout_factor")
+    record_resource_usage = pytestconfig.getoption("resource_usage")
+    numa_policies = pytestconfig.getoption("numa_policies")
+    limits = resource_limits
+    usages: list[util.ResourceUsage] = []
 
-    actual_output = util.get_actual_output(
-        partdiff_params, partdiff_executable, use_valgrind, cwd
+    check_extra_iterations = (
+        util.PartdiffParamsClass.from_tuple(partdiff_params).term == TermParam.ACC
+        and allow_extra_iterations != 0
     )
-    reference_output = util.get_reference_output(
-        partdiff_params, reference_output_data, reference_source
+
+    cached_result = (
+        None if result_cache is None else result_cache.get_result(partdiff_params)
     )
-    if util.PartdiffParamsClass.from_tuple(partdiff_params).term == TermParam.ACC:
-        if allow_extra_iterations != 0:
+
+    def get_actual_output(reference_output: str | None = None) -> str:
+        if cached_result is not None:
+            return cached_result.output
+        if not stream_output:
+            return util.get_actual_output(
+                partdiff_params,
+                partdiff_executable,
+                use_valgrind,
+                cwd,
+                limits,
+                usages.append,
+            )
+        return util.get_actual_output_streaming(
+            partdiff_params,
+            partdiff_executable,
+            use_valgrind,
+            cwd,
+            (
+                None
+                if reference_output is None
+                else output_parser.parse_partdiff_output(reference_output)
+            ),
+            (
+                OUTPUT_CHECKS_ALLOW_EXTRA_ITER[strictness]
+                if check_extra_iterations
+                else OUTPUT_CHECKS[strictness]
+            ),
+            max_output_size,
+            limits,
+            usages.append,
+        )
+
+    def store_result(passed: bool) -> None:
+        if result_cache is not None and (
+            cached_result is None or cached_result.passed != passed
+        ):
+            result_cache.put_result(
+                partdiff_params, CachedResult(actual_output, passed)
+            )
+
+    def get_reference_output(params: PartdiffParamsTuple) -> str:
+        return util.get_reference_output(
+            params, reference_output_data, reference_source, reference_cache
+        )
+
+    if use_concurrency:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            reference_future = executor.submit(get_reference_output, partdiff_params)
+            actual_output = get_actual_output()
+            reference_output = reference_future.result()
+    elif stream_output or timeout_factor is not None:
+        # The reference output is needed first, so that the output can be checked while it is produced and
+        # the timeout can be scaled by the reference's calculation time:
+        reference_output = get_reference_output(partdiff_params)
+        if timeout_factor is not None:
+            reference_time, _ = util.parse_time_and_memory_from_partdiff_output(
+                reference_output
+            )
+            limits = dataclasses.replace(
+                limits, timeout=limits.timeout + timeout_factor * reference_time
+            )
+        actual_output = get_actual_output(reference_output)
+    else:
+        actual_output = get_actual_output()
+        reference_output = get_reference_output(partdiff_params)
+    if record_timing:
+        # The reference output may be replaced below, so remember its calculation time and iterations now:
+        reference_calculation_time, _ = util.parse_time_and_memory_from_partdiff_output(
+            reference_output
+        )
+        reference_iterations = util.parse_num_iterations_from_partdiff_output(
+            reference_output
+        )
+
+    try:
+        has_extra_iterations = False
+        if check_extra_iterations:
             actual_iterations = util.parse_num_iterations_from_partdiff_output(
                 actual_output
             )
@@ -81,29 +202,149 @@ def test_partdiff_parametrized(
                 assert (
                     actual_iterations <= reference_iterations + allow_extra_iterations
                 )
-            if actual_iterations != reference_iterations:
-                check_partdiff_output(
-                    actual_output,
-                    reference_output,
-                    OUTPUT_MASKS_ALLOW_EXTRA_ITER[strictness],
-                )
-                # Force termination condition "iterations"
-                num, method, lines, func, _term, _acc_iter = partdiff_params
-                partdiff_params = (
-                    num,
-                    method,
-                    lines,
-                    func,
-                    "2",
-                    str(actual_iterations),
-                )
-                reference_output = util.get_reference_output(
-                    partdiff_params, reference_output_data, reference_source
-                )
-                check_partdiff_output(
-                    actual_output,
-                    reference_output,
-                    OUTPUT_MASKS_WITH_EXTRA_ITER[strictness],
-                )
-                return
-    check_partdiff_output(actual_output, reference_output, OUTPUT_MASKS[strictness])
+            has_extra_iterations = actual_iterations != reference_iterations
+        if has_extra_iterations:
+            check_partdiff_output(
+                actual_output,
+                reference_output,
+                OUTPUT_CHECKS_ALLOW_EXTRA_ITER[strictness],
+            )
+            reference_output = get_reference_output(
+                util.params_with_term_iter(partdiff_params, actual_iterations)
+            )
+            check_partdiff_output(
+                actual_output,
+                reference_output,
+                OUTPUT_CHECKS_WITH_EXTRA_ITER[strictness],
+            )
+        else:
+            check_partdiff_output(
+                actual_output, reference_output, OUTPUT_CHECKS[strictness]
+            )
+    except AssertionError:
+        store_result(False)
+        raise
+    store_result(True)
+
+    if numa_policies is not None:
+        record_property(
+            numa.NUMA_PROPERTY,
+            {
+                "test_id": test_id,
+                "calculation_time": {
+                    str(policy): benchmark.run_benchmark(
+                        lambda: util.get_actual_output(
+                            partdiff_params,
+                            numa.command_prefix(policy) + partdiff_executable,
+                            False,
+                            cwd,
+                            limits,
+                        ),
+                        max(1, benchmark_repetitions),
+                        benchmark_warmup,
+                    )["calculation_time"]
+                    for policy in numa_policies
+                },
+            },
+        )
+
+    if record_resource_usage and not usages:
+        # EXECUTABLE wasn't run (e.g. because the result was served from the result cache):
+        warnings.warn(
+            pytest.PytestWarning(
+                f"No resource usage of EXECUTABLE was recorded for {test_id}."
+            )
+        )
+    elif record_resource_usage:
+        reported_memory = None
+        if output_parser.parse_partdiff_output(actual_output).header_lines[1]:
+            _, reported_memory = util.parse_time_and_memory_from_partdiff_output(
+                actual_output
+            )
+        record_property(
+            resource_usage.RESOURCE_USAGE_PROPERTY,
+            {
+                "test_id": test_id,
+                "usage": dataclasses.asdict(usages[0]),
+                "reported_memory": reported_memory,
+                "expected_memory": util.expected_memory_usage(
+                    util.PartdiffParamsClass.from_tuple(partdiff_params)
+                ),
+            },
+        )
+
+    if benchmark_repetitions > 0:
+        record_property(
+            benchmark.BENCHMARK_PROPERTY,
+            benchmark.run_benchmark(
+                lambda: util.get_actual_output(
+                    partdiff_params, partdiff_executable, False, cwd, limits
+                ),
+                benchmark_repetitions,
+                benchmark_warmup,
+            ),
+        )
+    if record_timing:
+        calculation_time, _ = util.parse_time_and_memory_from_partdiff_output(
+            actual_output
+        )
+        timing = {
+            "test_id": test_id,
+            "calculation_time": calculation_time,
+            "reference_calculation_time": reference_calculation_time,
+            "iterations": util.parse_num_iterations_from_partdiff_output(actual_output),
+            "reference_iterations": reference_iterations,
+        }
+        weak_scaling_bases = pytestconfig.stash.get(scaling.WEAK_SCALING_BASES_KEY, {})
+        if test_id in weak_scaling_bases:
+            timing["weak_scaling_base"] = weak_scaling_bases[test_id]
+        record_property(scaling.TIMING_PROPERTY, timing)
+
+
+def test_partdiff_performance(
+    pytestconfig: pytest.Config,
+    record_property: Callable[[str, object], None],
+    resource_limits: util.ResourceLimits,
+    held_cpu_slots: list[int],
+    test_id: str,
+) -> None:
+    """Test if the calculation time of a partdiff implementation regressed compared to a baseline.
+
+    This test is only generated when --save-baseline or --compare-baseline is passed (see `baseline.py`).
+
+    Args:
+        pytestconfig (pytest.Config): See https://docs.pytest.org/en/7.1.x/reference/reference.html#pytestconfig
+        record_property (Callable[[str, object], None]): See https://docs.pytest.org/en/stable/reference/reference.html#record-property
+        resource_limits (util.ResourceLimits): The limits for the runs of EXECUTABLE
+        held_cpu_slots (list[int]): The CPU slots that are held while the test runs
+        test_id (str): The parameters to test as a space-separated string (not a tuple because a str prints better).
+    """
+    partdiff_params = util.params_tuple_from_str(test_id)
+    partdiff_executable = pytestconfig.getoption("executable")
+    cwd = pytestconfig.getoption("cwd")
+    baseline_path = pytestconfig.getoption("compare_baseline")
+    tolerance = pytestconfig.getoption("regression_tolerance")
+
+    samples = benchmark.run_benchmark(
+        lambda: util.get_actual_output(
+            partdiff_params, partdiff_executable, False, cwd, resource_limits
+        ),
+        pytestconfig.getoption("baseline_samples"),
+        pytestconfig.getoption("benchmark_warmup"),
+    )["calculation_time"]
+    record_property(
+        baseline.PERFORMANCE_PROPERTY,
+        {"test_id": test_id, "calculation_time": samples},
+    )
+
+    if baseline_path is None:
+        return
+    baseline_samples = baseline.load_baseline(baseline_path).get(test_id)
+    if baseline_samples is None:
+        pytest.skip(f'No baseline for "{test_id}" in "{baseline_path}".')
+    result = baseline.regression_test(baseline_samples, samples, tolerance)
+    assert not result.regressed, (
+        f"Mean calculation time {result.mean:.6f} s regressed compared to the baseline "
+        f"{result.baseline_mean:.6f} s (threshold with tolerance: {result.threshold:.6f} s, "
+        f"t = {result.t:.2f} > {result.critical_value:.2f})"
+    )
@@ -0,0 +1,18 @@
+"""Unit tests for affinity.py"""
+
+import pytest
+
+import affinity
+
+
+@pytest.mark.parametrize(
+    "value, cpus",
+    [
+        ("0", [0]),
+        ("0-3", [0, 1, 2, 3]),
+        ("0-1,4,6-7\n", [0, 1, 4, 6, 7]),
+        ("", []),
+    ],
+)
+def test_parse_cpu_list(value, cpus):
+    assert affinity.parse_cpu_list(value) == cpus
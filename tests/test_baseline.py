@@ -0,0 +1,43 @@
+"""Unit tests for baseline.py"""
+
+import math
+
+import baseline
+
+
+def test_regression_test_detects_slowdown():
+    result = baseline.regression_test(
+        [1.00, 1.02, 0.98, 1.01, 0.99], [1.50, 1.52, 1.48, 1.51, 1.49], 0.1
+    )
+    assert math.isclose(result.threshold, 1.1)
+    assert result.t > result.critical_value
+    assert result.regressed
+
+
+def test_regression_test_tolerates_slowdown_within_tolerance():
+    result = baseline.regression_test(
+        [1.00, 1.02, 0.98, 1.01, 0.99], [1.05, 1.07, 1.03, 1.06, 1.04], 0.1
+    )
+    assert not result.regressed
+
+
+def test_regression_test_ignores_insignificant_slowdown():
+    # The mean is beyond the threshold, but not significantly given the spread of the samples:
+    result = baseline.regression_test([1.0, 0.5, 1.5], [1.2, 0.7, 1.7], 0.1)
+    assert result.mean > result.threshold
+    assert not result.regressed
+
+
+def test_regression_test_without_spread():
+    result = baseline.regression_test([1.0, 1.0], [1.2, 1.2], 0.1)
+    assert result.t == math.inf
+    assert result.regressed
+    result = baseline.regression_test([1.0], [1.05], 0.1)
+    assert not result.regressed
+
+
+def test_regression_test_single_baseline_sample():
+    result = baseline.regression_test([1.0], [1.50, 1.52, 1.48], 0.1)
+    assert result.regressed
+    result = baseline.regression_test([1.0], [1.0, 1.1, 0.9], 0.1)
+    assert not result.regressed
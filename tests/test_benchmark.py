@@ -0,0 +1,28 @@
+"""Unit tests for benchmark.py"""
+
+import math
+
+import benchmark
+
+
+def test_t_critical_95():
+    assert benchmark.t_critical_95(1) == 12.706
+    assert benchmark.t_critical_95(30) == 2.042
+    assert benchmark.t_critical_95(1000) == benchmark.Z_CRITICAL_95
+
+
+def test_summary_from_samples():
+    summary = benchmark.Summary.from_samples([1.0, 2.0, 3.0, 10.0])
+    assert summary.n == 4
+    assert summary.mean == 4.0
+    assert summary.median == 2.5
+    assert math.isclose(summary.stdev, math.sqrt(50 / 3))
+    half_width = 3.182 * math.sqrt(50 / 3) / 2
+    assert math.isclose(summary.ci_low, 4.0 - half_width)
+    assert math.isclose(summary.ci_high, 4.0 + half_width)
+
+
+def test_summary_from_single_sample():
+    summary = benchmark.Summary.from_samples([1.5])
+    assert (summary.n, summary.mean, summary.median, summary.stdev) == (1, 1.5, 1.5, 0)
+    assert summary.ci_low is None and summary.ci_high is None
@@ -0,0 +1,20 @@
+"""Unit tests for numa.py"""
+
+import pytest
+
+import numa
+
+
+def test_numa_policy_list():
+    assert numa.numa_policy_list("all") == list(numa.NumaPolicy)
+    assert numa.numa_policy_list("local,interleave") == [
+        numa.NumaPolicy.LOCAL,
+        numa.NumaPolicy.INTERLEAVE,
+    ]
+    with pytest.raises(ValueError):
+        numa.numa_policy_list("local,remote")
+
+
+def test_command_prefix():
+    assert numa.command_prefix(numa.NumaPolicy.DEFAULT) == []
+    assert numa.command_prefix(numa.NumaPolicy.INTERLEAVE)[0] == "numactl"
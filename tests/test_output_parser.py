@@ -0,0 +1,206 @@
+"""Unit tests for output_parser.py
+
+The expected results are those of the regex output masks that the parser replaced, except for the documented
+behavior changes (see test_behavior_changes_compared_to_the_masks()).
+"""
+
+from pathlib import Path
+
+import pytest
+
+import output_parser
+from test_partdiff import check_partdiff_output
+
+REFERENCE_OUTPUT = (
+    Path(__file__).parent.parent / "reference_output" / "partdiff_1_2_1_2_2_10.txt"
+).read_text()
+
+FIRST_ROW_END = REFERENCE_OUTPUT.index("\n", REFERENCE_OUTPUT.index("Matrix:") + 8)
+
+
+def passed_levels(
+    actual_output: str, checks: tuple[output_parser.OutputCheck, ...]
+) -> str:
+    """Get the strictness levels at which an output passes as a string like "PPP.." (P == passed)."""
+    result = ""
+    for check in checks:
+        try:
+            check_partdiff_output(actual_output, REFERENCE_OUTPUT, check)
+            result += "P"
+        except AssertionError:
+            result += "."
+    return result
+
+
+# The output, the levels at which it passed the masks, and the levels at which it passed the masks with
+# --allow-extra-iterations:
+EQUIVALENCE_CASES = {
+    "identical": (REFERENCE_OUTPUT, "PPPPP", "PPPPP"),
+    "trailing newline": (REFERENCE_OUTPUT + "\n", ".....", "PPP.."),
+    "extra trailing blank lines": (REFERENCE_OUTPUT + "\n\n\n", ".....", "PPP.."),
+    "trailing text": (REFERENCE_OUTPUT + "\ndone\n", ".....", "PPP.."),
+    "trailing space after a free-form value": (
+        REFERENCE_OUTPUT.replace("Jacobi\n", "Jacobi \n"),
+        "PPP..",
+        "PPP..",
+    ),
+    "trailing space after a number": (
+        REFERENCE_OUTPUT.replace("1\nPerturbation", "1 \nPerturbation"),
+        "PPPPP",
+        "PPPPP",
+    ),
+    "different whitespace after a label": (
+        REFERENCE_OUTPUT.replace("Interlines:             1", "Interlines: 1"),
+        "PPPP.",
+        "PPPP.",
+    ),
+    "different method": (
+        REFERENCE_OUTPUT.replace("Jacobi", "Gauss-Seidel"),
+        "PPP..",
+        "PPP..",
+    ),
+    "different label": (
+        REFERENCE_OUTPUT.replace("Interlines:", "Zwischenzeilen:"),
+        "PP...",
+        "PP...",
+    ),
+    "different iterations": (
+        REFERENCE_OUTPUT.replace("iterations:   10", "iterations:   11"),
+        "PP...",
+        "PPPPP",
+    ),
+    "no blank line in front of the matrix label": (
+        REFERENCE_OUTPUT.replace("\n\nMatrix:", "\nMatrix:"),
+        "PPPPP",
+        "PPPPP",
+    ),
+    "two blank lines in front of the matrix label": (
+        REFERENCE_OUTPUT.replace("\n\nMatrix:", "\n\n\nMatrix:"),
+        "PPPPP",
+        "PPPPP",
+    ),
+    "indented matrix label": (
+        REFERENCE_OUTPUT.replace("\nMatrix:", "\n  Matrix:"),
+        "PPPP.",
+        "PPPP.",
+    ),
+    "text in front of the matrix label": (
+        REFERENCE_OUTPUT.replace("\n\nMatrix:", "\n\nfoo bar\nMatrix:"),
+        "PPP..",
+        "PPP..",
+    ),
+    "no matrix label": (REFERENCE_OUTPUT.replace("Matrix:", ""), "P....", "P...."),
+    "leading text": ("Hello\n" + REFERENCE_OUTPUT, "PP...", "PP..."),
+    "missing header line": (
+        REFERENCE_OUTPUT.replace("Interlines:             1\n", ""),
+        "PP...",
+        "PP...",
+    ),
+    "blank line after a free-form value": (
+        REFERENCE_OUTPUT.replace("Jacobi\n", "Jacobi\n\n"),
+        "PPP..",
+        "PPP..",
+    ),
+    "blank line after a number": (
+        REFERENCE_OUTPUT.replace("1\nPerturbation", "1\n\nPerturbation"),
+        "PPPPP",
+        "PPPPP",
+    ),
+    "CRLF line endings": (
+        REFERENCE_OUTPUT.replace("\n", "\r\n"),
+        ".....",
+        "PPP..",
+    ),
+}
+
+# Outputs whose matrix differs from the reference output. They failed the masks at all levels, and at levels 3
+# and 4 with --allow-extra-iterations.
+MATRIX_CASES = {
+    "tab between values": REFERENCE_OUTPUT.replace(
+        "0.0259 0.0479", "0.0259\t0.0479", 1
+    ),
+    "double space between values": REFERENCE_OUTPUT.replace(
+        "0.0259 0.0479", "0.0259  0.0479", 1
+    ),
+    "trailing spaces on a row": (
+        REFERENCE_OUTPUT[:FIRST_ROW_END] + "  " + REFERENCE_OUTPUT[FIRST_ROW_END:]
+    ),
+    "blank line inside the matrix": (
+        REFERENCE_OUTPUT[:FIRST_ROW_END] + "\n" + REFERENCE_OUTPUT[FIRST_ROW_END:]
+    ),
+    "rows without indentation": REFERENCE_OUTPUT.replace("\n 0.", "\n0."),
+    "space after the matrix label": REFERENCE_OUTPUT.replace("Matrix:", "Matrix: "),
+    "different value": REFERENCE_OUTPUT.replace("0.1769", "0.1770"),
+}
+
+
+@pytest.mark.parametrize(
+    "actual_output, expected, expected_allow_extra_iter",
+    EQUIVALENCE_CASES.values(),
+    ids=EQUIVALENCE_CASES.keys(),
+)
+def test_equivalence_to_the_masks(actual_output, expected, expected_allow_extra_iter):
+    assert passed_levels(actual_output, output_parser.OUTPUT_CHECKS) == expected
+    assert (
+        passed_levels(actual_output, output_parser.OUTPUT_CHECKS_ALLOW_EXTRA_ITER)
+        == expected_allow_extra_iter
+    )
+
+
+@pytest.mark.parametrize(
+    "actual_output", MATRIX_CASES.values(), ids=MATRIX_CASES.keys()
+)
+def test_matrix_differences(actual_output):
+    # The first case is the only one where a differing matrix passes the masks at any level:
+    expected = "P...." if "Matrix: " in actual_output else "....."
+    assert passed_levels(actual_output, output_parser.OUTPUT_CHECKS) == expected
+    assert (
+        passed_levels(actual_output, output_parser.OUTPUT_CHECKS_WITH_EXTRA_ITER)
+        == expected
+    )
+
+
+def test_behavior_changes_compared_to_the_masks():
+    # With --allow-extra-iterations, the matrix isn't compared against the reference output with fewer iterations
+    # at levels 3 and 4 (it is compared against the one with the same number of iterations instead):
+    for actual_output in MATRIX_CASES.values():
+        assert (
+            passed_levels(actual_output, output_parser.OUTPUT_CHECKS_ALLOW_EXTRA_ITER)
+            == "PPPPP"
+        )
+    # Level 1 compares the full residuum (the mask only captured its last character):
+    actual_output = REFERENCE_OUTPUT.replace("1.618808e-02", "1.618808e-12")
+    assert passed_levels(actual_output, output_parser.OUTPUT_CHECKS) == "P...."
+    # For the same reason, the mask captured the "e" of "values" as the residuum at level 1:
+    actual_output = REFERENCE_OUTPUT.replace("Matrix:", "Matrix values:")
+    assert passed_levels(actual_output, output_parser.OUTPUT_CHECKS) == "PPP.."
+
+
+def test_parse_partdiff_output():
+    parsed = output_parser.parse_partdiff_output(REFERENCE_OUTPUT)
+    assert parsed.get("method") == "Jacobi"
+    assert parsed.get("interlines") == "1"
+    assert parsed.iterations == "10"
+    assert parsed.residuum == "1.618808e-02"
+    assert parsed.matrix_label == "Matrix"
+    assert parsed.matrix_gap == "\n"
+    assert parsed.matrix[4][4] == "0.1769"
+    assert parsed.matrix_text.startswith("\n 0.0000")
+    assert parsed.matrix_body.startswith("0.0000")
+    assert parsed.matrix_trailing_whitespace == parsed.trailer == "\n"
+
+
+def test_check_header_line():
+    reference = output_parser.parse_partdiff_output(REFERENCE_OUTPUT)
+    check = output_parser.OUTPUT_CHECKS[3]
+    line = "Calculation method:     Jacobi"
+    assert output_parser.check_header_line(2, line, reference, check) is None
+    assert output_parser.check_header_line(2, line + " ", reference, check) == (
+        "method is 'Jacobi ', expected 'Jacobi'"
+    )
+    assert (
+        output_parser.check_header_line(
+            2, line + " ", reference, output_parser.OUTPUT_CHECKS[2]
+        )
+        is None
+    )
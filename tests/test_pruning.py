@@ -0,0 +1,34 @@
+"""Unit tests for pruning.py"""
+
+import pruning
+import util
+
+
+def test_order_cheapest_first():
+    test_cases = [
+        util.params_tuple_from_str(test_id)
+        for test_id in ["1 1 100 2 2 50", "1 1 10 2 2 5", "1 1 100 2 2 5"]
+    ]
+    assert [" ".join(t) for t in pruning.order_cheapest_first(test_cases)] == [
+        "1 1 10 2 2 5",
+        "1 1 100 2 2 5",
+        "1 1 100 2 2 50",
+    ]
+
+
+def test_dominating_failure(tmp_path):
+    registry = pruning.FailureRegistry(tmp_path)
+    assert registry.dominating_failure("1 1 100 2 2 50") is None
+    registry.record_failure("1 1 100 2 2 5")
+    registry.record_failure("1 1 10 2 2 5")
+    # The cheapest cheaper failure of the same family dominates:
+    assert registry.dominating_failure("1 1 100 2 2 50") == "1 1 10 2 2 5"
+    assert registry.dominating_failure("1 1 100 2 2 5") == "1 1 10 2 2 5"
+    # A failure never dominates itself or cheaper test cases:
+    assert registry.dominating_failure("1 1 10 2 2 5") is None
+    assert registry.dominating_failure("1 1 5 2 2 5") is None
+    # Other families are unaffected:
+    assert registry.dominating_failure("2 1 100 2 2 50") is None
+    assert registry.dominating_failure("1 2 100 2 2 50") is None
+    assert registry.dominating_failure("1 1 100 1 2 50") is None
+    assert registry.dominating_failure("1 1 100 2 1 1e-4") is None
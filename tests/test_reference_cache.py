@@ -0,0 +1,92 @@
+"""Unit tests for reference_cache.py"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import reference_cache
+
+
+class StaticCache(reference_cache.PersistentCache):
+    def _key_prefix(self) -> list[str]:
+        return ["static"]
+
+
+def test_persistent_cache_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        reference_cache.PersistentCache(tmp_path, 1024)
+
+
+def test_get_or_compute(tmp_path):
+    cache = StaticCache(tmp_path, 1024)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "output"
+
+    assert cache.get_or_compute(("1", "1", "0", "1", "2", "1"), compute) == "output"
+    assert cache.get_or_compute(("1", "1", "0", "1", "2", "1"), compute) == "output"
+    assert len(calls) == 1
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = StaticCache(tmp_path, 25)
+    cache.put(("a",), "x" * 10)
+    cache.put(("b",), "x" * 10)
+    # Make "a" older than "b", then use it again:
+    os.utime(cache._entry_path(("a",)), (0, 0))
+    assert cache.get(("a",)) is not None
+    os.utime(cache._entry_path(("b",)), (1, 1))
+    cache.put(("c",), "x" * 10)
+    assert cache.get(("a",)) is not None
+    assert cache.get(("b",)) is None
+    assert cache.get(("c",)) is not None
+
+
+def test_oversized_entry_is_kept(tmp_path):
+    cache = StaticCache(tmp_path, 25)
+    cache.put(("a",), "x" * 10)
+    assert cache.get_or_compute(("b",), lambda: "x" * 30) == "x" * 30
+    assert cache.get(("a",)) is None
+    assert cache.get(("b",)) is not None
+
+
+def test_lock_files_are_removed(tmp_path):
+    cache = StaticCache(tmp_path, 1 << 20)
+    for i in range(10):
+        cache.get_or_compute((str(i),), lambda: "output")
+    assert not list(cache.lock_directory.iterdir())
+
+
+def test_lock_file_is_kept_on_failure(tmp_path):
+    cache = StaticCache(tmp_path, 1 << 20)
+
+    def compute():
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(("a",), compute)
+    assert cache.get(("a",)) is None
+    assert cache.get_or_compute(("a",), lambda: "output") == "output"
+    assert not list(cache.lock_directory.iterdir())
+
+
+def test_concurrent_get_or_compute(tmp_path):
+    cache = StaticCache(tmp_path, 1 << 20)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "output"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outputs = list(
+            executor.map(lambda _: cache.get_or_compute(("a",), compute), range(8))
+        )
+    assert outputs == ["output"] * 8
+    assert len(calls) == 1
+    assert not list(cache.lock_directory.iterdir())
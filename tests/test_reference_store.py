@@ -0,0 +1,65 @@
+"""Unit tests for reference_store.py"""
+
+import pytest
+
+import reference_store
+import util
+
+REFERENCE_OUTPUT_DATA = {
+    util.params_tuple_from_str("1 1 0 1 2 1"): "first output\n",
+    util.params_tuple_from_str("1 2 10 2 1 1e-4"): "second output ä\n" * 100,
+    util.params_tuple_from_str("12 1 100 2 2 5"): "",
+}
+
+
+@pytest.mark.parametrize("compression", list(reference_store.Compression))
+def test_round_trip(tmp_path, compression):
+    path = tmp_path / "reference_output.pack"
+    reference_store.write_reference_store(
+        path, REFERENCE_OUTPUT_DATA.items(), compression
+    )
+    store = reference_store.PackedReferenceStore(path)
+    assert store.compression == compression
+    assert len(store) == len(REFERENCE_OUTPUT_DATA)
+    assert set(store) == set(REFERENCE_OUTPUT_DATA)
+    assert dict(store.items()) == REFERENCE_OUTPUT_DATA
+    assert util.params_tuple_from_str("1 1 0 1 2 2") not in store
+    with pytest.raises(KeyError):
+        store[util.params_tuple_from_str("1 1 0 1 2 2")]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_format(tmp_path):
+    path = tmp_path / "reference_output.pack"
+    reference_store.write_reference_store(
+        path, REFERENCE_OUTPUT_DATA.items(), reference_store.Compression.NONE
+    )
+    data = path.read_bytes()
+    assert data.startswith(reference_store.PACKED_STORE_MAGIC)
+    # The uncompressed outputs are stored in the order of their params:
+    assert data.endswith(
+        "".join(
+            output for _params, output in sorted(REFERENCE_OUTPUT_DATA.items())
+        ).encode("utf-8")
+    )
+
+
+def test_compression_shrinks_store(tmp_path):
+    sizes = {}
+    for compression in reference_store.Compression:
+        path = tmp_path / f"{compression}.pack"
+        reference_store.write_reference_store(
+            path, REFERENCE_OUTPUT_DATA.items(), compression
+        )
+        sizes[compression] = path.stat().st_size
+    assert (
+        sizes[reference_store.Compression.ZLIB]
+        < sizes[reference_store.Compression.NONE]
+    )
+
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / "reference_output.pack"
+    path.write_bytes(b"not a packed reference store")
+    with pytest.raises(ValueError):
+        reference_store.PackedReferenceStore(path)
@@ -0,0 +1,28 @@
+"""Unit tests for scaling.py"""
+
+import math
+
+import pytest
+
+import scaling
+
+
+def amdahl_speedup(f: float, p: int) -> float:
+    return 1 / (f + (1 - f) / p)
+
+
+@pytest.mark.parametrize("f", [0.0, 0.05, 0.5, 1.0])
+def test_fit_amdahl_serial_fraction_exact(f):
+    points = [(p, amdahl_speedup(f, p)) for p in (1, 2, 4, 8)]
+    assert math.isclose(scaling.fit_amdahl_serial_fraction(points), f, abs_tol=1e-12)
+
+
+def test_fit_amdahl_serial_fraction_noisy():
+    points = [(2, amdahl_speedup(0.1, 2) * 1.02), (4, amdahl_speedup(0.1, 4) * 0.98)]
+    assert scaling.fit_amdahl_serial_fraction(points) == pytest.approx(0.1, abs=0.02)
+
+
+def test_fit_amdahl_serial_fraction_without_parallel_points():
+    assert scaling.fit_amdahl_serial_fraction([]) is None
+    assert scaling.fit_amdahl_serial_fraction([(1, 1.0)]) is None
+    assert scaling.fit_amdahl_serial_fraction([(1, 1.0), (2, 0.0)]) is None
@@ -0,0 +1,61 @@
+"""Unit tests for scheduling.py"""
+
+import util
+import scheduling
+
+TEST_CASES = [
+    util.params_tuple_from_str(test_id)
+    for test_id in [
+        "1 1 100 2 2 50",
+        "1 1 10 2 2 5",
+        "2 1 10 2 2 5",
+        "1 2 10 2 2 5",
+    ]
+]
+
+
+def test_history_smoothing(tmp_path):
+    history = scheduling.RuntimeHistory(tmp_path / "history.json")
+    history.record("1 1 10 2 2 5", 2.0)
+    history.record("1 1 10 2 2 5", 4.0)
+    history.save()
+    assert (
+        scheduling.RuntimeHistory(tmp_path / "history.json").get("1 1 10 2 2 5") == 3.0
+    )
+
+
+def test_unreadable_history(tmp_path):
+    (tmp_path / "history.json").write_text("{")
+    assert scheduling.RuntimeHistory(tmp_path / "history.json").runtimes == {}
+
+
+def test_order_longest_first(tmp_path):
+    history = scheduling.RuntimeHistory(tmp_path / "history.json")
+    # Without history, the estimates decide:
+    ordered = scheduling.order_longest_first(TEST_CASES, history)
+    assert " ".join(ordered[0]) == "1 1 100 2 2 50"
+    # The recorded wall times take precedence over the estimates:
+    for i, test_case in enumerate(TEST_CASES):
+        history.record(" ".join(test_case), float(i))
+    ordered = scheduling.order_longest_first(TEST_CASES, history)
+    assert ordered == TEST_CASES[::-1]
+
+
+def test_select_within_budget_covers_all_values(tmp_path):
+    history = scheduling.RuntimeHistory(tmp_path / "history.json")
+    selected, missing = scheduling.select_within_budget(TEST_CASES, history, 1e6)
+    assert missing == []
+    for dimension in range(6):
+        assert {t[dimension] for t in selected} == {t[dimension] for t in TEST_CASES}
+    # The selected test cases keep their order:
+    assert selected == [t for t in TEST_CASES if t in selected]
+
+
+def test_select_within_budget_reports_missing_values(tmp_path):
+    history = scheduling.RuntimeHistory(tmp_path / "history.json")
+    for test_case in TEST_CASES:
+        history.record(" ".join(test_case), 1.0)
+    history.record("1 1 100 2 2 50", 10.0)
+    selected, missing = scheduling.select_within_budget(TEST_CASES, history, 3.0)
+    assert util.params_tuple_from_str("1 1 100 2 2 50") not in selected
+    assert missing == ["lines=100", "acc/iter=50"]
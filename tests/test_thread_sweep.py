@@ -0,0 +1,49 @@
+"""Unit tests for thread_sweep.py"""
+
+import pytest
+
+import affinity
+import thread_sweep
+
+
+def test_linear_sweep():
+    assert thread_sweep.linear_sweep(1) == [1]
+    assert thread_sweep.linear_sweep(8) == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert thread_sweep.linear_sweep(20) == [1, 3, 6, 9, 12, 15, 18, 20]
+
+
+def test_geometric_sweep():
+    assert thread_sweep.geometric_sweep(1) == [1]
+    assert thread_sweep.geometric_sweep(8) == [1, 2, 4, 8]
+    assert thread_sweep.geometric_sweep(12) == [1, 2, 4, 8, 12]
+
+
+def test_parse_auto(monkeypatch):
+    monkeypatch.setattr(affinity, "usable_cpu_count", lambda: 6)
+    sweep = thread_sweep.parse_auto("auto")
+    assert sweep == [1, 2, 3, 4, 5, 6] and not sweep.adaptive
+    sweep = thread_sweep.parse_auto("auto:geom:adaptive")
+    assert sweep == [1, 2, 4, 6] and sweep.adaptive
+
+
+@pytest.mark.parametrize(
+    "value", ["", "auto:", "geom", "auto:linear", "auto:geom:geom", "1:geom"]
+)
+def test_parse_auto_invalid(value):
+    with pytest.raises(ValueError):
+        thread_sweep.parse_auto(value)
+
+
+def test_plateau(tmp_path):
+    registry = thread_sweep.SpeedupRegistry(tmp_path)
+    assert registry.plateau("8 1 100 2 2 5") is None
+    registry.record("1 1 100 2 2 5", 1.0)
+    registry.record("2 1 100 2 2 5", 0.6)
+    # A single step scaled well:
+    assert registry.plateau("4 1 100 2 2 5") is None
+    registry.record("4 1 100 2 2 5", 0.58)
+    # The step from 2 to 4 threads only achieved a speedup of 1.03:
+    assert "num=2 to num=4" in registry.plateau("8 1 100 2 2 5")
+    # Smaller thread counts and other configurations are unaffected:
+    assert registry.plateau("3 1 100 2 2 5") is None
+    assert registry.plateau("8 2 100 2 2 5") is None
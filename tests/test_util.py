@@ -0,0 +1,87 @@
+"""Unit tests for util.py"""
+
+import signal
+
+import pytest
+
+import util
+
+
+@pytest.mark.parametrize(
+    "test_id",
+    [
+        "1 1 1000 2 1 1e-4",
+        "1 2 100 2 1 1e-4",
+        "1 1 10 1 1 1e-8",
+        "1 2 10 2 1 1e-8",
+        "1 1 1000 1 2 1",
+        "1 2 100 2 2 100",
+    ],
+)
+def test_estimate_runtime_matches_reference_runs(test_id):
+    partdiff_params = util.params_tuple_from_str(test_id)
+    run = util.get_reference_runs()[partdiff_params]
+    estimate = util.estimate_runtime(
+        util.PartdiffParamsClass.from_tuple(partdiff_params)
+    )
+    # The estimate includes the startup of the process, the calculation time of partdiff doesn't:
+    measured = run.calculation_time + util.ESTIMATE_SECONDS_OVERHEAD
+    assert measured / 3 <= estimate <= measured * 3
+
+
+def test_estimate_iterations_uses_nearest_reference_run():
+    # Not cached, but the reference implementation stops after 1 iteration for 100 and 1000 interlines:
+    partdiff_params = util.PartdiffParamsClass.from_tuple(
+        util.params_tuple_from_str("1 1 500 2 1 1e-4")
+    )
+    assert util.estimate_iterations(partdiff_params) == 1
+
+
+def test_estimate_iterations_term_iter():
+    partdiff_params = util.PartdiffParamsClass.from_tuple(
+        util.params_tuple_from_str("1 2 10 1 2 1234")
+    )
+    assert util.estimate_iterations(partdiff_params) == 1234
+
+
+def test_weak_scaling_lines():
+    assert util.weak_scaling_lines(100, 1) == 100
+    assert util.weak_scaling_lines(100, 4) == 201
+
+
+def test_describe_exceeded_requires_evidence():
+    limits = util.ResourceLimits(max_memory=100 * 1024 * 1024)
+    assert limits.describe_exceeded(2, "bad argument\n") is None
+    assert limits.describe_exceeded(-signal.SIGSEGV, "") is not None
+    assert limits.describe_exceeded(1, "Memory error! (123 Bytes requested)\n")
+    assert limits.describe_exceeded(-signal.SIGABRT, "std::bad_alloc\n")
+
+
+def test_describe_exceeded_cpu_time():
+    limits = util.ResourceLimits(max_cpu_time=1)
+    assert "CPU time" in limits.describe_exceeded(-signal.SIGXCPU, "")
+    assert limits.describe_exceeded(-signal.SIGSEGV, "") is None
+
+
+def test_run_executable_splits_lines():
+    lines = []
+    output = util.run_executable(
+        ["printf", "a\\nbb\\n\\nc"],
+        None,
+        util.ResourceLimits(),
+        lambda index, line: lines.append((index, line)),
+    )
+    assert output == "a\nbb\n\nc"
+    assert lines == [(0, b"a\n"), (1, b"bb\n"), (2, b"\n"), (3, b"c")]
+
+
+def test_run_executable_limits_output_without_newlines():
+    # `yes` never stops, so this only returns if the size is checked before a newline arrives:
+    with pytest.raises(util.EarlyAbortError):
+        util.run_executable(
+            ["sh", "-c", "yes | tr -d '\\n'"],
+            None,
+            util.ResourceLimits(),
+            lambda index, line: None,
+            max_output_size=1 << 20,
+        )
@@ -0,0 +1,152 @@
+"""Unit tests for valgrind.py"""
+
+import pytest
+
+import valgrind
+
+LOG_HEADER = """\
+==4242== Memcheck, a memory error detector
+==4242== Copyright (C) 2002-2022, and GNU GPL'd, by Julian Seward et al.
+==4242== Using Valgrind-3.19.0 and LibVEX; rerun with -h for copyright info
+==4242== Command: ./partdiff 4 2 100 2 2 50
+==4242== Parent PID: 4241
+==4242==
+"""
+
+# A clean run of an OpenMP build: the thread stacks are possibly lost, which isn't an error with
+# --errors-for-leak-kinds=definite.
+LOG_POSSIBLY_LOST = LOG_HEADER + """\
+==4242==
+==4242== HEAP SUMMARY:
+==4242==     in use at exit: 3,416 bytes in 8 blocks
+==4242==   total heap usage: 21 allocs, 13 frees, 1,709,736 bytes allocated
+==4242==
+==4242== 864 bytes in 3 blocks are possibly lost in loss record 3 of 4
+==4242==    at 0x484DA83: calloc (in /usr/libexec/valgrind/vgpreload_memcheck-amd64-linux.so)
+==4242==    by 0x40147D9: calloc (rtld-malloc.h:44)
+==4242==    by 0x40147D9: allocate_dtv (dl-tls.c:375)
+==4242==    by 0x40147D9: _dl_allocate_tls (dl-tls.c:634)
+==4242==    by 0x4B1E834: allocate_stack (allocatestack.c:430)
+==4242==    by 0x4B1E834: pthread_create@@GLIBC_2.34 (pthread_create.c:647)
+==4242==    by 0x48F1DEA: ??? (in /usr/lib/x86_64-linux-gnu/libgomp.so.1.0.0)
+==4242==    by 0x48E8A15: GOMP_parallel (in /usr/lib/x86_64-linux-gnu/libgomp.so.1.0.0)
+==4242==    by 0x10A2D1: calculate (partdiff.c:246)
+==4242==    by 0x1098C4: main (partdiff.c:493)
+==4242==
+==4242== LEAK SUMMARY:
+==4242==    definitely lost: 0 bytes in 0 blocks
+==4242==    indirectly lost: 0 bytes in 0 blocks
+==4242==      possibly lost: 864 bytes in 3 blocks
+==4242==    still reachable: 2,552 bytes in 5 blocks
+==4242==         suppressed: 0 bytes in 0 blocks
+==4242== Reachable blocks (those to which a pointer was found) are not shown.
+==4242== To see them, rerun with: --leak-check=full --show-leak-kinds=all
+==4242==
+==4242== For lists of detected and suppressed errors, rerun with: -s
+==4242== ERROR SUMMARY: 0 errors from 0 contexts (suppressed: 0 from 0)
+"""
+
+LOG_NO_LEAKS = LOG_HEADER + """\
+==4242==
+==4242== HEAP SUMMARY:
+==4242==     in use at exit: 0 bytes in 0 blocks
+==4242==   total heap usage: 6 allocs, 6 frees, 1,704,512 bytes allocated
+==4242==
+==4242== All heap blocks were freed -- no leaks are possible
+==4242==
+==4242== For lists of detected and suppressed errors, rerun with: -s
+==4242== ERROR SUMMARY: 0 errors from 0 contexts (suppressed: 0 from 0)
+"""
+
+LOG_ERRORS = LOG_HEADER + """\
+==4242== Invalid write of size 8
+==4242==    at 0x109A3B: initMatrices (partdiff.c:175)
+==4242==    by 0x10A1F2: main (partdiff.c:489)
+==4242==  Address 0x4a8f0c8 is 0 bytes after a block of size 72 alloc'd
+==4242==    at 0x48487A9: malloc (in /usr/libexec/valgrind/vgpreload_memcheck-amd64-linux.so)
+==4242==    by 0x1096C5: allocateMemory (partdiff.c:120)
+==4242==    by 0x10A1E3: main (partdiff.c:488)
+==4242==
+==4242== Invalid read of size 8
+==4242==    at 0x10A0B1: calculate (partdiff.c:260)
+==4242==    by 0x10A21C: main (partdiff.c:493)
+==4242==  Address 0x4a8f0c8 is 0 bytes after a block of size 72 alloc'd
+==4242==    at 0x48487A9: malloc (in /usr/libexec/valgrind/vgpreload_memcheck-amd64-linux.so)
+==4242==    by 0x1096C5: allocateMemory (partdiff.c:120)
+==4242==    by 0x10A1E3: main (partdiff.c:488)
+==4242==
+==4242== Invalid read of size 8
+==4242==    at 0x10A0C5: calculate (partdiff.c:261)
+==4242==    by 0x10A21C: main (partdiff.c:493)
+==4242==  Address 0x4a8f0d0 is 8 bytes after a block of size 72 alloc'd
+==4242==    at 0x48487A9: malloc (in /usr/libexec/valgrind/vgpreload_memcheck-amd64-linux.so)
+==4242==    by 0x1096C5: allocateMemory (partdiff.c:120)
+==4242==    by 0x10A1E3: main (partdiff.c:488)
+==4242==
+==4242==
+==4242== HEAP SUMMARY:
+==4242==     in use at exit: 1,704 bytes in 2 blocks
+==4242==   total heap usage: 6 allocs, 4 frees, 1,704,512 bytes allocated
+==4242==
+==4242== 1,704 bytes in 2 blocks are definitely lost in loss record 1 of 1
+==4242==    at 0x48487A9: malloc (in /usr/libexec/valgrind/vgpreload_memcheck-amd64-linux.so)
+==4242==    by 0x1096C5: allocateMemory (partdiff.c:120)
+==4242==    by 0x10A1E3: main (partdiff.c:488)
+==4242==
+==4242== LEAK SUMMARY:
+==4242==    definitely lost: 1,704 bytes in 2 blocks
+==4242==    indirectly lost: 0 bytes in 0 blocks
+==4242==      possibly lost: 0 bytes in 0 blocks
+==4242==    still reachable: 0 bytes in 0 blocks
+==4242==         suppressed: 0 bytes in 0 blocks
+==4242==
+==4242== For lists of detected and suppressed errors, rerun with: -s
+==4242== ERROR SUMMARY: 4 errors from 4 contexts (suppressed: 0 from 0)
+"""
+
+
+def test_possibly_lost_thread_stacks_are_clean():
+    assert "--errors-for-leak-kinds=definite" in valgrind.VALGRIND_COMMAND
+    report = valgrind.parse_valgrind_log(LOG_POSSIBLY_LOST)
+    assert report.errors == 0
+    assert report.definitely_lost_bytes == 0
+    assert report.clean
+
+
+def test_no_leaks():
+    report = valgrind.parse_valgrind_log(LOG_NO_LEAKS)
+    assert report.clean
+
+
+def test_errors_and_definitely_lost():
+    report = valgrind.parse_valgrind_log(LOG_ERRORS)
+    assert report.errors == 4
+    assert report.invalid_reads == 2
+    assert report.invalid_writes == 1
+    assert report.definitely_lost_bytes == 1704
+    assert not report.clean
+    assert report.describe() == (
+        "valgrind found 4 error(s): 2 invalid read(s), 1 invalid write(s), 1704 byte(s) definitely lost"
+    )
+
+
+def test_no_error_summary():
+    with pytest.raises(ValueError):
+        valgrind.parse_valgrind_log(LOG_HEADER)
+
+
+def test_check_valgrind_log(tmp_path):
+    log_path = tmp_path / "valgrind.log"
+    # No log at all (e.g. valgrind didn't start):
+    valgrind.check_valgrind_log(log_path)
+    log_path.write_text(LOG_POSSIBLY_LOST)
+    valgrind.check_valgrind_log(log_path)
+    log_path.write_text(LOG_ERRORS)
+    with pytest.raises(valgrind.ValgrindError) as excinfo:
+        valgrind.check_valgrind_log(log_path)
+    assert excinfo.value.report.log == LOG_ERRORS
+    # A killed valgrind doesn't write an error summary:
+    log_path.write_text(LOG_HEADER)
+    valgrind.check_valgrind_log(log_path, require_summary=False)
+    with pytest.raises(ValueError):
+        valgrind.check_valgrind_log(log_path)
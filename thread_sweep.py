@@ -0,0 +1,160 @@
+"""Automatic thread counts (see --num-threads=auto).
+
+`auto` expands to a sweep up to the number of CPUs that the tester may use (see affinity.usable_cpu_count(),
+which respects the affinity mask and the CPU limit of the cgroup): every count if there are at most
+`MAX_LINEAR_SWEEP_LENGTH` CPUs, otherwise evenly spaced counts. `auto:geom` expands to the powers of 2 instead
+(plus the number of CPUs itself).
+
+With `:adaptive` (e.g. `auto:geom:adaptive`), the larger thread counts of a configuration are skipped once its
+speedup plateaus: the calculation time of each test is recorded in a directory that is shared by all workers of a
+session, and a test is skipped if the last step between two measured thread counts a < b of its configuration
+only achieved a small fraction of the ideal speedup b / a (see PLATEAU_STEP_EFFICIENCY).
+"""
+
+import math
+import os
+import tempfile
+from pathlib import Path
+
+import affinity
+import util
+
+MAX_LINEAR_SWEEP_LENGTH = 8
+
+# A step from a to b threads plateaus if (t_a / t_b - 1) / (b / a - 1) is below this value:
+PLATEAU_STEP_EFFICIENCY = 0.1
+
+PLATEAU_PROPERTY = "speedup_plateau"
+
+
+class ThreadSweep(list[int]):
+    """The thread counts of --num-threads=auto"""
+
+    def __init__(self, counts: list[int], adaptive: bool):
+        """Create a ThreadSweep.
+
+        Args:
+            counts (list[int]): The thread counts.
+            adaptive (bool): Whether larger thread counts are skipped once the speedup plateaus.
+        """
+        super().__init__(counts)
+        self.adaptive = adaptive
+
+
+def linear_sweep(num_cpus: int) -> list[int]:
+    """Get evenly spaced thread counts up to a number of CPUs.
+
+    Args:
+        num_cpus (int): The number of CPUs.
+
+    Returns:
+        list[int]: 1, then multiples of a step, and `num_cpus`.
+    """
+    if num_cpus <= MAX_LINEAR_SWEEP_LENGTH:
+        return list(range(1, num_cpus + 1))
+    step = math.ceil(num_cpus / MAX_LINEAR_SWEEP_LENGTH)
+    return sorted({1, *range(step, num_cpus + 1, step), num_cpus})
+
+
+def geometric_sweep(num_cpus: int) -> list[int]:
+    """Get the powers of 2 up to a number of CPUs.
+
+    Args:
+        num_cpus (int): The number of CPUs.
+
+    Returns:
+        list[int]: The powers of 2 below `num_cpus`, and `num_cpus`.
+    """
+    return sorted(
+        {*(2**i for i in range(num_cpus.bit_length()) if 2**i < num_cpus), num_cpus}
+    )
+
+
+def parse_auto(value: str) -> ThreadSweep:
+    """Parse `auto[:geom][:adaptive]`.
+
+    Args:
+        value (str): The str to parse.
+
+    Raises:
+        ValueError: When the value has unknown or duplicate modifiers.
+
+    Returns:
+        ThreadSweep: The thread counts for this machine.
+    """
+    mode, *modifiers = value.split(":")
+    if (
+        mode != "auto"
+        or not set(modifiers) <= {"geom", "adaptive"}
+        or len(set(modifiers)) != len(modifiers)
+    ):
+        raise ValueError(f'Unable to parse thread sweep "{value}"')
+    num_cpus = affinity.usable_cpu_count()
+    counts = (
+        geometric_sweep(num_cpus) if "geom" in modifiers else linear_sweep(num_cpus)
+    )
+    return ThreadSweep(counts, "adaptive" in modifiers)
+
+
+class SpeedupRegistry:
+    """The calculation times of a session per configuration and thread count, shared between processes."""
+
+    def __init__(self, directory: Path):
+        """Create a SpeedupRegistry.
+
+        Args:
+            directory (Path): The directory of the timing files. It is created if it doesn't exist.
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _configuration_path(self, test_id: str) -> Path:
+        """Get the directory of the timing files of a configuration (all params except num).
+
+        Args:
+            test_id (str): The test id of a test of the configuration.
+
+        Returns:
+            Path: The directory.
+        """
+        _num, *configuration = util.params_tuple_from_str(test_id)
+        return self.directory / "_".join(configuration)
+
+    def record(self, test_id: str, calculation_time: float) -> None:
+        """Record the calculation time of a test.
+
+        Args:
+            test_id (str): The test id.
+            calculation_time (float): The calculation time in seconds.
+        """
+        path = self._configuration_path(test_id)
+        path.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(str(calculation_time))
+        os.replace(tmp_name, path / test_id.split()[0])
+
+    def plateau(self, test_id: str) -> str | None:
+        """Check if the speedup of the configuration of a test plateaued below its thread count.
+
+        Args:
+            test_id (str): The test id.
+
+        Returns:
+            str | None: A description of the plateau, or None if the speedup didn't plateau (yet).
+        """
+        path = self._configuration_path(test_id)
+        if not path.is_dir():
+            return None
+        num = int(test_id.split()[0])
+        times = {}
+        for p in path.iterdir():
+            if p.name.isdigit() and int(p.name) < num:
+                times[int(p.name)] = float(p.read_text())
+        if len(times) < 2:
+            return None
+        a, b = sorted(times)[-2:]
+        speedup = max(times[a], 1e-6) / max(times[b], 1e-6)
+        if (speedup - 1) / (b / a - 1) >= PLATEAU_STEP_EFFICIENCY:
+            return None
+        return f"the speedup from num={a} to num={b} was only {speedup:.2f}"
@@ -0,0 +1,141 @@
+"""Throughput metrics of EXECUTABLE (see --throughput).
+
+Raw calculation times can't be compared across grid sizes, so each test's calculation time (the median of the
+benchmark samples with --benchmark, see scaling.py) is converted into lattice updates per second: the number of
+inner grid points `(lines * 8 + 7)^2` times the number of iterations, divided by the calculation time. The same
+is done for the reference output.
+
+The effective memory bandwidth is estimated from the updates per second and the memory traffic per update of
+each method (see BYTES_PER_UPDATE), assuming that the neighbours of a grid point are served from the cache. For
+small matrices that fit into the cache, the estimate exceeds the actual memory bandwidth.
+
+With --stream-benchmark, the copy bandwidth of the machine is measured once per session (by copying a buffer that
+is much larger than the caches), and each run's updates per second are reported relative to the resulting
+roofline-style bound: the copy bandwidth divided by the memory traffic per update.
+"""
+
+import statistics
+import time
+
+import pytest
+
+import benchmark
+import scaling
+import util
+from util import MethodParam
+
+# The memory traffic per update in bytes (8 bytes per double):
+BYTES_PER_UPDATE = {
+    # In place: read and write the updated point:
+    MethodParam.GAUSS_SEIDEL: 16,
+    # Read the point from one matrix, write it to the other one (plus its write-allocate read):
+    MethodParam.JACOBI: 24,
+}
+
+# The buffer size and the number of repetitions of the copy benchmark:
+STREAM_BENCHMARK_SIZE = 128 * 1024 * 1024
+STREAM_BENCHMARK_REPETITIONS = 5
+
+
+def grid_updates(partdiff_params: util.PartdiffParamsClass, iterations: int) -> int:
+    """Compute the number of grid point updates of a partdiff run.
+
+    Args:
+        partdiff_params (util.PartdiffParamsClass): The parameter combination.
+        iterations (int): The number of iterations.
+
+    Returns:
+        int: The number of updates of inner grid points.
+    """
+    return (partdiff_params.lines * 8 + 7) ** 2 * iterations
+
+
+def measure_copy_bandwidth(
+    size: int = STREAM_BENCHMARK_SIZE, repetitions: int = STREAM_BENCHMARK_REPETITIONS
+) -> float:
+    """Measure the memory bandwidth of the machine by copying a large buffer (like the STREAM copy kernel).
+
+    Args:
+        size (int): The size of the buffer in bytes.
+        repetitions (int): The number of copies; the fastest one counts.
+
+    Returns:
+        float: The bandwidth (bytes read plus bytes written per second).
+    """
+    source = bytearray(b"\x01") * size
+    destination = bytearray(size)
+    best = float("inf")
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        destination[:] = source
+        best = min(best, time.perf_counter() - start)
+    return 2 * size / best
+
+
+class ThroughputPlugin:
+    """A pytest plugin that collects the timings and reports the throughput at the end of the session.
+
+    With `pytest-xdist`, it must only be registered in the controller process.
+    """
+
+    def __init__(self, stream_bandwidth: float | None):
+        """Create a ThroughputPlugin.
+
+        Args:
+            stream_bandwidth (float | None): The measured copy bandwidth in bytes per second (None == not measured).
+        """
+        self.stream_bandwidth = stream_bandwidth
+        self.timings: dict[str, dict] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_runtest_logreport
+        """
+        if report.when != "call" or not report.passed:
+            return
+        timing = util.get_user_property(report, scaling.TIMING_PROPERTY)
+        if timing is None:
+            return
+        timing = dict(timing)
+        samples = util.get_user_property(report, benchmark.BENCHMARK_PROPERTY)
+        if samples is not None:
+            timing["calculation_time"] = statistics.median(samples["calculation_time"])
+        self.timings[timing["test_id"]] = timing
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        """
+        See https://docs.pytest.org/en/stable/reference/reference.html#pytest.hookspec.pytest_terminal_summary
+        """
+        if not self.timings:
+            return
+        terminalreporter.section("throughput")
+        if self.stream_bandwidth is not None:
+            terminalreporter.write_line(
+                f"Copy bandwidth: {self.stream_bandwidth / 1e9:.2f} GB/s"
+            )
+        terminalreporter.write_line(
+            f"{'test':<28} {'MUp/s':>10} {'ref. MUp/s':>10} {'vs. ref':>8} {'GB/s':>8}"
+            + (f" {'of bound':>8}" if self.stream_bandwidth is not None else "")
+        )
+        for test_id, timing in sorted(self.timings.items()):
+            partdiff_params = util.PartdiffParamsClass.from_tuple(
+                util.params_tuple_from_str(test_id)
+            )
+            bytes_per_update = BYTES_PER_UPDATE[partdiff_params.method]
+            # Avoid division by zero for runs below the timer resolution:
+            updates_per_second = grid_updates(
+                partdiff_params, timing["iterations"]
+            ) / max(timing["calculation_time"], 1e-6)
+            reference_updates_per_second = grid_updates(
+                partdiff_params, timing["reference_iterations"]
+            ) / max(timing["reference_calculation_time"], 1e-6)
+            line = (
+                f"{test_id:<28} {updates_per_second / 1e6:>10.2f} "
+                f"{reference_updates_per_second / 1e6:>10.2f} "
+                f"{updates_per_second / reference_updates_per_second:>8.2f} "
+                f"{updates_per_second * bytes_per_update / 1e9:>8.2f}"
+            )
+            if self.stream_bandwidth is not None:
+                bound = self.stream_bandwidth / bytes_per_update
+                line += f" {updates_per_second / bound:>8.1%}"
+            terminalreporter.write_line(line)
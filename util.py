@@ -1,21 +1,54 @@
 """Utility functions that are used by both `conftest.py` and `test_partdiff.py`."""
 
+import math
 import os
 import re
+import resource
+import signal
+import statistics
 import subprocess
-from collections.abc import Iterator
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass
 from enum import Enum, StrEnum
 from functools import cache
 from pathlib import Path
 from typing import Self
 
-import output_masks
+import pytest
+
+import output_parser
+import valgrind
+from reference_cache import ReferenceCache
 
 REFERENCE_IMPLEMENTATION_DIR = Path.cwd() / "reference_implementation"
 REFERENCE_IMPLEMENTATION_EXEC = REFERENCE_IMPLEMENTATION_DIR / "partdiff"
 REFERENCE_OUTPUT_PATH = Path.cwd() / "reference_output"
 TEST_CASES_FILE_PATH = Path.cwd() / "test_cases.txt"
+REFERENCE_CACHE_PATH = Path.cwd() / ".reference_cache"
+RESULT_CACHE_PATH = Path.cwd() / ".result_cache"
+HISTORY_FILE_PATH = Path.cwd() / ".partdiff_history.json"
+
+
+# Fallback calibration constants for estimate_runtime() (when there is no reference output to calibrate with):
+ESTIMATE_SECONDS_PER_UPDATE = 3e-9
+ESTIMATE_SECONDS_OVERHEAD = 0.01
+ESTIMATE_ACC_ITERATIONS = 1000
+# Reference runs that are shorter than this are too imprecise to calibrate the time per update (in s):
+MIN_CALIBRATION_TIME = 1e-3
+
+# The time after which check_executable_exists() stops waiting for the executable (in s):
+CHECK_EXECUTABLE_TIMEOUT = 5
+
+# The maximum number of bytes that run_executable() reads at once, so that --max-output-size is enforced even for
+# output without newlines:
+READ_CHUNK_SIZE = 1 << 16
+
+MAX_INTERLINES = 100000
+MAX_ITERATIONS = 200000
 
 
 class ReferenceSource(StrEnum):
@@ -75,13 +108,13 @@ class PartdiffParamsClass:
         assert 1 <= num <= 1024
         method = MethodParam(int(t[1]))
         lines = int(t[2])
-        assert 0 <= lines <= 100000
+        assert 0 <= lines <= MAX_INTERLINES
         func = FuncParam(int(t[3]))
         term = TermParam(int(t[4]))
         acc_iter: int | float = -1
         if term == TermParam.ITER:
             acc_iter = int(t[5])
-            assert 1 <= acc_iter <= 200000
+            assert 1 <= acc_iter <= MAX_ITERATIONS
         else:
             acc_iter = float(t[5])
             assert 1e-20 <= acc_iter <= 1e-4
@@ -89,6 +122,185 @@ class PartdiffParamsClass:
         return PartdiffParamsClass(num, method, lines, func, term, acc_iter)
 
 
+@dataclass(frozen=True)
+class ReferenceRun:
+    """The number of iterations and the calculation time of a cached reference output"""
+
+    iterations: int
+    calculation_time: float
+
+
+@cache
+def get_reference_runs() -> dict[PartdiffParamsTuple, ReferenceRun]:
+    """Get the number of iterations and the calculation time of each cached reference output.
+
+    Returns:
+        dict[PartdiffParamsTuple, ReferenceRun]: The runs by their partdiff params (empty without
+            `reference_output`).
+    """
+    if not REFERENCE_OUTPUT_PATH.is_dir():
+        return {}
+    runs = {}
+    for partdiff_params, output in iter_reference_output_data():
+        parsed = output_parser.parse_partdiff_output(output)
+        if parsed.header is None or parsed.iterations is None:
+            continue
+        calculation_time = float(parsed.header[0].value.split()[0])
+        runs[partdiff_params] = ReferenceRun(int(parsed.iterations), calculation_time)
+    return runs
+
+
+def grid_point_updates(partdiff_params: PartdiffParamsClass, iterations: int) -> int:
+    """Compute the work of a partdiff run in grid point updates.
+
+    Args:
+        partdiff_params (PartdiffParamsClass): The parameter combination.
+        iterations (int): The number of iterations.
+
+    Returns:
+        int: The number of grid point updates.
+    """
+    n = partdiff_params.lines * 8 + 9
+    return n * n * iterations
+
+
+def accuracy_digits(partdiff_params: PartdiffParamsClass) -> float:
+    """Get the number of decimal digits of the required accuracy of a term=acc run.
+
+    Args:
+        partdiff_params (PartdiffParamsClass): The parameter combination.
+
+    Returns:
+        float: The number of digits (accuracies below 1e-16 are not reachable with doubles, so they count as 16).
+    """
+    return -math.log10(max(partdiff_params.acc_iter, 1e-16))
+
+
+def reference_distance(a: PartdiffParamsClass, b: PartdiffParamsClass) -> float:
+    """Compute how similar the number of iterations of two term=acc runs is expected to be.
+
+    Args:
+        a (PartdiffParamsClass): The first parameter combination.
+        b (PartdiffParamsClass): The second parameter combination.
+
+    Returns:
+        float: The distance (0 == same lines, accuracy, method, and func).
+    """
+    return (
+        abs(math.log10((a.lines + 1) / (b.lines + 1)))
+        + abs(accuracy_digits(a) - accuracy_digits(b)) / 4
+        + 0.5 * (a.method != b.method)
+        + 0.5 * (a.func != b.func)
+    )
+
+
+def estimate_iterations(partdiff_params: PartdiffParamsClass) -> int:
+    """Estimate the number of iterations of a partdiff run.
+
+    For term=acc, the number of iterations depends on the matrix size in a way that is hard to model (e.g. with
+    an accuracy of 1e-4, the reference implementation stops after a single iteration from 100 interlines on), so
+    it is taken from the cached reference output with the most similar parameters (see reference_distance()).
+
+    Args:
+        partdiff_params (PartdiffParamsClass): The parameter combination.
+
+    Returns:
+        int: The estimated number of iterations.
+    """
+    if partdiff_params.term == TermParam.ITER:
+        return partdiff_params.acc_iter
+    candidates = [
+        (PartdiffParamsClass.from_tuple(p), run)
+        for p, run in get_reference_runs().items()
+        if TermParam(int(p[4])) == TermParam.ACC
+    ]
+    if not candidates:
+        return ESTIMATE_ACC_ITERATIONS
+    _params, run = min(
+        candidates, key=lambda c: reference_distance(partdiff_params, c[0])
+    )
+    return run.iterations
+
+
+@cache
+def seconds_per_update(method: MethodParam, func: FuncParam) -> float:
+    """Get the calculation time per grid point update, calibrated with the cached reference output.
+
+    The time per update differs by an order of magnitude between the methods and perturbation functions, so it
+    is calibrated separately for each combination of them.
+
+    Args:
+        method (MethodParam): The method.
+        func (FuncParam): The perturbation function.
+
+    Returns:
+        float: The median time per update of the reference runs with this method and func (or of all reference
+            runs if there are none, or ESTIMATE_SECONDS_PER_UPDATE without any reference runs).
+    """
+    rates: dict[tuple[MethodParam, FuncParam], list[float]] = {}
+    for p, run in get_reference_runs().items():
+        if run.calculation_time < MIN_CALIBRATION_TIME:
+            continue
+        params = PartdiffParamsClass.from_tuple(p)
+        rates.setdefault((params.method, params.func), []).append(
+            run.calculation_time / grid_point_updates(params, run.iterations)
+        )
+    if (method, func) in rates:
+        return statistics.median(rates[(method, func)])
+    all_rates = [rate for l in rates.values() for rate in l]
+    return statistics.median(all_rates) if all_rates else ESTIMATE_SECONDS_PER_UPDATE
+
+
+def estimate_runtime(partdiff_params: PartdiffParamsClass) -> float:
+    """Roughly estimate the runtime of a (serial) partdiff run.
+
+    The estimate is the number of grid point updates (see estimate_iterations()) times the calculation time per
+    update of the reference implementation (see seconds_per_update()), plus a constant overhead.
+
+    Args:
+        partdiff_params (PartdiffParamsClass): The parameter combination.
+
+    Returns:
+        float: The estimated runtime in seconds.
+    """
+    updates = grid_point_updates(partdiff_params, estimate_iterations(partdiff_params))
+    return (
+        updates * seconds_per_update(partdiff_params.method, partdiff_params.func)
+        + ESTIMATE_SECONDS_OVERHEAD
+    )
+
+
+def expected_memory_usage(partdiff_params: PartdiffParamsClass) -> float:
+    """Compute the memory needed for the matrices of a partdiff run (like the reference implementation does).
+
+    Args:
+        partdiff_params (PartdiffParamsClass): The parameter combination.
+
+    Returns:
+        float: The memory usage in MiB.
+    """
+    n = partdiff_params.lines * 8 + 9
+    num_matrices = 2 if partdiff_params.method == MethodParam.JACOBI else 1
+    return n * n * 8 * num_matrices / 1024 / 1024
+
+
+def weak_scaling_lines(lines: int, num: int) -> int:
+    """Derive the number of interlines for weak scaling.
+
+    The matrix has (lines * 8 + 9)^2 grid points, so the number of grid points per thread stays constant
+    when the matrix size grows with the square root of the number of threads.
+
+    Args:
+        lines (int): The number of interlines for one thread.
+        num (int): The number of threads.
+
+    Returns:
+        int: The number of interlines for num threads.
+    """
+    size = (lines * 8 + 9) * math.sqrt(num)
+    return min(max(round((size - 9) / 8), 0), MAX_INTERLINES)
+
+
 RE_REF_OUTPUT_FILE = re.compile(
     r"""
     ^
@@ -115,6 +327,9 @@ def iter_reference_output_data() -> Iterator[tuple[PartdiffParamsTuple, str]]:
     """
     assert REFERENCE_OUTPUT_PATH.is_dir()
     for p in REFERENCE_OUTPUT_PATH.iterdir():
+        # Skip the temporary files of make_reference_output.py:
+        if p.name.startswith("."):
+            continue
         m = RE_REF_OUTPUT_FILE.match(p.name)
         assert m
         partdiff_params = m.groups()
@@ -149,14 +364,56 @@ def get_test_cases() -> list[PartdiffParamsTuple]:
     return list(iter_test_cases())
 
 
+class ReferenceOutputDirectory(Mapping[PartdiffParamsTuple, str]):
+    """The reference output in `reference_output` as a lazily loaded mapping.
+
+    Only the file names are scanned on creation; a file is read when its output is accessed for the first time.
+    """
+
+    def __init__(self, directory: Path):
+        """Create a ReferenceOutputDirectory.
+
+        Args:
+            directory (Path): The directory containing the reference output files.
+        """
+        assert directory.is_dir()
+        self.paths: dict[PartdiffParamsTuple, Path] = {}
+        self.outputs: dict[PartdiffParamsTuple, str] = {}
+        for p in directory.iterdir():
+            # Skip the temporary files of make_reference_output.py:
+            if p.name.startswith("."):
+                continue
+            m = RE_REF_OUTPUT_FILE.match(p.name)
+            assert m
+            partdiff_params = m.groups()
+            assert len(partdiff_params) == 6
+            self.paths[partdiff_params] = p
+
+    def __getitem__(self, partdiff_params: PartdiffParamsTuple) -> str:
+        if partdiff_params not in self.outputs:
+            self.outputs[partdiff_params] = self.paths[partdiff_params].read_text()
+        return self.outputs[partdiff_params]
+
+    def __contains__(self, partdiff_params: object) -> bool:
+        return partdiff_params in self.paths
+
+    def __iter__(self) -> Iterator[PartdiffParamsTuple]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
 @cache
-def get_reference_output_data_map() -> dict[PartdiffParamsTuple, str]:
-    """Get the reference output as a dict.
+def get_reference_output_data_map() -> Mapping[PartdiffParamsTuple, str]:
+    """Get the reference output as a mapping.
+
+    The output files are read lazily (see ReferenceOutputDirectory).
 
     Returns:
-        dict[PartdiffParamsTuple, str]: A dict mapping parameter combinations to the corresponding output.
+        Mapping[PartdiffParamsTuple, str]: A mapping from parameter combinations to the corresponding output.
     """
-    return dict(iter_reference_output_data())
+    return ReferenceOutputDirectory(REFERENCE_OUTPUT_PATH)
 
 
 def ensure_reference_implementation_exists() -> None:
@@ -175,17 +432,38 @@ def ensure_reference_implementation_exists() -> None:
     assert is_executable()
 
 
+@cache
+def get_reference_cache(directory: Path, max_size_mib: int) -> ReferenceCache | None:
+    """Get the persistent cache for output of the reference implementation.
+
+    Args:
+        directory (Path): The directory of the cache.
+        max_size_mib (int): The maximum size of the cache in MiB (0 == cache disabled).
+
+    Returns:
+        ReferenceCache | None: The cache, or None if it is disabled.
+    """
+    if max_size_mib == 0:
+        return None
+    return ReferenceCache(
+        directory, max_size_mib * 1024 * 1024, REFERENCE_IMPLEMENTATION_EXEC
+    )
+
+
 def get_reference_output(
     partdiff_params: PartdiffParamsTuple,
-    reference_output_data: dict[PartdiffParamsTuple, str],
+    reference_output_data: Mapping[PartdiffParamsTuple, str],
     reference_source: ReferenceSource,
+    reference_cache: ReferenceCache | None,
 ) -> str:
     """Acquire the reference output.
 
     Args:
         partdiff_params (PartdiffParamsTuple): The parameter combination to get the output for.
-        reference_output_data (dict[PartdiffParamsTuple, str]): The cached reference output.
+        reference_output_data (Mapping[PartdiffParamsTuple, str]): The cached reference output.
         reference_source (ReferenceSource): The source of the reference output (cache, impl, or auto).
+        reference_cache (ReferenceCache | None): The persistent cache for output of the reference implementation
+            (None == disabled).
 
     Raises:
         RuntimeError: When reference_source=cache and the output for a parameter combination isn't cached.
@@ -200,10 +478,15 @@ def get_reference_output(
     def get_from_cache():
         return reference_output_data[partdiff_params]
 
-    def get_from_impl():
+    def run_impl():
         command_line = [REFERENCE_IMPLEMENTATION_EXEC] + list(partdiff_params)
         return subprocess.check_output(command_line).decode("utf-8")
 
+    def get_from_impl():
+        if reference_cache is None:
+            return run_impl()
+        return reference_cache.get_or_compute(partdiff_params, run_impl)
+
     assert reference_source in ReferenceSource
 
     match reference_source:
@@ -225,11 +508,331 @@ def get_reference_output(
             raise ValueError(f'Unexpected ReferenceSource "{other}"')
 
 
+def get_user_property(report: pytest.TestReport, name: str) -> object | None:
+    """Get a user property (see the `record_property` fixture) of a test report.
+
+    Args:
+        report (pytest.TestReport): The test report.
+        name (str): The name of the property.
+
+    Returns:
+        object | None: The value of the property, or None if it wasn't recorded.
+    """
+    for key, value in report.user_properties:
+        if key == name:
+            return value
+    return None
+
+
+RESOURCE_LIMIT_PROPERTY = "resource_limit"
+
+
+class LimitOutcome(StrEnum):
+    """The outcome of a test whose EXECUTABLE exceeded a resource limit"""
+
+    TIMEOUT = "timeout"
+    RESOURCE_EXCEEDED = "resource exceeded"
+
+
+# Allocation errors of partdiff ("Memory error!"), libc, C++, and Fortran runtimes:
+RE_OUT_OF_MEMORY = re.compile(
+    r"memory error|cannot allocate memory|std::bad_alloc|out of memory|ENOMEM",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Limits for a run of EXECUTABLE (see --timeout, --max-memory, --max-cpu-time, and --pin-cpus)"""
+
+    # The wall time limit (in s):
+    timeout: float | None = None
+    # The limit of the address space (in bytes), see RLIMIT_AS:
+    max_memory: int | None = None
+    # The CPU time limit (in s), see RLIMIT_CPU:
+    max_cpu_time: int | None = None
+    # The CPUs that EXECUTABLE may run on, see sched_setaffinity(2):
+    cpu_affinity: frozenset[int] | None = None
+
+    def apply(self) -> None:
+        """Apply the limits to the current process (this is the `preexec_fn` of the child process)."""
+        if self.max_memory is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (self.max_memory, self.max_memory))
+        if self.max_cpu_time is not None:
+            # The soft limit sends SIGXCPU, the hard limit SIGKILL:
+            resource.setrlimit(
+                resource.RLIMIT_CPU, (self.max_cpu_time, self.max_cpu_time + 1)
+            )
+        if self.cpu_affinity is not None:
+            os.sched_setaffinity(0, self.cpu_affinity)
+
+    def describe_exceeded(self, returncode: int, output: str) -> str | None:
+        """Describe which limit was probably exceeded by a process that exited with a given status.
+
+        A failure only counts as an exceeded memory limit if there is evidence for it: the process was killed by
+        SIGSEGV (e.g. by dereferencing the NULL returned by malloc()) or SIGKILL, or its output contains an
+        allocation error (see RE_OUT_OF_MEMORY). Otherwise, it is an ordinary failure.
+
+        Args:
+            returncode (int): The exit status of the process (negative == killed by a signal).
+            output (str): The output of the process (stdout and stderr).
+
+        Returns:
+            str | None: The description, or None if the exit status isn't caused by a limit.
+        """
+        if self.max_cpu_time is not None and returncode in (
+            -signal.SIGXCPU,
+            -signal.SIGKILL,
+        ):
+            return f"EXECUTABLE exceeded the CPU time limit of {self.max_cpu_time} s"
+        if self.max_memory is not None and (
+            returncode in (-signal.SIGSEGV, -signal.SIGKILL)
+            or RE_OUT_OF_MEMORY.search(output)
+        ):
+            return (
+                f"EXECUTABLE exited with status {returncode}, probably because it exceeded "
+                f"the memory limit of {self.max_memory / 1024 / 1024:g} MiB"
+            )
+        return None
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """The resource usage of a run of EXECUTABLE, as reported by the kernel (see getrusage(2))"""
+
+    wall_time: float
+    user_time: float
+    sys_time: float
+    # The peak resident set size (in MiB):
+    max_rss: float
+    voluntary_context_switches: int
+    involuntary_context_switches: int
+    # The peak resident set size of the tester process when EXECUTABLE was started (in MiB). The kernel also
+    # attributes it to EXECUTABLE, because EXECUTABLE was forked from the tester process:
+    inherited_rss: float
+
+    @property
+    def measured_rss(self) -> float | None:
+        """The peak resident set size of EXECUTABLE itself, or None if it is hidden by the inherited one."""
+        return self.max_rss if self.max_rss > self.inherited_rss else None
+
+    @property
+    def cpu_utilization(self) -> float:
+        """The CPU time divided by the wall time, i.e. the average number of busy threads."""
+        return (self.user_time + self.sys_time) / max(self.wall_time, 1e-9)
+
+
+class ResourceLimitError(Exception):
+    """EXECUTABLE timed out or exceeded a resource limit."""
+
+    def __init__(self, outcome: LimitOutcome, message: str, output: str):
+        """Create a ResourceLimitError.
+
+        Args:
+            outcome (LimitOutcome): Which kind of limit was exceeded.
+            message (str): The error message.
+            output (str): The partial output of EXECUTABLE.
+        """
+        super().__init__(message)
+        self.outcome = outcome
+        self.output = output
+
+
+class EarlyAbortError(AssertionError):
+    """EXECUTABLE was killed before it exited, because its output was already known to be wrong."""
+
+
+def run_executable(
+    command_line: list[str],
+    cwd: Path | None,
+    limits: ResourceLimits,
+    on_line: Callable[[int, bytes], None] | None = None,
+    max_output_size: int | None = None,
+    on_usage: Callable[[ResourceUsage], None] | None = None,
+) -> str:
+    """Run an executable under resource limits and read its output as it is produced.
+
+    The executable is started in a new session, so that the whole process tree (e.g. `mpirun` and its ranks, or
+    the children of a wrapper script) is killed whenever the tester kills the executable (on a timeout, an early
+    abort, or an interrupt).
+
+    Args:
+        command_line (list[str]): The command line to run.
+        cwd (Path | None): The working directory of the executable.
+        limits (ResourceLimits): The limits of the run.
+        on_line (Callable[[int, bytes], None] | None): Called with the index and content of each line of output
+            as soon as it arrives. It may raise an exception to kill the executable.
+        max_output_size (int | None): The maximum size of the output (in bytes, None == unlimited).
+        on_usage (Callable[[ResourceUsage], None] | None): Called with the resource usage of the executable once
+            it has exited.
+
+    Raises:
+        ResourceLimitError: When the executable timed out or exceeded a resource limit.
+        EarlyAbortError: When the output exceeded `max_output_size`.
+        subprocess.CalledProcessError: When the executable exits with a non-zero exit status.
+
+    Returns:
+        str: The output of the executable.
+    """
+    uses_limits = (
+        limits.max_memory is not None
+        or limits.max_cpu_time is not None
+        or limits.cpu_affinity is not None
+    )
+    output = bytearray()
+    timed_out = threading.Event()
+    inherited_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    # stderr goes to a file, so that it can't block EXECUTABLE while stdout is read:
+    with (
+        tempfile.TemporaryFile() as stderr_file,
+        subprocess.Popen(
+            command_line,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            preexec_fn=limits.apply if uses_limits else None,
+            start_new_session=True,
+        ) as process,
+    ):
+
+        def kill() -> None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        def kill_on_timeout() -> None:
+            timed_out.set()
+            kill()
+
+        timer = None
+        if limits.timeout is not None:
+            timer = threading.Timer(limits.timeout, kill_on_timeout)
+            timer.start()
+        try:
+            index = 0
+            pending = b""
+            while chunk := process.stdout.read1(READ_CHUNK_SIZE):
+                output += chunk
+                if max_output_size is not None and len(output) > max_output_size:
+                    raise EarlyAbortError(
+                        f"Killed EXECUTABLE: its output exceeded {max_output_size} bytes"
+                    )
+                if on_line is None:
+                    continue
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    on_line(index, line + b"\n")
+                    index += 1
+            if on_line is not None and pending:
+                on_line(index, pending)
+            # Reap the process ourselves to get its resource usage (Popen.wait() then uses the returncode):
+            _pid, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8", errors="replace")
+        except BaseException:
+            kill()
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+    # Pass stderr on, so that it still shows up in pytest's report:
+    sys.stderr.write(stderr)
+    if on_usage is not None:
+        on_usage(
+            ResourceUsage(
+                time.perf_counter() - start,
+                rusage.ru_utime,
+                rusage.ru_stime,
+                rusage.ru_maxrss / 1024,
+                rusage.ru_nvcsw,
+                rusage.ru_nivcsw,
+                inherited_rss,
+            )
+        )
+    if timed_out.is_set():
+        raise ResourceLimitError(
+            LimitOutcome.TIMEOUT,
+            f"EXECUTABLE timed out after {limits.timeout:g} s",
+            output.decode("utf-8", errors="replace"),
+        )
+    if process.returncode != 0:
+        message = limits.describe_exceeded(
+            process.returncode, output.decode("utf-8", errors="replace") + stderr
+        )
+        if message is not None:
+            raise ResourceLimitError(
+                LimitOutcome.RESOURCE_EXCEEDED,
+                message,
+                output.decode("utf-8", errors="replace"),
+            )
+        raise subprocess.CalledProcessError(
+            process.returncode, command_line, bytes(output), stderr
+        )
+    return output.decode("utf-8")
+
+
+def run_partdiff(
+    partdiff_params: PartdiffParamsTuple,
+    partdiff_executable: list[str],
+    use_valgrind: bool,
+    cwd: Path | None,
+    limits: ResourceLimits,
+    on_line: Callable[[int, bytes], None] | None = None,
+    max_output_size: int | None = None,
+    on_usage: Callable[[ResourceUsage], None] | None = None,
+) -> str:
+    """Run a partdiff executable for a parameter combination (optionally with valgrind).
+
+    With valgrind, memcheck's log is written to a temporary file and checked after the run.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        partdiff_executable (list[str]): The executable to run.
+        use_valgrind (bool): Wether valgrind shall be used.
+        cwd (Path | None): The working directory of the executable.
+        limits (ResourceLimits): The limits of the run.
+        on_line (Callable[[int, bytes], None] | None): See run_executable().
+        max_output_size (int | None): See run_executable().
+        on_usage (Callable[[ResourceUsage], None] | None): See run_executable().
+
+    Raises:
+        valgrind.ValgrindError: When memcheck found errors or definitely lost memory.
+
+    Returns:
+        str: The output of the executable.
+    """
+    command_line = partdiff_executable + list(partdiff_params)
+    if not use_valgrind:
+        return run_executable(
+            command_line, cwd, limits, on_line, max_output_size, on_usage
+        )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "valgrind.log"
+        command_line = (
+            valgrind.VALGRIND_COMMAND + [f"--log-file={log_path}"] + command_line
+        )
+        try:
+            output = run_executable(
+                command_line, cwd, limits, on_line, max_output_size, on_usage
+            )
+        except subprocess.CalledProcessError:
+            # Memory errors are the more likely explanation of a failing run:
+            valgrind.check_valgrind_log(log_path, require_summary=False)
+            raise
+        valgrind.check_valgrind_log(log_path)
+    return output
+
+
 def get_actual_output(
     partdiff_params: PartdiffParamsTuple,
     partdiff_executable: list[str],
     use_valgrind: bool,
     cwd: Path | None,
+    limits: ResourceLimits = ResourceLimits(),
+    on_usage: Callable[[ResourceUsage], None] | None = None,
 ) -> str:
     """Get the actual output for a parameter combination.
 
@@ -238,29 +841,107 @@ def get_actual_output(
         partdiff_executable (list[str]): The executable to run.
         use_valgrind (bool): Wether valgrind shall be used.
         cwd (Path | None): The working directory of the executable.
+        limits (ResourceLimits): The limits of the run (default: unlimited).
+        on_usage (Callable[[ResourceUsage], None] | None): Called with the resource usage of the run.
 
     Returns:
         str: The output of the executable.
     """
-    command_line = partdiff_executable + list(partdiff_params)
-    if use_valgrind:
-        command_line = ["valgrind", "--leak-check=full"] + command_line
-    return subprocess.check_output(command_line, cwd=cwd).decode("utf-8")
+    return run_partdiff(
+        partdiff_params,
+        partdiff_executable,
+        use_valgrind,
+        cwd,
+        limits,
+        on_usage=on_usage,
+    )
+
+
+def get_actual_output_streaming(
+    partdiff_params: PartdiffParamsTuple,
+    partdiff_executable: list[str],
+    use_valgrind: bool,
+    cwd: Path | None,
+    reference: output_parser.PartdiffOutput | None,
+    check: output_parser.OutputCheck,
+    max_output_size: int,
+    limits: ResourceLimits = ResourceLimits(),
+    on_usage: Callable[[ResourceUsage], None] | None = None,
+) -> str:
+    """Get the actual output for a parameter combination, checking it while it is produced.
+
+    The header lines are checked against the reference output as soon as they arrive (see
+    output_parser.check_header_line()). EXECUTABLE is killed on the first mismatch or when its output grows
+    beyond `max_output_size`.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        partdiff_executable (list[str]): The executable to run.
+        use_valgrind (bool): Wether valgrind shall be used.
+        cwd (Path | None): The working directory of the executable.
+        reference (output_parser.PartdiffOutput | None): The parsed reference output (None == don't check).
+        check (output_parser.OutputCheck): The fields of the header lines to check.
+        max_output_size (int): The maximum size of the output (in bytes).
+        limits (ResourceLimits): The limits of the run (default: unlimited).
+        on_usage (Callable[[ResourceUsage], None] | None): Called with the resource usage of the run.
+
+    Raises:
+        EarlyAbortError: When EXECUTABLE was killed.
+
+    Returns:
+        str: The output of the executable.
+    """
+
+    header_lines = []
+
+    def check_line(_index: int, line: bytes) -> None:
+        # Blank lines don't count as header lines (see output_parser.parse_partdiff_output()):
+        if (
+            reference is None
+            or len(header_lines) >= output_parser.NUM_HEADER_LINES
+            or not line.strip()
+        ):
+            return
+        header_lines.append(line.decode("utf-8").rstrip("\n"))
+        mismatch = output_parser.check_header_line(
+            len(header_lines) - 1, header_lines[-1], reference, check
+        )
+        if mismatch is not None:
+            raise EarlyAbortError(f"Killed EXECUTABLE: {mismatch}")
+
+    return run_partdiff(
+        partdiff_params,
+        partdiff_executable,
+        use_valgrind,
+        cwd,
+        limits,
+        check_line,
+        max_output_size,
+        on_usage,
+    )
 
 
 def check_executable_exists(executable: list[str], cwd: Path | None) -> None:
     """Check if the executable exists and can be executed by running it.
 
-    The executable is allowed to return a non-zero exit status.
+    The executable is allowed to return a non-zero exit status. It is killed (with its whole process tree) if it
+    is still running after CHECK_EXECUTABLE_TIMEOUT seconds, so a hanging executable doesn't block the session.
 
     Args:
         executable (list[str]): The executable to check
         cwd (Path | None): The working directory of the executable.
     """
-    try:
-        subprocess.check_output(executable, cwd=cwd)
-    except subprocess.CalledProcessError:
-        pass
+    with subprocess.Popen(
+        executable,
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    ) as process:
+        try:
+            process.wait(CHECK_EXECUTABLE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
 
 
 def params_tuple_from_str(value: str) -> PartdiffParamsTuple:
@@ -278,6 +959,22 @@ def params_tuple_from_str(value: str) -> PartdiffParamsTuple:
     return (num, method, lines, func, term, acc_iter)
 
 
+def params_with_term_iter(
+    partdiff_params: PartdiffParamsTuple, iterations: int
+) -> PartdiffParamsTuple:
+    """Force the termination condition "iterations" for a parameter combination.
+
+    Args:
+        partdiff_params (PartdiffParamsTuple): The parameter combination.
+        iterations (int): The number of iterations.
+
+    Returns:
+        PartdiffParamsTuple: The parameter combination with term=2 and acc/iter=iterations.
+    """
+    num, method, lines, func, _term, _acc_iter = partdiff_params
+    return (num, method, lines, func, "2", str(iterations))
+
+
 def parse_num_iterations_from_partdiff_output(output: str) -> int:
     """Parse the number of iterations from partdiff's output.
 
@@ -287,7 +984,23 @@ def parse_num_iterations_from_partdiff_output(output: str) -> int:
     Returns:
         int: The parsed iterations.
     """
-    m = output_masks.RE_OUTPUT_MASK_FOR_ITERATIONS.match(output)
-    assert m is not None
-    assert len(m.groups()) == 1
-    return int(m.groups()[0])
+    iterations = output_parser.parse_partdiff_output(output).iterations
+    assert iterations is not None, "Could not parse the number of iterations"
+    return int(iterations)
+
+
+def parse_time_and_memory_from_partdiff_output(output: str) -> tuple[float, float]:
+    """Parse the calculation time and memory usage from partdiff's output.
+
+    Args:
+        output (str): The partdiff output to parse.
+
+    Returns:
+        tuple[float, float]: The parsed calculation time (in s) and memory usage (in MiB).
+    """
+    time_line, memory_line, *_ = output_parser.parse_partdiff_output(
+        output
+    ).header_lines
+    assert time_line is not None, "Could not parse the calculation time"
+    assert memory_line is not None, "Could not parse the memory usage"
+    return (float(time_line.value.split()[0]), float(memory_line.value.split()[0]))
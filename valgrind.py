@@ -0,0 +1,118 @@
+"""Memory checking with valgrind (see --valgrind).
+
+EXECUTABLE is run with `valgrind --leak-check=full --errors-for-leak-kinds=definite`, and memcheck's log is
+written to a separate file and parsed into a `ValgrindReport`. A test fails if memcheck reports any error (e.g.
+invalid reads or writes) or definitely lost memory. Possibly lost memory doesn't count as an error, since the
+thread stacks of pthreads and OpenMP are commonly reported as possibly lost.
+
+With --valgrind=sample, only the cheapest test case of each combination of (num, method, func, term) is run with
+valgrind (see conftest.select_valgrind_samples()).
+"""
+
+import re
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+
+VALGRIND_COMMAND = ["valgrind", "--leak-check=full", "--errors-for-leak-kinds=definite"]
+
+RE_ERROR_SUMMARY = re.compile(
+    r"ERROR SUMMARY: ([0-9,]+) errors? from ([0-9,]+) contexts?"
+)
+RE_INVALID_READ = re.compile(r"Invalid read of size [0-9]+")
+RE_INVALID_WRITE = re.compile(r"Invalid write of size [0-9]+")
+RE_DEFINITELY_LOST = re.compile(r"definitely lost: ([0-9,]+) bytes in ([0-9,]+) blocks")
+
+
+class ValgrindMode(StrEnum):
+    """See --valgrind"""
+
+    OFF = "off"
+    ALL = "all"
+    SAMPLE = "sample"
+
+
+@dataclass(frozen=True)
+class ValgrindReport:
+    """The findings of memcheck for one run"""
+
+    errors: int
+    invalid_reads: int
+    invalid_writes: int
+    definitely_lost_bytes: int
+    log: str
+
+    @property
+    def clean(self) -> bool:
+        """Whether memcheck found neither errors nor definitely lost memory."""
+        return self.errors == 0 and self.definitely_lost_bytes == 0
+
+    def describe(self) -> str:
+        """Describe the findings.
+
+        Returns:
+            str: A one-line description.
+        """
+        return (
+            f"valgrind found {self.errors} error(s): {self.invalid_reads} invalid read(s), "
+            f"{self.invalid_writes} invalid write(s), {self.definitely_lost_bytes} byte(s) definitely lost"
+        )
+
+
+class ValgrindError(AssertionError):
+    """memcheck found errors or definitely lost memory."""
+
+    def __init__(self, report: ValgrindReport):
+        """Create a ValgrindError.
+
+        Args:
+            report (ValgrindReport): The findings of memcheck.
+        """
+        super().__init__(report.describe())
+        self.report = report
+
+
+def parse_valgrind_log(log: str) -> ValgrindReport:
+    """Parse the log of memcheck.
+
+    Args:
+        log (str): The log to parse.
+
+    Raises:
+        ValueError: When the log has no error summary (e.g. because valgrind crashed).
+
+    Returns:
+        ValgrindReport: The findings of memcheck.
+    """
+    m = RE_ERROR_SUMMARY.search(log)
+    if m is None:
+        raise ValueError(f"The valgrind log has no error summary:\n{log}")
+    m_lost = RE_DEFINITELY_LOST.search(log)
+    return ValgrindReport(
+        int(m.group(1).replace(",", "")),
+        len(RE_INVALID_READ.findall(log)),
+        len(RE_INVALID_WRITE.findall(log)),
+        0 if m_lost is None else int(m_lost.group(1).replace(",", "")),
+        log,
+    )
+
+
+def check_valgrind_log(log_path: Path, require_summary: bool = True) -> None:
+    """Check the log file of memcheck.
+
+    Args:
+        log_path (Path): The path of the log file.
+        require_summary (bool): Whether a log without error summary is an error (it is expected when valgrind
+            was killed).
+
+    Raises:
+        ValgrindError: When memcheck found errors or definitely lost memory.
+    """
+    if not log_path.exists():
+        return
+    log = log_path.read_text(errors="replace")
+    if not require_summary and RE_ERROR_SUMMARY.search(log) is None:
+        return
+    report = parse_valgrind_log(log)
+    if not report.clean:
+        raise ValgrindError(report)
@@ -0,0 +1,61 @@
+"""A `pytest-xdist` scheduler for --longest-first.
+
+This module imports `xdist`, so it must only be imported when `pytest-xdist` is installed.
+"""
+
+from itertools import cycle
+
+from xdist.scheduler import LoadScheduling
+from xdist.workermanage import WorkerController
+
+# Number of tests that are pending on each worker. `pytest-xdist` needs at least 2, because a worker only runs
+# a test once it knows the next one.
+PENDING_TESTS_PER_NODE = 2
+
+
+class LongestFirstScheduling(LoadScheduling):
+    """Distribute the tests one by one in collection order to the next idle worker.
+
+    `LoadScheduling` sends chunks of consecutive tests to each worker, which would put all of the longest tests
+    on the first worker when the tests are ordered longest-first. Sending them one by one to whichever worker
+    becomes idle first instead implements the greedy longest-processing-time-first (LPT) strategy.
+    """
+
+    def check_schedule(self, node: WorkerController, duration: float = 0) -> None:
+        if node.shutting_down:
+            return
+        if not self.pending:
+            node.shutdown()
+            return
+        node_pending = self.node2pending[node]
+        num_send = min(PENDING_TESTS_PER_NODE - len(node_pending), len(self.pending))
+        if num_send > 0:
+            self._send_tests(node, num_send)
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        self.pending[:] = range(len(self.collection))
+        if not self.collection:
+            return
+
+        # Round-robin, so that the longest tests are spread across all workers:
+        nodes = cycle(self.nodes)
+        for _ in range(
+            min(len(self.pending), PENDING_TESTS_PER_NODE * len(self.nodes))
+        ):
+            self._send_tests(next(nodes), 1)
+
+        if not self.pending:
+            for node in self.nodes:
+                node.shutdown()